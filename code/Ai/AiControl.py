@@ -4,32 +4,168 @@ __author__ = "Michel Tremblay"
 
 
 import random
+import threading
 from dames.partie import Partie
+from Ai.finales import TablesFinales
+from Ai.livre import LivreOuvertures
+from Ai.recherche import Recherche
+from Ai.parallele import RechercheParallele
+from Ai.transposition import TableTransposition
 
 class AiControl:
     """Une classe pour generer un AI"""
 
-    def __init__(self, partie):
+    def __init__(self, partie, profondeur_max=8, temps_max=1.0, noeuds_max=None, taille_table_mo=16,
+                 nombre_processus=1, fichier_finales=None, fichier_livre=None, graine=None):
+        """
+        :param partie: La partie dans laquelle l'ordinateur joue.
+        :param profondeur_max: La profondeur maximale de la recherche, en tours.
+        :param temps_max: Le temps de réflexion permis par coup, en secondes (None pour aucune limite).
+        :param noeuds_max: Le nombre de noeuds permis par coup (None pour aucune limite).
+        :param taille_table_mo: La taille de la table de transposition, en mégaoctets.
+        :param nombre_processus: Le nombre de processus utilisés par la recherche. Au-delà de 1, la recherche est
+                                 parallèle et il faut appeler fermer() lorsque l'AI n'est plus utilisé.
+        :param fichier_finales: Le fichier de tables de finales à consulter pendant la recherche (voir Ai.finales),
+                                ou None.
+        :param fichier_livre: Le livre d'ouvertures consulté avant chaque recherche (voir Ai.livre), ou None.
+        :param graine: La graine du hasard utilisé pour choisir parmi les coups du livre.
+        """
         self.currentdamier = partie
+        self.profondeur_max = profondeur_max
+        self.temps_max = temps_max
+        self.noeuds_max = noeuds_max
+        if nombre_processus > 1:
+            self.recherche = RechercheParallele(nombre_processus, taille_table_mo, fichier_finales)
+            self.finales = self.recherche.finales
+        else:
+            self.finales = TablesFinales(fichier_finales) if fichier_finales is not None else None
+            self.recherche = Recherche(TableTransposition(taille_table_mo), threading.Event(), finales=self.finales)
+        self.livre = LivreOuvertures(fichier_livre) if fichier_livre is not None else None
+        self.hasard = random.Random(graine)
+        self.derniere_recherche = None
+
+        # Recherche en arrière-plan (voir lancer_recherche): le fil d'exécution, et le coup trouvé.
+        self.fil_recherche = None
+        self.coup_fil = None
     
     def StartAIGet(self):
-        bigHistory = self.GetPossibleSource()
-        #bestMove = self.getBestMove()
-        return random.choice(bigHistory)
+        """
+        Cherche le meilleur déplacement pour le joueur courant.
+
+        :return: Le premier saut (source, destination) du meilleur coup, ou None si le joueur courant ne peut pas
+                 jouer.
+        """
+        coup = self.choisir_coup()
+        if coup is None:
+            return None
+        return coup.chemin[0], coup.chemin[1]
+
+    def choisir_coup(self, partie=None, rapport=None):
+        """
+        Cherche le meilleur coup complet pour le joueur courant, en respectant la prise obligatoire et la position
+        source forcée de la partie. Si la position est dans le livre d'ouvertures, un des coups du livre est choisi
+        sans recherche.
+
+        :param partie: La partie où chercher (par défaut, celle dans laquelle l'ordinateur joue).
+        :param rapport: Une fonction appelée avec le résultat de chaque itération de la recherche (voir
+                        Recherche.chercher), ou None.
+        :return: Le coup (instance de Coup), ou None si le joueur courant ne peut pas jouer.
+        """
+        partie = partie if partie is not None else self.currentdamier
+        if self.livre is not None:
+            coup = self.livre.choisir_coup(partie, self.hasard)
+            if coup is not None:
+                self.derniere_recherche = None
+                return coup
+
+        position_forcee = partie.position_source_forcee if partie.doit_prendre else None
+        self.recherche.table.nouvelle_generation()
+        self.derniere_recherche = self.recherche.chercher(partie.damier, partie.couleur_joueur_courant,
+                                                          position_forcee, self.profondeur_max, self.temps_max,
+                                                          self.noeuds_max, rapport)
+        return self.derniere_recherche.meilleur_coup
+
+    def lancer_recherche(self):
+        """
+        Démarre la recherche du meilleur coup (voir choisir_coup) dans un fil d'exécution séparé, sur une copie de la
+        partie: l'interface reste libre pendant la recherche. Le coup est lu avec coup_trouve lorsque
+        recherche_terminee retourne True.
+        """
+        self.annuler_recherche()
+        self.recherche.signal_arret.clear()
+        self.coup_fil = None
+        self.fil_recherche = threading.Thread(target=self._chercher_en_arriere_plan,
+                                              args=(self.currentdamier.copier(),), daemon=True)
+        self.fil_recherche.start()
+
+    def _chercher_en_arriere_plan(self, partie):
+        self.coup_fil = self.choisir_coup(partie)
+
+    def recherche_en_cours(self):
+        """
+        Retourne True si une recherche lancée avec lancer_recherche n'est pas terminée.
+        """
+        return self.fil_recherche is not None and self.fil_recherche.is_alive()
+
+    def recherche_terminee(self):
+        """
+        Retourne True si une recherche a été lancée avec lancer_recherche et qu'elle est terminée.
+        """
+        return self.fil_recherche is not None and not self.fil_recherche.is_alive()
+
+    def coup_trouve(self):
+        """
+        Retourne le coup trouvé par la dernière recherche lancée avec lancer_recherche, et l'oublie.
+
+        :return: Le coup (instance de Coup), ou None si le joueur courant ne pouvait pas jouer.
+        """
+        coup = self.coup_fil
+        self.fil_recherche = None
+        self.coup_fil = None
+        return coup
+
+    def annuler_recherche(self):
+        """
+        Interrompt la recherche lancée avec lancer_recherche, s'il y en a une, et attend la fin de son fil
+        d'exécution. Son coup est oublié.
+        """
+        if self.fil_recherche is not None:
+            self.recherche.signal_arret.set()
+            self.fil_recherche.join()
+        self.fil_recherche = None
+        self.coup_fil = None
+
+    def fermer(self):
+        """
+        Interrompt la recherche en arrière-plan, puis libère les processus et la mémoire partagée de la recherche
+        parallèle, ainsi que les tables de finales et le livre d'ouvertures, s'il y a lieu.
+        """
+        self.annuler_recherche()
+        if isinstance(self.recherche, RechercheParallele):
+            self.recherche.fermer()
+        elif self.finales is not None:
+            self.finales.fermer()
+        self.finales = None
+        if self.livre is not None:
+            self.livre.fermer()
+            self.livre = None
+
+    def rapport(self):
+        """
+        Retourne une chaîne décrivant la dernière recherche: profondeur atteinte, noeuds visités et noeuds par
+        seconde.
+        """
+        resultat = self.derniere_recherche
+        if resultat is None:
+            return "livre d'ouvertures" if self.livre is not None else ""
+        return "profondeur {}, {} noeuds, {} noeuds/s".format(resultat.profondeur, resultat.noeuds,
+                                                              resultat.noeuds_par_seconde)
 
     
     def GetPossibleSource(self):
-        couleur = self.currentdamier.couleur_joueur_courant
         possibleSource = []
-        doitPrendre = self.currentdamier.joueur_courant_peut_prendre_piece_adverse()
-        for key in self.currentdamier.damier.cases.keys():
-            try:
-                self.currentdamier.valider_position_source(key)
-                destpossible = self.currentdamier.damier.lister_deplacements_possibles_a_partir_de_position(key,doitPrendre)
-                if destpossible != []:
-                    possibleSource.append((key,random.choice(destpossible)))
-            except Exception as e:
-                message = e.msg
+        for key, destpossible in self.currentdamier.deplacements_permis().items():
+            possibleSource.append((key,random.choice(destpossible)))
         return possibleSource
 
     
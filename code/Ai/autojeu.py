@@ -0,0 +1,237 @@
+#! /usr/bin/env python
+# -*- coding:Utf-8 -*-
+__author__ = "Michel Tremblay"
+
+
+import argparse
+import collections
+import multiprocessing
+import os
+import random
+import time
+from dames.partie import Partie
+from dames.pdn import PartiePDN, ecrire_partie, VICTOIRE_BLANC, VICTOIRE_NOIR, NULLE
+from Ai.AiControl import AiControl
+from Ai.finales import GAIN, NULLE as NULLE_FINALES
+
+# Une partie est nulle après ce nombre de tours, ou si la même position revient ce nombre de fois.
+TOURS_MAX = 200
+REPETITIONS_NULLE = 3
+
+# État de chaque processus de jeu, créé une seule fois par _initialiser_joueur.
+_joueur = {}
+
+
+def _initialiser_joueur(repertoire, compteur_fichiers, parametres_ai):
+    """
+    Initialise un processus de jeu: il ouvre son propre fichier de sortie (un fichier par processus, pour qu'aucune
+    écriture ne soit partagée) et garde une seule partie et un seul AI pour toute sa durée de vie.
+    """
+    with compteur_fichiers.get_lock():
+        numero_fichier = compteur_fichiers.value
+        compteur_fichiers.value += 1
+
+    partie = Partie()
+    _joueur["partie"] = partie
+    _joueur["ai"] = AiControl(partie, **parametres_ai)
+    _joueur["fichier"] = open(os.path.join(repertoire, "parties-{:03d}.pdn".format(numero_fichier)), "a")
+
+
+def jouer_partie(partie, ai, graine, coups_aleatoires=4, tours_max=TOURS_MAX):
+    """
+    Joue une partie complète de l'ordinateur contre lui-même, à partir de la position initiale. Les premiers tours
+    sont choisis au hasard (selon la graine) pour que les parties ne soient pas toutes identiques.
+
+    :param partie: La partie à utiliser (elle est réinitialisée).
+    :param ai: L'AI qui joue les deux couleurs; il doit jouer dans cette partie.
+    :type ai: AiControl.
+    :param graine: La graine du hasard de la partie.
+    :type graine: int.
+    :param coups_aleatoires: Le nombre de tours joués au hasard au début de la partie.
+    :type coups_aleatoires: int.
+    :param tours_max: Le nombre de tours après lequel la partie est nulle.
+    :type tours_max: int.
+    :return: Un tuple (resultat, raison): le résultat est VICTOIRE_BLANC, VICTOIRE_NOIR ou NULLE (voir dames.pdn),
+             et la raison est
+             "blocage" (le perdant ne peut plus jouer), "repetition", "limite" ou "finales" (la partie est arbitrée
+             dès que la position est dans les tables de finales de l'AI). Les coups joués sont dans partie.coups.
+    """
+    hasard = random.Random(graine)
+    ai.hasard.seed(graine)
+    partie.nouvelle_partie()
+    ai.recherche.table.vider()
+    repetitions = collections.Counter([partie.hash_position()])
+
+    while len(partie.coups) < tours_max:
+        if ai.finales is not None:
+            valeur = ai.finales.sonder(partie.damier, partie.couleur_joueur_courant)
+            if valeur is not None:
+                if valeur[0] == NULLE_FINALES:
+                    return NULLE, "finales"
+                gagne = (valeur[0] == GAIN) == (partie.couleur_joueur_courant == "blanc")
+                return (VICTOIRE_BLANC if gagne else VICTOIRE_NOIR), "finales"
+
+        coups = partie.lister_coups()
+        if not coups:
+            gagnant = VICTOIRE_NOIR if partie.couleur_joueur_courant == "blanc" else VICTOIRE_BLANC
+            return gagnant, "blocage"
+
+        if len(partie.coups) < coups_aleatoires:
+            coup = hasard.choice(coups)
+        else:
+            coup = ai.choisir_coup()
+            if coup is None:
+                # Impossible si le joueur a des coups, mais une exception ferait perdre tout le lot du processus.
+                coup = coups[0]
+        partie.jouer_coup(coup)
+
+        cle = partie.hash_position()
+        repetitions[cle] += 1
+        if repetitions[cle] >= REPETITIONS_NULLE:
+            return NULLE, "repetition"
+
+    return NULLE, "limite"
+
+
+def _jouer_et_ecrire(numero, graine, coups_aleatoires, tours_max, echeance):
+    """
+    Joue une partie dans un processus de jeu et l'écrit aussitôt, en PDN, dans le fichier du processus. La partie
+    n'est pas commencée si l'échéance est dépassée.
+
+    :return: Un tuple (resultat, nombre de tours), ou None si la partie n'a pas été jouée.
+    """
+    if echeance is not None and time.time() >= echeance:
+        return None
+
+    partie = _joueur["partie"]
+    resultat, raison = jouer_partie(partie, _joueur["ai"], graine, coups_aleatoires, tours_max)
+    etiquettes = {"Event": "Autojeu", "Round": numero, "Graine": graine, "Raison": raison}
+    fichier = _joueur["fichier"]
+    ecrire_partie(fichier, PartiePDN.depuis_partie(partie, resultat, etiquettes))
+    fichier.flush()
+    return resultat, len(partie.coups)
+
+
+class Statistiques:
+    """
+    Compte les parties terminées et leurs résultats.
+    """
+
+    def __init__(self):
+        self.debut = time.perf_counter()
+        self.parties = 0
+        self.tours = 0
+        self.resultats = collections.Counter()
+
+    def ajouter(self, resultat, tours):
+        self.parties += 1
+        self.tours += tours
+        self.resultats[resultat] += 1
+
+    @property
+    def parties_par_seconde(self):
+        duree = time.perf_counter() - self.debut
+        return self.parties / duree if duree > 0 else 0.0
+
+    def __repr__(self):
+        return "{} parties ({} blanc, {} noir, {} nulles), {} tours, {:.2f} parties/s".format(
+            self.parties, self.resultats[VICTOIRE_BLANC], self.resultats[VICTOIRE_NOIR], self.resultats[NULLE],
+            self.tours, self.parties_par_seconde)
+
+
+def generer_parties(repertoire, nombre_parties=None, duree_max=None, nombre_processus=None, graine=0,
+                    coups_aleatoires=4, tours_max=TOURS_MAX, parametres_ai=None, rapport=None,
+                    intervalle_rapport=10):
+    """
+    Génère des parties de l'ordinateur contre lui-même, réparties sur plusieurs processus. Chaque processus écrit ses
+    parties en PDN dans son propre fichier du répertoire (parties-000.pdn, parties-001.pdn, ...) dès qu'elles sont
+    terminées: aucune partie n'est gardée en mémoire. Les fichiers se relisent avec dames.pdn.lire_parties.
+
+    La partie numéro n utilise la graine "graine + n", et l'AI est limité en noeuds plutôt qu'en temps: une même
+    partie est donc rejouée à l'identique, peu importe le processus qui la joue.
+
+    :param repertoire: Le répertoire où écrire les fichiers (il est créé au besoin).
+    :type repertoire: string.
+    :param nombre_parties: Le nombre de parties à jouer (None pour aucune limite).
+    :type nombre_parties: int.
+    :param duree_max: La durée maximale, en secondes (None pour aucune limite). Aucune partie n'est commencée après
+                      ce délai, mais les parties en cours sont terminées.
+    :type duree_max: float.
+    :param nombre_processus: Le nombre de processus de jeu (par défaut, le nombre de processeurs).
+    :type nombre_processus: int.
+    :param graine: La graine de la première partie.
+    :type graine: int.
+    :param coups_aleatoires: Le nombre de tours joués au hasard au début de chaque partie.
+    :type coups_aleatoires: int.
+    :param tours_max: Le nombre de tours après lequel une partie est nulle.
+    :type tours_max: int.
+    :param parametres_ai: Les paramètres de AiControl (par défaut, 2000 noeuds par coup, sans limite de temps).
+    :type parametres_ai: dict.
+    :param rapport: Fonction appelée avec les statistiques toutes les "intervalle_rapport" parties, ou None.
+    :return: Les statistiques des parties jouées.
+    :rtype: Statistiques.
+    """
+    if nombre_parties is None and duree_max is None:
+        raise ValueError("Il faut limiter le nombre de parties ou la durée.")
+
+    if parametres_ai is None:
+        parametres_ai = {"profondeur_max": 64, "temps_max": None, "noeuds_max": 2000, "taille_table_mo": 4}
+    nombre_processus = nombre_processus or multiprocessing.cpu_count()
+    os.makedirs(repertoire, exist_ok=True)
+    echeance = time.time() + duree_max if duree_max is not None else None
+    statistiques = Statistiques()
+
+    compteur_fichiers = multiprocessing.Value("i", 0)
+    with multiprocessing.Pool(nombre_processus, _initialiser_joueur,
+                              (repertoire, compteur_fichiers, parametres_ai)) as pool:
+        # On garde quelques parties d'avance par processus, sans jamais soumettre toutes les parties d'un coup.
+        en_cours = collections.deque()
+        numero = 0
+        while True:
+            while (len(en_cours) < 2 * nombre_processus and
+                   (nombre_parties is None or numero < nombre_parties) and
+                   (echeance is None or time.time() < echeance)):
+                en_cours.append(pool.apply_async(_jouer_et_ecrire, (numero, graine + numero, coups_aleatoires,
+                                                                    tours_max, echeance)))
+                numero += 1
+            if not en_cours:
+                break
+
+            resultat = en_cours.popleft().get()
+            if resultat is not None:
+                statistiques.ajouter(*resultat)
+                if rapport is not None and statistiques.parties % intervalle_rapport == 0:
+                    rapport(statistiques)
+
+    return statistiques
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère des parties de l'ordinateur contre lui-même, sans "
+                                                 "interface graphique.")
+    parser.add_argument("repertoire", help="répertoire où écrire les parties")
+    parser.add_argument("--parties", type=int, help="nombre de parties à jouer")
+    parser.add_argument("--duree", type=float, help="durée maximale, en secondes")
+    parser.add_argument("--processus", type=int, default=multiprocessing.cpu_count(), help="nombre de processus")
+    parser.add_argument("--graine", type=int, default=0, help="graine de la première partie")
+    parser.add_argument("--aleatoires", type=int, default=4, help="nombre de tours joués au hasard en début de partie")
+    parser.add_argument("--tours-max", type=int, default=TOURS_MAX, help="nombre de tours avant la nulle")
+    parser.add_argument("--noeuds", type=int, default=2000, help="noeuds permis à l'AI par coup")
+    parser.add_argument("--profondeur", type=int, default=64, help="profondeur maximale de l'AI, en tours")
+    parser.add_argument("--finales", help="tables de finales utilisées par l'AI et pour arbitrer les parties")
+    parser.add_argument("--livre", help="livre d'ouvertures utilisé par l'AI")
+    arguments = parser.parse_args()
+    if arguments.parties is None and arguments.duree is None:
+        parser.error("il faut indiquer --parties ou --duree")
+
+    parametres_ai = {"profondeur_max": arguments.profondeur, "temps_max": None, "noeuds_max": arguments.noeuds,
+                     "taille_table_mo": 4, "fichier_finales": arguments.finales,
+                     "fichier_livre": arguments.livre}
+    statistiques = generer_parties(arguments.repertoire, arguments.parties, arguments.duree, arguments.processus,
+                                   arguments.graine, arguments.aleatoires, arguments.tours_max, parametres_ai,
+                                   rapport=print)
+    print("total: {}".format(statistiques))
+
+
+if __name__ == "__main__":
+    main()
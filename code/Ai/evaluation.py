@@ -0,0 +1,19 @@
+#! /usr/bin/env python
+# -*- coding:Utf-8 -*-
+__author__ = "Michel Tremblay"
+
+
+def evaluer(damier, couleur):
+    """
+    Évalue une position du point de vue d'un joueur: le matériel, plus un petit bonus pour les pions avancés. Ce
+    score est celui de la table positionnelle du damier (voir dames.table_positionnelle), que le damier tient à jour
+    à chaque déplacement: l'évaluation ne parcourt donc pas les pièces.
+
+    :param damier: Le damier à évaluer.
+    :param couleur: La couleur du joueur ("blanc", "noir") du point de vue duquel on évalue.
+    :type couleur: string.
+    :return: Le score, positif si la position est favorable au joueur.
+    """
+    if couleur == "blanc":
+        return damier.score_positionnel
+    return -damier.score_positionnel
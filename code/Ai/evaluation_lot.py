@@ -0,0 +1,126 @@
+#! /usr/bin/env python
+# -*- coding:Utf-8 -*-
+__author__ = "Michel Tremblay"
+
+
+import argparse
+import time
+from dames.coup import position_case
+from dames.encodage import encoder, NOMBRE_CASES, PION_BLANC, DAME_BLANCHE, PION_NOIR, DAME_NOIRE
+from dames.partie import Partie
+from dames.pdn import lire_parties
+from dames.table_positionnelle import VALEUR_PION, VALEUR_DAME, BONUS_AVANCEMENT
+
+# NumPy n'est nécessaire que pour évaluer des positions en lot (voir dames.encodage).
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Bonus accordé pour chaque pièce sur l'une des huit cases du centre (lignes 3 et 4, colonnes 2 à 5).
+BONUS_CENTRE = 4
+
+# Bonus accordé pour chaque pion resté sur sa ligne de départ, qui empêche l'adversaire d'y être promu.
+BONUS_DERNIERE_LIGNE = 5
+
+# Bonus accordé pour chaque déplacement simple (sans prise) possible.
+BONUS_MOBILITE = 2
+
+
+def _voisins(delta_ligne, delta_colonne):
+    # Numéro de la case voisine dans une direction, ou NOMBRE_CASES (une case toujours occupée) hors du damier.
+    voisins = []
+    for numero in range(NOMBRE_CASES):
+        ligne, colonne = position_case(numero)
+        ligne, colonne = ligne + delta_ligne, colonne + delta_colonne
+        voisins.append(ligne * 4 + colonne // 2 if 0 <= ligne <= 7 and 0 <= colonne <= 7 else NOMBRE_CASES)
+    return numpy.array(voisins)
+
+
+if numpy is not None:
+    _LIGNES = numpy.array([position_case(numero)[0] for numero in range(NOMBRE_CASES)])
+    _CENTRE = numpy.array([position_case(numero)[0] in (3, 4) and 2 <= position_case(numero)[1] <= 5
+                           for numero in range(NOMBRE_CASES)])
+
+    # Directions vers le haut (celles des pions blancs), puis vers le bas (celles des pions noirs).
+    _VOISINS_HAUT = (_voisins(-1, -1), _voisins(-1, 1))
+    _VOISINS_BAS = (_voisins(1, -1), _voisins(1, 1))
+
+
+def evaluer_lot(positions, couleurs):
+    """
+    Évalue plusieurs positions à la fois: le matériel et l'avancement des pions (comme Ai.evaluation.evaluer), plus
+    le contrôle du centre, la défense de la ligne de départ et la mobilité.
+
+    :param positions: Les positions encodées (voir dames.encodage.encoder_lot).
+    :type positions: tableau de forme (nombre de positions, NOMBRE_CASES).
+    :param couleurs: La couleur du joueur du point de vue duquel chaque position est évaluée, ou une seule couleur
+                     pour toutes les positions.
+    :type couleurs: string ou liste de strings.
+    :return: Les scores, positifs si la position est favorable au joueur.
+    :rtype: tableau numpy d'entiers.
+    :raise ImportError: Si NumPy n'est pas installé.
+    """
+    if numpy is None:
+        raise ImportError("NumPy est nécessaire pour évaluer des positions en lot.")
+    positions = numpy.asarray(positions, dtype=numpy.int8).reshape(-1, NOMBRE_CASES)
+    pions_blancs = positions == PION_BLANC
+    dames_blanches = positions == DAME_BLANCHE
+    pions_noirs = positions == PION_NOIR
+    dames_noires = positions == DAME_NOIRE
+    blancs = pions_blancs | dames_blanches
+    noirs = pions_noirs | dames_noires
+
+    score = VALEUR_PION * (pions_blancs.sum(axis=1) - pions_noirs.sum(axis=1))
+    score += VALEUR_DAME * (dames_blanches.sum(axis=1) - dames_noires.sum(axis=1))
+    score += BONUS_AVANCEMENT * (pions_blancs @ (7 - _LIGNES) - pions_noirs @ _LIGNES)
+    score += BONUS_CENTRE * ((blancs & _CENTRE).sum(axis=1) - (noirs & _CENTRE).sum(axis=1))
+    score += BONUS_DERNIERE_LIGNE * ((pions_blancs & (_LIGNES == 7)).sum(axis=1) -
+                                     (pions_noirs & (_LIGNES == 0)).sum(axis=1))
+
+    # Une colonne de plus, toujours fausse, pour les voisins hors du damier.
+    vides = numpy.zeros((len(positions), NOMBRE_CASES + 1), dtype=bool)
+    vides[:, :NOMBRE_CASES] = positions == 0
+    mobilite = 0
+    for voisins in _VOISINS_HAUT:
+        libres = vides[:, voisins]
+        mobilite += (blancs & libres).sum(axis=1) - (dames_noires & libres).sum(axis=1)
+    for voisins in _VOISINS_BAS:
+        libres = vides[:, voisins]
+        mobilite += (dames_blanches & libres).sum(axis=1) - (noirs & libres).sum(axis=1)
+    score += BONUS_MOBILITE * mobilite
+
+    return numpy.where(numpy.asarray(couleurs) == "blanc", score, -score)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Évalue en lot toutes les positions de fichiers de parties PDN (par "
+                                                 "exemple écrits par Ai.autojeu).")
+    parser.add_argument("parties", nargs="+", help="fichiers de parties PDN")
+    arguments = parser.parse_args()
+
+    partie = Partie()
+    positions = []
+    couleurs = []
+    for nom_fichier in arguments.parties:
+        with open(nom_fichier) as f:
+            for partie_pdn in lire_parties(f):
+                if "FEN" in partie_pdn.etiquettes:
+                    continue
+                coups = list(partie_pdn.rejouer(partie))
+
+                partie.nouvelle_partie()
+                for coup in coups:
+                    partie.jouer_coup(coup)
+                    positions.append(encoder(partie.damier))
+                    couleurs.append(partie.couleur_joueur_courant)
+
+    debut = time.perf_counter()
+    scores = evaluer_lot(numpy.array(positions, dtype=numpy.int8).reshape(-1, NOMBRE_CASES), couleurs)
+    duree = time.perf_counter() - debut
+    print("{} positions évaluées en {:.3f} s (score moyen {:.1f})".format(len(scores), duree,
+                                                                         scores.mean() if len(scores) else 0))
+
+
+if __name__ == "__main__":
+    main()
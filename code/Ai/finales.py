@@ -0,0 +1,319 @@
+#! /usr/bin/env python
+# -*- coding:Utf-8 -*-
+__author__ = "Michel Tremblay"
+
+
+import argparse
+import itertools
+import mmap
+import struct
+import time
+from math import comb
+from dames.damier import Damier
+
+# Résultat d'une position, du point de vue du joueur qui a le trait.
+GAIN = 1
+NULLE = 0
+PERTE = -1
+
+# Chaque position occupe un octet: 0 pour une nulle, 1 à 127 pour un gain en autant de tours, 128 + n pour une
+# perte en n tours (128 signifie que le joueur ne peut plus jouer).
+_PERTE = 128
+DISTANCE_MAX = 127
+
+# Le fichier commence par un en-tête (identifiant, nombre maximal de pièces, nombre de signatures), suivi d'une
+# entrée par signature (pions blancs, dames blanches, pions noirs, dames noires, décalage et taille de sa table),
+# puis des tables elles-mêmes.
+_IDENTIFIANT = b"DAMESFIN"
+_EN_TETE = struct.Struct("<8sBI")
+_ENTREE = struct.Struct("<4BQQ")
+
+# Cases permises à chaque type de pièce, numérotées de 0 à 31 (ligne * 4 + colonne // 2). Un pion blanc n'est jamais
+# sur la ligne 0 et un pion noir jamais sur la ligne 7: il y aurait été promu.
+_CASES_PIONS_BLANCS = tuple(range(4, 32))
+_CASES_PIONS_NOIRS = tuple(range(0, 28))
+_CASES_DAMES = tuple(range(32))
+_DOMAINES = (_CASES_PIONS_BLANCS, _CASES_DAMES, _CASES_PIONS_NOIRS, _CASES_DAMES)
+_GROUPES = (("blanc", "pion"), ("blanc", "dame"), ("noir", "pion"), ("noir", "dame"))
+
+
+def _case(position):
+    return position[0] * 4 + position[1] // 2
+
+
+def _position(case):
+    ligne = case // 4
+    return ligne, (case % 4) * 2 + (1 - ligne % 2)
+
+
+def _rang(cases, premiere_case):
+    """
+    Rang d'un ensemble de cases triées dans le système combinatoire: chaque ensemble de k cases parmi n reçoit un
+    numéro distinct de 0 à C(n, k) - 1.
+    """
+    rang = 0
+    for i, case in enumerate(cases):
+        rang += comb(case - premiere_case, i + 1)
+    return rang
+
+
+def taille_signature(signature):
+    """
+    Retourne le nombre d'entrées de la table d'une signature, incluant les deux joueurs qui peuvent avoir le trait.
+
+    :param signature: Le nombre de pions blancs, de dames blanches, de pions noirs et de dames noires.
+    :type signature: tuple de 4 entiers.
+    """
+    taille = 2
+    for nombre, domaine in zip(signature, _DOMAINES):
+        taille *= comb(len(domaine), nombre)
+    return taille
+
+
+def signatures_jusqu_a(pieces_max):
+    """
+    Retourne les signatures d'au plus "pieces_max" pièces où chaque joueur a au moins une pièce, dans l'ordre où
+    elles doivent être calculées: une prise diminue le nombre de pièces, et une promotion le nombre de pions.
+    """
+    signatures = []
+    for signature in itertools.product(range(pieces_max + 1), repeat=4):
+        pions_blancs, dames_blanches, pions_noirs, dames_noires = signature
+        if (sum(signature) <= pieces_max and pions_blancs + dames_blanches > 0 and
+                pions_noirs + dames_noires > 0):
+            signatures.append(signature)
+    signatures.sort(key=lambda s: (sum(s), s[0] + s[2], s))
+    return signatures
+
+
+def _indexer(cases, couleur):
+    """
+    Retourne la signature et l'index d'une position.
+
+    :param cases: Le dictionnaire des cases d'un damier.
+    :param couleur: La couleur du joueur qui a le trait.
+    :return: Un tuple (signature, index).
+    """
+    groupes = ([], [], [], [])
+    for position, piece in cases.items():
+        groupes[piece.code].append(_case(position))
+
+    index = 0
+    for groupe, domaine in zip(groupes, _DOMAINES):
+        groupe.sort()
+        index = index * comb(len(domaine), len(groupe)) + _rang(groupe, domaine[0])
+    signature = tuple(len(groupe) for groupe in groupes)
+    return signature, index * 2 + (couleur == "noir")
+
+
+def _positions_de_signature(signature):
+    """
+    Génère toutes les dispositions de pièces d'une signature, sous forme de chaînes lisibles par
+    Damier.charger_dune_chaine.
+    """
+    def disposer(numero_groupe, occupees):
+        if numero_groupe == 4:
+            yield ""
+            return
+        couleur, type_de_piece = _GROUPES[numero_groupe]
+        libres = [case for case in _DOMAINES[numero_groupe] if case not in occupees]
+        for cases in itertools.combinations(libres, signature[numero_groupe]):
+            lignes = "".join("{},{},{},{}\n".format(*_position(case), couleur, type_de_piece) for case in cases)
+            for reste in disposer(numero_groupe + 1, occupees | set(cases)):
+                yield lignes + reste
+
+    return disposer(0, frozenset())
+
+
+def _valeur_enfant(valeur):
+    """
+    Retourne le résultat et la distance d'un octet de table.
+    """
+    if valeur == NULLE:
+        return NULLE, 0
+    if valeur >= _PERTE:
+        return PERTE, valeur - _PERTE
+    return GAIN, valeur
+
+
+def _encoder(resultat, distance):
+    if distance > DISTANCE_MAX:
+        raise ValueError("Distance de {} tours trop grande pour la table.".format(distance))
+    return distance if resultat == GAIN else _PERTE + distance
+
+
+def calculer_signature(signature, tables, damier=None):
+    """
+    Calcule par analyse rétrograde la table d'une signature. Les tables des signatures atteignables par une prise ou
+    une promotion doivent déjà être calculées.
+
+    On génère d'abord les coups de chaque position: ceux qui mènent à une autre signature ont une valeur connue, les
+    autres forment un graphe dont on garde les arcs inversés. Les positions sont ensuite résolues par distance
+    croissante: une position est gagnante dès qu'un de ses coups mène à une position perdante, et perdante lorsque
+    tous ses coups mènent à des positions gagnantes. Les positions jamais résolues sont nulles.
+
+    :param signature: La signature à calculer.
+    :type signature: tuple de 4 entiers.
+    :param tables: Les tables déjà calculées, par signature.
+    :type tables: dict.
+    :param damier: Un damier de travail (un nouveau Damier par défaut).
+    :return: La table, un octet par position.
+    :rtype: bytearray.
+    """
+    damier = damier if damier is not None else Damier()
+    taille = taille_signature(signature)
+    valeurs = bytearray(taille)
+    resolues = bytearray(taille)
+    restants = [0] * taille
+    parents = {}
+    # evenements[d] contient les tuples (parent, enfant_perdant) produits par les enfants résolus à la distance d.
+    evenements = [[] for _ in range(DISTANCE_MAX + 1)]
+
+    for chaine in _positions_de_signature(signature):
+        damier.charger_dune_chaine(chaine)
+        for couleur in ("blanc", "noir"):
+            index = _indexer(damier.cases, couleur)[1]
+            coups = damier.lister_coups(couleur)
+            restants[index] = len(coups)
+            adverse = "noir" if couleur == "blanc" else "blanc"
+            for coup in coups:
+                damier.jouer_coup(coup)
+                signature_enfant, index_enfant = _indexer(damier.cases, adverse)
+                damier.annuler_coup(coup)
+
+                if signature_enfant == signature:
+                    parents.setdefault(index_enfant, []).append(index)
+                    continue
+                if signature_enfant not in tables:
+                    # Le joueur a pris la dernière pièce adverse: l'adversaire ne peut plus jouer.
+                    resultat, distance = PERTE, 0
+                else:
+                    resultat, distance = _valeur_enfant(tables[signature_enfant][index_enfant])
+                if resultat != NULLE:
+                    evenements[distance].append((index, resultat == PERTE))
+
+            if not coups:
+                valeurs[index] = _PERTE
+                resolues[index] = 1
+
+    # Les parents d'une position ne sont tous connus qu'une fois le graphe complet.
+    for index in range(taille):
+        if resolues[index]:
+            evenements[0].extend((parent, True) for parent in parents.get(index, ()))
+
+    for distance in range(DISTANCE_MAX + 1):
+        for parent, enfant_perdant in evenements[distance]:
+            if resolues[parent]:
+                continue
+            if enfant_perdant:
+                resultat = GAIN
+            else:
+                restants[parent] -= 1
+                if restants[parent] > 0:
+                    continue
+                resultat = PERTE
+
+            valeurs[parent] = _encoder(resultat, distance + 1)
+            resolues[parent] = 1
+            for grand_parent in parents.get(parent, ()):
+                evenements[distance + 1].append((grand_parent, resultat == PERTE))
+        evenements[distance] = None
+
+    return valeurs
+
+
+def generer(nom_fichier, pieces_max=3, afficher=None):
+    """
+    Calcule les tables de toutes les signatures d'au plus "pieces_max" pièces et les écrit dans un fichier binaire.
+
+    :param nom_fichier: Le nom du fichier à écrire.
+    :type nom_fichier: string.
+    :param pieces_max: Le nombre maximal de pièces sur le damier.
+    :type pieces_max: int.
+    :param afficher: Fonction appelée avec une ligne de texte après chaque signature, ou None.
+    """
+    signatures = signatures_jusqu_a(pieces_max)
+    tables = {}
+    damier = Damier()
+    for signature in signatures:
+        debut = time.perf_counter()
+        tables[signature] = calculer_signature(signature, tables, damier)
+        if afficher is not None:
+            table = tables[signature]
+            gains = sum(1 for valeur in table if 0 < valeur < _PERTE)
+            pertes = sum(1 for valeur in table if valeur >= _PERTE)
+            afficher("{}: {} positions, {} gains, {} pertes ({:.1f} s)".format(
+                signature, len(table), gains, pertes, time.perf_counter() - debut))
+
+    with open(nom_fichier, "wb") as f:
+        f.write(_EN_TETE.pack(_IDENTIFIANT, pieces_max, len(signatures)))
+        decalage = _EN_TETE.size + _ENTREE.size * len(signatures)
+        for signature in signatures:
+            f.write(_ENTREE.pack(*signature, decalage, len(tables[signature])))
+            decalage += len(tables[signature])
+        for signature in signatures:
+            f.write(tables[signature])
+
+
+class TablesFinales:
+    """
+    Tables de finales lues dans un fichier écrit par generer. Le fichier est projeté en mémoire avec mmap: plusieurs
+    processus qui ouvrent le même fichier partagent une seule copie en mémoire, et seules les pages consultées sont
+    lues du disque.
+    """
+
+    def __init__(self, nom_fichier):
+        """
+        :param nom_fichier: Le nom du fichier de tables.
+        :type nom_fichier: string.
+        :raise ValueError: Si le fichier n'est pas un fichier de tables.
+        """
+        with open(nom_fichier, "rb") as f:
+            self.memoire = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        identifiant, self.pieces_max, nombre_signatures = _EN_TETE.unpack_from(self.memoire, 0)
+        if identifiant != _IDENTIFIANT:
+            self.memoire.close()
+            raise ValueError("{} n'est pas un fichier de tables de finales.".format(nom_fichier))
+
+        self.decalages = {}
+        for i in range(nombre_signatures):
+            entree = _ENTREE.unpack_from(self.memoire, _EN_TETE.size + i * _ENTREE.size)
+            self.decalages[entree[:4]] = entree[4]
+
+    def sonder(self, damier, couleur):
+        """
+        Cherche la valeur exacte d'une position.
+
+        :param damier: Le damier.
+        :param couleur: La couleur du joueur qui a le trait (la position ne doit pas être au milieu d'une prise).
+        :type couleur: string.
+        :return: Un tuple (resultat, distance) du point de vue du joueur qui a le trait, où le résultat est GAIN,
+                 PERTE ou NULLE et la distance est le nombre de tours avant la fin de la partie (0 pour une nulle),
+                 ou None si la position a trop de pièces.
+        """
+        # Les compteurs du damier donnent la signature: on n'énumère les pièces que si la position est dans les tables.
+        nombre_pieces = damier.nombre_pieces
+        if sum(nombre_pieces) > self.pieces_max:
+            return None
+        decalage = self.decalages.get(tuple(nombre_pieces))
+        if decalage is None:
+            return None
+        index = _indexer(damier.cases, couleur)[1]
+        return _valeur_enfant(self.memoire[decalage + index])
+
+    def fermer(self):
+        self.memoire.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère les tables de finales par analyse rétrograde.")
+    parser.add_argument("fichier", help="fichier de tables à écrire")
+    parser.add_argument("--pieces", type=int, default=3, help="nombre maximal de pièces")
+    arguments = parser.parse_args()
+
+    debut = time.perf_counter()
+    generer(arguments.fichier, arguments.pieces, print)
+    print("temps: {:.1f} s".format(time.perf_counter() - debut))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#! /usr/bin/env python
+# -*- coding:Utf-8 -*-
+__author__ = "Michel Tremblay"
+
+
+import argparse
+import collections
+import mmap
+import random
+import struct
+from dames.partie import Partie
+from dames.pdn import lire_parties
+
+# Le fichier commence par un identifiant et le nombre d'entrées. Chaque entrée contient le hash de la position, le
+# coup encodé (voir Coup.encoder) et le nombre de parties où il a été joué; les entrées sont triées par hash, puis par
+# coup.
+_IDENTIFIANT = b"DAMELIVR"
+_EN_TETE = struct.Struct("<8sQ")
+_ENTREE = struct.Struct("<QQI")
+
+
+def compter_coups(noms_fichiers, tours_max=12, statistiques=None):
+    """
+    Rejoue les parties de fichiers PDN (par exemple ceux écrits par Ai.autojeu) et compte, pour chaque position de
+    leurs premiers tours, le nombre de fois où chaque coup a été joué. Les parties qui ne commencent pas à la
+    position initiale (étiquette FEN) sont ignorées.
+
+    :param noms_fichiers: Les fichiers de parties.
+    :type noms_fichiers: liste de strings.
+    :param tours_max: Le nombre de tours retenus au début de chaque partie.
+    :type tours_max: int.
+    :param statistiques: Un Counter (hash de la position, coup encodé) à compléter, ou None pour en créer un.
+    :return: Le Counter.
+    :raise ValueError: Si une partie contient un coup illégal.
+    """
+    statistiques = statistiques if statistiques is not None else collections.Counter()
+    partie = Partie()
+    for nom_fichier in noms_fichiers:
+        with open(nom_fichier) as f:
+            for partie_pdn in lire_parties(f):
+                if "FEN" in partie_pdn.etiquettes:
+                    continue
+                partie_pdn.chemins = partie_pdn.chemins[:tours_max]
+                coups = list(partie_pdn.rejouer(partie))
+
+                partie.nouvelle_partie()
+                for coup in coups:
+                    statistiques[(partie.hash_position(), coup.encoder())] += 1
+                    partie.jouer_coup(coup)
+    return statistiques
+
+
+def ecrire_livre(statistiques, nom_fichier, occurrences_min=1):
+    """
+    Écrit un livre d'ouvertures trié.
+
+    :param statistiques: Un Counter (hash de la position, coup encodé) obtenu avec compter_coups.
+    :param nom_fichier: Le nom du fichier à écrire.
+    :type nom_fichier: string.
+    :param occurrences_min: Le nombre minimal de parties où un coup doit avoir été joué pour être retenu.
+    :type occurrences_min: int.
+    :return: Le nombre d'entrées écrites.
+    """
+    entrees = sorted((cle, code, nombre) for (cle, code), nombre in statistiques.items()
+                     if nombre >= occurrences_min and code != 0)
+    with open(nom_fichier, "wb") as f:
+        f.write(_EN_TETE.pack(_IDENTIFIANT, len(entrees)))
+        for entree in entrees:
+            f.write(_ENTREE.pack(entree[0], entree[1], min(entree[2], 0xFFFFFFFF)))
+    return len(entrees)
+
+
+class LivreOuvertures:
+    """
+    Livre d'ouvertures lu dans un fichier écrit par ecrire_livre. Le fichier est projeté en mémoire avec mmap et
+    consulté par recherche dichotomique: rien n'est chargé à l'ouverture, et plusieurs processus partagent une seule
+    copie du fichier.
+    """
+
+    def __init__(self, nom_fichier):
+        """
+        :param nom_fichier: Le nom du fichier du livre.
+        :type nom_fichier: string.
+        :raise ValueError: Si le fichier n'est pas un livre d'ouvertures.
+        """
+        with open(nom_fichier, "rb") as f:
+            self.memoire = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        identifiant, self.nombre_entrees = _EN_TETE.unpack_from(self.memoire, 0)
+        if identifiant != _IDENTIFIANT:
+            self.memoire.close()
+            raise ValueError("{} n'est pas un livre d'ouvertures.".format(nom_fichier))
+
+    def _entree(self, numero):
+        return _ENTREE.unpack_from(self.memoire, _EN_TETE.size + numero * _ENTREE.size)
+
+    def sonder(self, cle):
+        """
+        Retourne les coups connus d'une position.
+
+        :param cle: Le hash de la position (voir Partie.hash_position).
+        :type cle: int.
+        :return: Une liste de tuples (coup encodé, nombre de parties), vide si la position n'est pas dans le livre.
+        """
+        debut, fin = 0, self.nombre_entrees
+        while debut < fin:
+            milieu = (debut + fin) // 2
+            if self._entree(milieu)[0] < cle:
+                debut = milieu + 1
+            else:
+                fin = milieu
+
+        coups = []
+        while debut < self.nombre_entrees:
+            cle_entree, code, nombre = self._entree(debut)
+            if cle_entree != cle:
+                break
+            coups.append((code, nombre))
+            debut += 1
+        return coups
+
+    def choisir_coup(self, partie, hasard=random):
+        """
+        Choisit au hasard un coup du livre pour le joueur courant d'une partie, chaque coup étant pondéré par le
+        nombre de parties où il a été joué.
+
+        :param partie: La partie.
+        :param hasard: Le générateur de nombres aléatoires à utiliser.
+        :return: Le coup (instance de Coup), ou None si la position n'est pas dans le livre.
+        """
+        connus = dict(self.sonder(partie.hash_position()))
+        if not connus:
+            return None
+
+        # On ne retient que les coups légaux, au cas où deux positions auraient le même hash.
+        coups = [coup for coup in partie.lister_coups() if coup.encoder() in connus]
+        if not coups:
+            return None
+        return hasard.choices(coups, [connus[coup.encoder()] for coup in coups])[0]
+
+    def fermer(self):
+        self.memoire.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construit un livre d'ouvertures à partir de fichiers de parties "
+                                                 "PDN (par exemple écrits par Ai.autojeu).")
+    parser.add_argument("livre", help="fichier du livre à écrire")
+    parser.add_argument("parties", nargs="+", help="fichiers de parties PDN")
+    parser.add_argument("--tours", type=int, default=12, help="nombre de tours retenus au début de chaque partie")
+    parser.add_argument("--minimum", type=int, default=2, help="nombre minimal de parties par coup retenu")
+    arguments = parser.parse_args()
+
+    statistiques = compter_coups(arguments.parties, arguments.tours)
+    nombre = ecrire_livre(statistiques, arguments.livre, arguments.minimum)
+    print("{} coups retenus sur {}".format(nombre, len(statistiques)))
+
+
+if __name__ == "__main__":
+    main()
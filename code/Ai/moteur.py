@@ -0,0 +1,196 @@
+#! /usr/bin/env python
+# -*- coding:Utf-8 -*-
+__author__ = "Michel Tremblay"
+
+
+import argparse
+import sys
+from dames.coup import numero_case, position_case
+from dames.damier import pieces_dune_chaine
+from dames.partie import Partie
+from dames.pdn import notation, lire_notation, trouver_coup, fen, lire_fen
+from Ai.AiControl import AiControl
+
+# Protocole texte du moteur: une commande par ligne sur l'entrée standard, une réponse par ligne sur la sortie
+# standard. Les coups sont écrits en notation PDN ("22-18", "26x17x10", voir dames.pdn).
+#
+#   moteur                                  -> id JeuDeDame, puis ok
+#   position depart [coups C1 C2 ...]       position initiale, suivie des coups donnés
+#   position fen FEN [coups C1 C2 ...]      position en notation FEN de PDN ("W:W21,22,K30:B1,2,K5")
+#   position chaine COULEUR PIECES          pièces au format de Damier.convertir_en_chaine, séparées par des ";"
+#                                           ("5,0,blanc,pion;2,1,noir,dame"), COULEUR ayant le trait
+#   coups                                   -> coups C1 C2 ... (les coups permis au joueur qui a le trait)
+#   jouer C                                 joue un coup
+#   chercher [temps S] [profondeur N] [noeuds N]
+#                                           -> des lignes info, puis meilleur C (ou meilleur aucun)
+#   afficher                                -> le damier, puis fen FEN
+#   quitter
+#
+# Une commande invalide donne une ligne "erreur MESSAGE". Sans limite, une recherche dure TEMPS_DEFAUT secondes;
+# si une limite est donnée, les autres ne s'appliquent pas.
+IDENTIFIANT = "JeuDeDame"
+TEMPS_DEFAUT = 1.0
+PROFONDEUR_MAX = 64
+
+
+class Moteur:
+    """
+    Le moteur: une partie, l'AI qui y joue, et l'interprétation des commandes du protocole.
+    """
+
+    def __init__(self, sortie, parametres_ai=None):
+        """
+        :param sortie: Le fichier où écrire les réponses (par exemple sys.stdout).
+        :param parametres_ai: Les paramètres passés à AiControl (nombre_processus, fichier_finales, ...).
+        :type parametres_ai: dict.
+        """
+        self.sortie = sortie
+        self.partie = Partie()
+        self.ai = AiControl(self.partie, **(parametres_ai or {}))
+        self.commandes = {
+            "moteur": self.identifier,
+            "position": self.placer_position,
+            "coups": self.lister_coups,
+            "jouer": self.jouer,
+            "chercher": self.chercher,
+            "afficher": self.afficher,
+        }
+
+    def ecrire(self, ligne):
+        self.sortie.write(ligne + "\n")
+        self.sortie.flush()
+
+    def traiter(self, ligne):
+        """
+        Exécute une commande.
+
+        :param ligne: La ligne de la commande.
+        :type ligne: string.
+        :return: False si la commande demande de quitter, True autrement.
+        """
+        mots = ligne.split()
+        if not mots:
+            return True
+        if mots[0] == "quitter":
+            return False
+
+        commande = self.commandes.get(mots[0])
+        if commande is None:
+            self.ecrire("erreur commande inconnue: {}".format(mots[0]))
+            return True
+        try:
+            commande(mots[1:])
+        except (ValueError, IndexError) as e:
+            self.ecrire("erreur {}".format(e))
+        return True
+
+    def identifier(self, arguments):
+        self.ecrire("id {}".format(IDENTIFIANT))
+        self.ecrire("ok")
+
+    def placer_position(self, arguments):
+        if "coups" in arguments:
+            coups = arguments[arguments.index("coups") + 1:]
+            arguments = arguments[:arguments.index("coups")]
+        else:
+            coups = []
+
+        if arguments == ["depart"]:
+            couleur, pieces = None, None
+        elif len(arguments) == 2 and arguments[0] == "fen":
+            couleur, pieces = lire_fen(arguments[1])
+        elif len(arguments) == 3 and arguments[0] == "chaine" and arguments[1] in ("blanc", "noir"):
+            try:
+                couleur, pieces = arguments[1], list(pieces_dune_chaine(arguments[2].replace(";", "\n")))
+            except (ValueError, AssertionError):
+                raise ValueError("pièces invalides: {}".format(arguments[2]))
+            for position, piece in pieces:
+                if position_case(numero_case(position)) != position or not 0 <= position[0] <= 7:
+                    raise ValueError("case non jouable: {},{}".format(position[0], position[1]))
+        else:
+            raise ValueError("position invalide")
+        if pieces is not None and len({position for position, piece in pieces}) != len(pieces):
+            raise ValueError("deux pièces sur la même case")
+
+        # La partie n'est modifiée que si la position et tous les coups sont valides.
+        partie = Partie()
+        if pieces is not None:
+            partie.damier.charger_pieces(pieces)
+            partie.couleur_joueur_courant = couleur
+        for texte in coups:
+            partie.jouer_coup(trouver_coup(partie, lire_notation(texte)))
+
+        self.partie.nouvelle_partie()
+        self.partie.damier.charger_pieces(partie.damier.cases.items())
+        self.partie.couleur_joueur_courant = partie.couleur_joueur_courant
+        self.partie.coups = partie.coups
+
+    def lister_coups(self, arguments):
+        self.ecrire(" ".join(["coups"] + [notation(coup) for coup in self.partie.lister_coups()]))
+
+    def jouer(self, arguments):
+        if len(arguments) != 1:
+            raise ValueError("jouer attend un coup")
+        self.partie.jouer_coup(trouver_coup(self.partie, lire_notation(arguments[0])))
+
+    def chercher(self, arguments):
+        limites = {"temps": None, "profondeur": None, "noeuds": None}
+        for nom, valeur in zip(arguments[::2], arguments[1::2]):
+            if nom not in limites:
+                raise ValueError("limite inconnue: {}".format(nom))
+            limites[nom] = float(valeur) if nom == "temps" else int(valeur)
+        if len(arguments) % 2 != 0:
+            raise ValueError("limite sans valeur: {}".format(arguments[-1]))
+        if all(valeur is None for valeur in limites.values()):
+            limites["temps"] = TEMPS_DEFAUT
+
+        self.ai.temps_max = limites["temps"]
+        self.ai.profondeur_max = limites["profondeur"] or PROFONDEUR_MAX
+        self.ai.noeuds_max = limites["noeuds"]
+        if not self.partie.lister_coups():
+            self.ecrire("meilleur aucun")
+            return
+        coup = self.ai.choisir_coup(rapport=self.rapporter)
+        if coup is None:
+            # Le joueur a des coups: la recherche aurait dû en retourner un ("meilleur aucun" serait lu comme un
+            # abandon).
+            raise ValueError("la recherche n'a retourné aucun coup")
+        if self.ai.derniere_recherche is None:
+            self.ecrire("info livre")
+        self.ecrire("meilleur {}".format(notation(coup)))
+
+    def rapporter(self, resultat):
+        self.ecrire("info profondeur {} score {} noeuds {} nps {} temps {:.3f} variante {}".format(
+            resultat.profondeur, resultat.score, resultat.noeuds, resultat.noeuds_par_seconde, resultat.duree,
+            " ".join(notation(coup) for coup in resultat.variante)))
+
+    def afficher(self, arguments):
+        for ligne in repr(self.partie.damier).rstrip("\n").split("\n"):
+            self.ecrire(ligne)
+        self.ecrire("fen {}".format(fen(self.partie.damier, self.partie.couleur_joueur_courant)))
+
+    def fermer(self):
+        self.ai.fermer()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Moteur de jeu de dames sans interface graphique: lit des "
+                                                 "commandes sur l'entrée standard (voir Ai.moteur).")
+    parser.add_argument("--processus", type=int, default=1, help="nombre de processus de la recherche")
+    parser.add_argument("--table", type=float, default=16, help="taille de la table de transposition, en Mo")
+    parser.add_argument("--finales", help="tables de finales consultées pendant la recherche")
+    parser.add_argument("--livre", help="livre d'ouvertures")
+    arguments = parser.parse_args()
+
+    moteur = Moteur(sys.stdout, {"nombre_processus": arguments.processus, "taille_table_mo": arguments.table,
+                                 "fichier_finales": arguments.finales, "fichier_livre": arguments.livre})
+    try:
+        for ligne in sys.stdin:
+            if not moteur.traiter(ligne):
+                break
+    finally:
+        moteur.fermer()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#! /usr/bin/env python
+# -*- coding:Utf-8 -*-
+__author__ = "Michel Tremblay"
+
+
+import argparse
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+from dames.partie import Partie
+from Ai.finales import TablesFinales
+from Ai.recherche import Recherche
+from Ai.transposition import TableTransposition, taille_tampon
+
+# Recherche de chaque processus auxiliaire, créée une seule fois par _initialiser_auxiliaire.
+_auxiliaire = {}
+
+
+def _initialiser_auxiliaire(nom_memoire, signal_arret, fichier_finales):
+    """
+    Initialise un processus auxiliaire: il s'attache à la table de transposition partagée (et aux tables de finales,
+    s'il y en a) et garde sa propre instance de Recherche pour toute sa durée de vie.
+    """
+    memoire = shared_memory.SharedMemory(name=nom_memoire)
+    finales = TablesFinales(fichier_finales) if fichier_finales is not None else None
+    _auxiliaire["memoire"] = memoire
+    _auxiliaire["recherche"] = Recherche(TableTransposition(tampon=memoire.buf), signal_arret, finales=finales)
+
+
+def _chercher_auxiliaire(classe_damier, table_positionnelle, chaine, couleur, position_forcee, profondeur_max,
+                         temps_max, generation, numero):
+    """
+    Recherche d'un processus auxiliaire, sur la même position que le processus principal et avec la même classe de
+    damier et la même table positionnelle. Les processus auxiliaires ne retournent pas de coup: ils remplissent la
+    table partagée, que le processus principal consulte. Pour qu'ils ne fassent pas tous le même travail, l'ordre des
+    coups de la racine est décalé selon leur numéro, et un processus sur deux cherche un tour plus loin.
+
+    :return: Le nombre de noeuds visités.
+    """
+    recherche = _auxiliaire["recherche"]
+    recherche.table.generation = generation
+    recherche.rotation_racine = numero
+    damier = classe_damier(table_positionnelle)
+    damier.charger_dune_chaine(chaine)
+    resultat = recherche.chercher(damier, couleur, position_forcee, profondeur_max + numero % 2, temps_max)
+    return resultat.noeuds
+
+
+class RechercheParallele:
+    """
+    Recherche sur plusieurs processus, à la manière de Lazy SMP: tous les processus cherchent la même position et
+    partagent une seule table de transposition placée en mémoire partagée. Le processus principal fait la même
+    recherche que Recherche, mais profite des positions déjà évaluées par les autres.
+
+    S'utilise comme Recherche (même méthode chercher, même attribut table). Les processus sont créés une seule fois;
+    il faut appeler fermer() (ou utiliser un bloc with) pour les arrêter et libérer la mémoire partagée.
+    """
+
+    def __init__(self, nombre_processus=None, taille_table_mo=64, fichier_finales=None):
+        """
+        :param nombre_processus: Le nombre total de processus, incluant le processus principal (par défaut, le
+                                 nombre de processeurs).
+        :type nombre_processus: int.
+        :param taille_table_mo: La taille de la table de transposition partagée, en mégaoctets.
+        :type taille_table_mo: float.
+        :param fichier_finales: Le fichier de tables de finales consulté par tous les processus, ou None. Comme il est
+                                projeté en mémoire, les processus en partagent une seule copie.
+        :type fichier_finales: string.
+        """
+        self.nombre_processus = nombre_processus or multiprocessing.cpu_count()
+        self.memoire = shared_memory.SharedMemory(create=True, size=taille_tampon(taille_table_mo))
+        self.table = TableTransposition(tampon=self.memoire.buf)
+        self.signal_arret = multiprocessing.Event()
+        self.finales = TablesFinales(fichier_finales) if fichier_finales is not None else None
+        self.recherche = Recherche(self.table, self.signal_arret, finales=self.finales)
+        self.pool = None
+        if self.nombre_processus > 1:
+            self.pool = multiprocessing.Pool(self.nombre_processus - 1, _initialiser_auxiliaire,
+                                             (self.memoire.name, self.signal_arret, fichier_finales))
+
+    def chercher(self, damier, couleur, position_forcee=None, profondeur_max=64, temps_max=None, noeuds_max=None,
+                 rapport=None):
+        """
+        Cherche le meilleur coup. Les paramètres et le résultat sont ceux de Recherche.chercher; le nombre de noeuds
+        du résultat inclut ceux des processus auxiliaires (sauf dans les rapports de chaque itération, qui ne
+        comptent que ceux du processus principal).
+        """
+        debut = time.perf_counter()
+        taches = []
+        if self.pool is not None:
+            chaine = damier.convertir_en_chaine()
+            for numero in range(1, self.nombre_processus):
+                taches.append(self.pool.apply_async(_chercher_auxiliaire,
+                                                    (type(damier), damier.table_positionnelle, chaine, couleur,
+                                                     position_forcee, profondeur_max, temps_max,
+                                                     self.table.generation, numero)))
+
+        resultat = self.recherche.chercher(damier, couleur, position_forcee, profondeur_max, temps_max, noeuds_max,
+                                           rapport)
+
+        # Le signal arrête les processus auxiliaires; il est remis à zéro pour la prochaine recherche. Il peut aussi
+        # être donné de l'extérieur (voir AiControl.annuler_recherche) pour interrompre la recherche.
+        self.signal_arret.set()
+        for tache in taches:
+            resultat.noeuds += tache.get()
+        self.signal_arret.clear()
+        resultat.duree = time.perf_counter() - debut
+        return resultat
+
+    def fermer(self):
+        """
+        Arrête les processus auxiliaires, libère la mémoire partagée et ferme les tables de finales.
+        """
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        if self.memoire is not None:
+            self.table = None
+            self.recherche = None
+            self.memoire.close()
+            self.memoire.unlink()
+            self.memoire = None
+        if self.finales is not None:
+            self.finales.fermer()
+            self.finales = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.fermer()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare la recherche sur un seul processus à la recherche "
+                                                 "parallèle, à profondeur fixe.")
+    parser.add_argument("--profondeur", type=int, default=7, help="profondeur de la recherche, en tours")
+    parser.add_argument("--processus", type=int, default=multiprocessing.cpu_count(),
+                        help="nombre de processus de la recherche parallèle")
+    parser.add_argument("--taille-table", type=float, default=64, help="taille de la table, en mégaoctets")
+    parser.add_argument("--fichier", help="partie sauvegardée à utiliser comme position de départ")
+    arguments = parser.parse_args()
+
+    partie = Partie()
+    if arguments.fichier:
+        partie.charger(arguments.fichier)
+    position_forcee = partie.position_source_forcee if partie.doit_prendre else None
+
+    recherche = Recherche(TableTransposition(arguments.taille_table))
+    seul = recherche.chercher(partie.damier, partie.couleur_joueur_courant, position_forcee, arguments.profondeur)
+    print("1 processus: {:.2f} s, {}".format(seul.duree, seul))
+
+    with RechercheParallele(arguments.processus, arguments.taille_table) as recherche_parallele:
+        parallele = recherche_parallele.chercher(partie.damier, partie.couleur_joueur_courant, position_forcee,
+                                                 arguments.profondeur)
+    print("{} processus: {:.2f} s, {}".format(arguments.processus, parallele.duree, parallele))
+    print("accélération: {:.2f}".format(seul.duree / parallele.duree if parallele.duree > 0 else 0))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+#! /usr/bin/env python
+# -*- coding:Utf-8 -*-
+__author__ = "Michel Tremblay"
+
+
+import time
+from dames.coup import decoder_chemin
+from Ai.evaluation import evaluer
+from Ai.finales import GAIN, PERTE
+from Ai.transposition import TableTransposition, EXACTE, BORNE_INFERIEURE, BORNE_SUPERIEURE
+
+# Score d'une victoire. Une victoire en n demi-coups vaut VICTOIRE - n, pour préférer les victoires les plus rapides.
+VICTOIRE = 100000
+INFINI = VICTOIRE + 1
+_SEUIL_VICTOIRE = VICTOIRE - 1000
+
+# Nombre de noeuds entre deux vérifications du temps écoulé.
+_INTERVALLE_VERIFICATION = 512
+
+
+def couleur_adverse(couleur):
+    return "noir" if couleur == "blanc" else "blanc"
+
+
+class ResultatRecherche:
+    """
+    Résultat d'une recherche: le meilleur coup, la variante principale et les statistiques.
+    """
+
+    def __init__(self):
+        self.meilleur_coup = None
+        self.variante = []
+        self.score = 0
+        self.profondeur = 0
+        self.noeuds = 0
+        self.duree = 0.0
+
+    @property
+    def noeuds_par_seconde(self):
+        return int(self.noeuds / self.duree) if self.duree > 0 else 0
+
+    def __repr__(self):
+        return "profondeur {}, score {}, {} noeuds, {} noeuds/s, variante {}".format(
+            self.profondeur, self.score, self.noeuds, self.noeuds_par_seconde, self.variante)
+
+
+class Recherche:
+    """
+    Moteur de recherche negamax avec élagage alpha-beta et approfondissement itératif.
+
+    Chaque noeud correspond à un tour complet (voir Damier.lister_coups): la prise obligatoire et les prises
+    multiples sont donc respectées, et le trait change à chaque coup. Une position source forcée n'est possible qu'à
+    la racine, lorsque la partie est au milieu d'une prise multiple.
+    """
+
+    def __init__(self, table=None, signal_arret=None, rotation_racine=0, finales=None):
+        """
+        :param table: La table de transposition à utiliser (une nouvelle table par défaut).
+        :type table: TableTransposition.
+        :param signal_arret: Un objet dont la méthode is_set() indique que la recherche doit s'arrêter (par exemple
+                             un threading.Event ou un multiprocessing.Event), ou None.
+        :param rotation_racine: Décalage appliqué à l'ordre des coups de la racine, pour que plusieurs recherches
+                                simultanées n'explorent pas l'arbre dans le même ordre.
+        :type rotation_racine: int.
+        :param finales: Les tables de finales à consulter, ou None.
+        :type finales: TablesFinales.
+        """
+        self.table = table if table is not None else TableTransposition()
+        self.signal_arret = signal_arret
+        self.rotation_racine = rotation_racine
+        self.finales = finales
+        self.damier = None
+        self.noeuds = 0
+        self.arret = False
+        self._debut = 0.0
+        self._temps_max = None
+        self._noeuds_max = None
+        self._meilleur_coup_racine = None
+
+    def chercher(self, damier, couleur, position_forcee=None, profondeur_max=64, temps_max=None, noeuds_max=None,
+                 rapport=None):
+        """
+        Cherche le meilleur coup par approfondissement itératif, jusqu'à la profondeur maximale ou jusqu'à
+        l'épuisement du temps ou du nombre de noeuds permis. Le résultat est celui de la dernière itération complète.
+
+        :param damier: Le damier (il est modifié pendant la recherche, puis remis dans son état initial).
+        :param couleur: La couleur du joueur qui a le trait.
+        :type couleur: string.
+        :param position_forcee: La position avec laquelle le joueur doit continuer sa prise, ou None.
+        :type position_forcee: Tuple (ligne, colonne).
+        :param profondeur_max: La profondeur maximale, en tours.
+        :type profondeur_max: int.
+        :param temps_max: Le temps maximal, en secondes (None pour aucune limite).
+        :type temps_max: float.
+        :param noeuds_max: Le nombre maximal de noeuds (None pour aucune limite).
+        :type noeuds_max: int.
+        :param rapport: Une fonction appelée avec le résultat après chaque itération complète, ou None.
+        :return: Le résultat de la recherche. Son meilleur coup est None si le joueur ne peut pas jouer.
+        :rtype: ResultatRecherche.
+        """
+        self.damier = damier
+        self.noeuds = 0
+        self.arret = False
+        self._debut = time.perf_counter()
+        self._temps_max = temps_max
+        self._noeuds_max = noeuds_max
+
+        resultat = ResultatRecherche()
+        coups_racine = damier.lister_coups(couleur, position_forcee)
+        for profondeur in range(1, profondeur_max + 1):
+            self._meilleur_coup_racine = None
+            score = self._negamax(profondeur, -INFINI, INFINI, couleur, position_forcee, 0)
+            if self.arret:
+                if resultat.meilleur_coup is None:
+                    resultat.meilleur_coup = self._meilleur_coup_racine
+                break
+
+            resultat.meilleur_coup = self._meilleur_coup_racine
+            resultat.score = score
+            resultat.profondeur = profondeur
+            resultat.variante = self._variante(couleur, position_forcee, profondeur)
+            if rapport is not None:
+                resultat.noeuds = self.noeuds
+                resultat.duree = time.perf_counter() - self._debut
+                rapport(resultat)
+
+            # Inutile de chercher plus loin si le coup est forcé ou si l'issue de la partie est connue.
+            if len(coups_racine) <= 1 or abs(score) >= _SEUIL_VICTOIRE:
+                break
+
+        # Les limites ont pu être atteintes avant la fin de la première itération: le joueur peut tout de même jouer.
+        if resultat.meilleur_coup is None and coups_racine:
+            resultat.meilleur_coup = self._coup_table(damier, couleur, position_forcee, coups_racine) or \
+                coups_racine[0]
+
+        resultat.noeuds = self.noeuds
+        resultat.duree = time.perf_counter() - self._debut
+        return resultat
+
+    def _verifier_limites(self):
+        if self._noeuds_max is not None and self.noeuds >= self._noeuds_max:
+            self.arret = True
+        elif self.noeuds % _INTERVALLE_VERIFICATION == 0:
+            if self._temps_max is not None and time.perf_counter() - self._debut >= self._temps_max:
+                self.arret = True
+            elif self.signal_arret is not None and self.signal_arret.is_set():
+                self.arret = True
+
+    def _negamax(self, profondeur, alpha, beta, couleur, position_forcee, ply):
+        self.noeuds += 1
+        self._verifier_limites()
+        if self.arret:
+            return 0
+
+        damier = self.damier
+        if ply > 0 and self.finales is not None:
+            valeur = self.finales.sonder(damier, couleur)
+            if valeur is not None:
+                resultat, distance = valeur
+                if resultat == GAIN:
+                    return VICTOIRE - ply - distance
+                if resultat == PERTE:
+                    return -VICTOIRE + ply + distance
+                return 0
+
+        cle = damier.hash_position(couleur, position_forcee)
+        code_table = 0
+        entree = self.table.sonder(cle)
+        if entree is not None:
+            profondeur_table, score_table, borne, code_table = entree
+            if ply > 0 and profondeur_table >= profondeur:
+                score_table = _score_depuis_table(score_table, ply)
+                if borne == EXACTE:
+                    return score_table
+                if borne == BORNE_INFERIEURE and score_table >= beta:
+                    return score_table
+                if borne == BORNE_SUPERIEURE and score_table <= alpha:
+                    return score_table
+
+        coups = damier.lister_coups(couleur, position_forcee)
+        if not coups:
+            return -VICTOIRE + ply
+
+        # Les prises étant obligatoires, on ne s'arrête jamais sur une position où une prise est possible.
+        if profondeur <= 0 and not coups[0].est_prise():
+            return evaluer(damier, couleur)
+
+        if ply == 0 and self.rotation_racine:
+            rotation = self.rotation_racine % len(coups)
+            coups = coups[rotation:] + coups[:rotation]
+
+        if code_table:
+            chemin_table = decoder_chemin(code_table)
+            for i, coup in enumerate(coups):
+                if coup.chemin == chemin_table:
+                    coups[0], coups[i] = coup, coups[0]
+                    break
+
+        alpha_initial = alpha
+        meilleur_score = -INFINI
+        meilleur_coup = None
+        adverse = couleur_adverse(couleur)
+        for coup in coups:
+            damier.jouer_coup(coup)
+            score = -self._negamax(profondeur - 1, -beta, -alpha, adverse, None, ply + 1)
+            damier.annuler_coup(coup)
+
+            if self.arret:
+                return 0
+
+            if score > meilleur_score:
+                meilleur_score = score
+                meilleur_coup = coup
+                if ply == 0:
+                    self._meilleur_coup_racine = meilleur_coup
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+
+        if meilleur_score <= alpha_initial:
+            borne = BORNE_SUPERIEURE
+        elif meilleur_score >= beta:
+            borne = BORNE_INFERIEURE
+        else:
+            borne = EXACTE
+        self.table.enregistrer(cle, max(profondeur, 0), _score_vers_table(meilleur_score, ply), borne,
+                               meilleur_coup.encoder())
+
+        return meilleur_score
+
+    def _coup_table(self, damier, couleur, position_forcee, coups):
+        """
+        Retourne le coup de la table de transposition pour la position, s'il fait partie des coups donnés, ou None.
+        """
+        entree = self.table.sonder(damier.hash_position(couleur, position_forcee))
+        if entree is None or entree[3] == 0:
+            return None
+        chemin = decoder_chemin(entree[3])
+        for coup in coups:
+            if coup.chemin == chemin:
+                return coup
+        return None
+
+    def _variante(self, couleur, position_forcee, profondeur):
+        """
+        Reconstruit la variante principale en suivant les meilleurs coups de la table de transposition.
+        """
+        damier = self.damier
+        variante = []
+        while len(variante) < profondeur:
+            coup = self._coup_table(damier, couleur, position_forcee, damier.lister_coups(couleur, position_forcee))
+            if coup is None:
+                break
+
+            variante.append(coup)
+            damier.jouer_coup(coup)
+            couleur = couleur_adverse(couleur)
+            position_forcee = None
+
+        for coup in reversed(variante):
+            damier.annuler_coup(coup)
+
+        return variante
+
+
+def _score_vers_table(score, ply):
+    """
+    Les scores de victoire sont conservés dans la table relativement à la position, et non à la racine.
+    """
+    if score >= _SEUIL_VICTOIRE:
+        return score + ply
+    if score <= -_SEUIL_VICTOIRE:
+        return score - ply
+    return score
+
+
+def _score_depuis_table(score, ply):
+    if score >= _SEUIL_VICTOIRE:
+        return score - ply
+    if score <= -_SEUIL_VICTOIRE:
+        return score + ply
+    return score
+
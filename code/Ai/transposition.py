@@ -0,0 +1,176 @@
+#! /usr/bin/env python
+# -*- coding:Utf-8 -*-
+__author__ = "Michel Tremblay"
+
+
+import struct
+
+# Types de bornes pour le score d'une entrée.
+EXACTE = 0
+BORNE_INFERIEURE = 1
+BORNE_SUPERIEURE = 2
+
+# Une entrée contient trois entiers de 64 bits: une clé de vérification, le coup encodé et les données (score,
+# profondeur, type de borne et génération). La clé de vérification est le ou exclusif du hash de la position, du
+# coup et des données: une entrée à moitié écrite par un autre processus ne correspond donc à aucune position, ce qui
+# permet de partager la table entre processus sans verrou.
+_ENTREE = struct.Struct("<QQQ")
+TAILLE_ENTREE = _ENTREE.size
+
+# Chaque seau contient deux entrées: la première est remplacée seulement par une recherche au moins aussi profonde
+# (ou si elle date d'un coup précédent), la seconde est toujours remplacée.
+ENTREES_PAR_SEAU = 2
+TAILLE_SEAU = TAILLE_ENTREE * ENTREES_PAR_SEAU
+
+_DECALAGE_SCORE = 1 << 31
+
+
+def _emballer(score, profondeur, borne, generation):
+    return (score + _DECALAGE_SCORE) | (profondeur & 0xFFFF) << 32 | borne << 48 | generation << 56
+
+
+def _deballer(donnees):
+    """
+    :return: Un tuple (score, profondeur, borne, generation).
+    """
+    return (donnees & 0xFFFFFFFF) - _DECALAGE_SCORE, (donnees >> 32) & 0xFFFF, (donnees >> 48) & 0xFF, donnees >> 56
+
+
+def taille_tampon(taille_mo):
+    """
+    Retourne la taille en octets du tampon d'une table d'au plus "taille_mo" mégaoctets.
+    """
+    return max(1, int(taille_mo * 1024 * 1024) // TAILLE_SEAU) * TAILLE_SEAU
+
+
+class TableTransposition:
+    """
+    Table de transposition de taille fixe, indexée par le hash de Zobrist d'une position. Toute la mémoire est
+    réservée à la création, dans un seul tampon d'octets: la table ne grossit jamais, peu importe le nombre de
+    positions enregistrées.
+    """
+
+    def __init__(self, taille_mo=16, tampon=None):
+        """
+        Crée une table vide.
+
+        :param taille_mo: La mémoire maximale utilisée par la table, en mégaoctets.
+        :type taille_mo: float.
+        :param tampon: Un tampon existant à utiliser (par exemple la mémoire partagée d'une
+                       multiprocessing.shared_memory.SharedMemory). Son contenu n'est pas effacé, et taille_mo est
+                       alors ignoré.
+        """
+        if tampon is None:
+            tampon = bytearray(taille_tampon(taille_mo))
+        self.tampon = tampon
+        self.nombre_seaux = max(1, len(tampon) // TAILLE_SEAU)
+        self.generation = 0
+
+        self.succes = 0
+        self.echecs = 0
+        self.collisions = 0
+        self.ecritures = 0
+
+    def _decalage_seau(self, cle):
+        return (cle % self.nombre_seaux) * TAILLE_SEAU
+
+    def sonder(self, cle):
+        """
+        Cherche une position dans la table.
+
+        :param cle: Le hash de la position.
+        :type cle: int.
+        :return: Un tuple (profondeur, score, borne, coup) si la position est trouvée, None autrement. Le coup
+                 vaut 0 si aucun meilleur coup n'a été enregistré.
+        """
+        decalage = self._decalage_seau(cle)
+        collision = False
+        for _ in range(ENTREES_PAR_SEAU):
+            verification, coup, donnees = _ENTREE.unpack_from(self.tampon, decalage)
+            if donnees != 0:
+                if verification ^ coup ^ donnees == cle:
+                    self.succes += 1
+                    score, profondeur, borne, _ = _deballer(donnees)
+                    return profondeur, score, borne, coup
+                collision = True
+            decalage += TAILLE_ENTREE
+
+        self.echecs += 1
+        if collision:
+            self.collisions += 1
+        return None
+
+    def _lire_entree(self, decalage):
+        """
+        :return: Un tuple (cle, coup, profondeur, generation) pour l'entrée à ce décalage; la clé vaut None si
+                 l'entrée est vide.
+        """
+        verification, coup, donnees = _ENTREE.unpack_from(self.tampon, decalage)
+        if donnees == 0:
+            return None, 0, 0, 0
+        _, profondeur, _, generation = _deballer(donnees)
+        return verification ^ coup ^ donnees, coup, profondeur, generation
+
+    def enregistrer(self, cle, profondeur, score, borne, coup=0):
+        """
+        Enregistre le résultat de la recherche d'une position. L'entrée qui privilégie la profondeur est utilisée si
+        elle contient déjà cette position, si elle est vide ou périmée, ou si la nouvelle recherche est au moins aussi
+        profonde; sinon, l'entrée toujours remplacée est utilisée.
+
+        :param cle: Le hash de la position.
+        :type cle: int.
+        :param profondeur: La profondeur de la recherche.
+        :type profondeur: int.
+        :param score: Le score trouvé.
+        :type score: int.
+        :param borne: Le type de score: EXACTE, BORNE_INFERIEURE ou BORNE_SUPERIEURE.
+        :type borne: int.
+        :param coup: Le meilleur coup trouvé, encodé en entier (0 si aucun).
+        :type coup: int.
+        """
+        decalage = self._decalage_seau(cle)
+        cle_entree, coup_entree, profondeur_entree, generation_entree = self._lire_entree(decalage)
+        if not (cle_entree is None or cle_entree == cle or generation_entree != self.generation or
+                profondeur >= profondeur_entree):
+            decalage += TAILLE_ENTREE
+            cle_entree, coup_entree = self._lire_entree(decalage)[:2]
+
+        # On conserve le meilleur coup connu si la nouvelle recherche n'en fournit pas.
+        if coup == 0 and cle_entree == cle:
+            coup = coup_entree
+
+        donnees = _emballer(score, profondeur, borne, self.generation)
+        _ENTREE.pack_into(self.tampon, decalage, cle ^ coup ^ donnees, coup, donnees)
+        self.ecritures += 1
+
+    def nouvelle_generation(self):
+        """
+        Indique qu'une nouvelle recherche commence (par exemple au coup suivant). Les entrées des recherches
+        précédentes restent utilisables, mais peuvent être remplacées en priorité.
+        """
+        self.generation = (self.generation + 1) & 0xFF
+
+    def vider(self):
+        """
+        Efface toutes les entrées et remet les statistiques à zéro.
+        """
+        self.tampon[:] = bytes(len(self.tampon))
+        self.generation = 0
+        self.succes = 0
+        self.echecs = 0
+        self.collisions = 0
+        self.ecritures = 0
+
+    def statistiques(self):
+        """
+        Retourne les statistiques d'utilisation de la table.
+
+        :return: Un dictionnaire contenant le nombre de succès, d'échecs, de collisions (échecs dans un seau occupé
+                 par d'autres positions), d'écritures et le taux de succès.
+        """
+        sondages = self.succes + self.echecs
+        return {"succes": self.succes,
+                "echecs": self.echecs,
+                "collisions": self.collisions,
+                "ecritures": self.ecritures,
+                "taux_succes": self.succes / sondages if sondages else 0.0}
@@ -0,0 +1,111 @@
+#! /usr/bin/env python
+# -*- coding:Utf-8 -*-
+__author__ = "Jean-Francis Roy"
+import argparse
+import random
+import time
+from dames.damier import Damier
+from dames.damier_bitboard import DamierBitboard
+from dames.perft import perft
+
+CLASSES_DAMIER = (Damier, DamierBitboard)
+
+
+def _positions_de_parties(nombre_parties, graine):
+    """
+    Retourne les positions de parties jouées au hasard, un coup complet à la fois, sous forme de tuples (chaîne du
+    damier, couleur du joueur qui a le trait). Les positions avec prise y sont donc mêlées aux positions sans prise.
+    """
+    hasard = random.Random(graine)
+    positions = []
+    for _ in range(nombre_parties):
+        damier = Damier()
+        couleur = "blanc"
+        for _ in range(100):
+            coups = damier.lister_coups(couleur)
+            if not coups:
+                break
+            positions.append((damier.convertir_en_chaine(), couleur))
+            damier.jouer_coup(hasard.choice(coups), annulable=False)
+            couleur = "noir" if couleur == "blanc" else "blanc"
+    return positions
+
+
+def _mesurer(fonction, repetitions):
+    """
+    Retourne la meilleure durée, en secondes, de "repetitions" appels à fonction.
+    """
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        durees.append(time.perf_counter() - debut)
+    return min(durees)
+
+
+def mesurer(classe_damier, positions, profondeur_perft, repetitions=3):
+    """
+    Mesure les opérations du damier dont dépendent la recherche et l'interface.
+
+    :param classe_damier: La classe de damier à mesurer (Damier ou DamierBitboard).
+    :param positions: Les positions sur lesquelles les opérations sont répétées (voir _positions_de_parties).
+    :param profondeur_perft: La profondeur du perft à partir de la position initiale.
+    :param repetitions: Le nombre de fois que chaque mesure est répétée; la meilleure durée est conservée.
+    :return: Une liste de tuples (description, durée en secondes).
+    """
+    damiers = []
+    for chaine, couleur in positions:
+        damier = classe_damier()
+        damier.charger_dune_chaine(chaine)
+        damiers.append((damier, couleur, damier.lister_coups(couleur)))
+
+    def lister_coups():
+        for damier, couleur, _ in damiers:
+            damier.lister_coups(couleur)
+
+    def jouer_annuler():
+        for damier, _, coups in damiers:
+            for coup in coups:
+                damier.jouer_coup(coup)
+                damier.annuler_coup(coup)
+
+    def deplacements_a_partir_de_position():
+        for damier, couleur, coups in damiers:
+            for coup in coups:
+                damier.lister_deplacements_possibles_a_partir_de_position(coup.source)
+
+    def prise_possible():
+        for damier, couleur, _ in damiers:
+            damier.joueur_peut_prendre_une_piece_adverse(couleur)
+
+    return [
+        ("perft {}".format(profondeur_perft), _mesurer(lambda: perft(classe_damier(), "blanc", profondeur_perft),
+                                                       repetitions)),
+        ("lister_coups", _mesurer(lister_coups, repetitions)),
+        ("jouer_coup/annuler_coup", _mesurer(jouer_annuler, repetitions)),
+        ("lister_deplacements_possibles_a_partir_de_position", _mesurer(deplacements_a_partir_de_position,
+                                                                       repetitions)),
+        ("joueur_peut_prendre_une_piece_adverse", _mesurer(prise_possible, repetitions)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare la vitesse de Damier et de DamierBitboard.")
+    parser.add_argument("--perft", type=int, default=7, help="profondeur du perft à partir de la position initiale")
+    parser.add_argument("--parties", type=int, default=200,
+                        help="nombre de parties jouées au hasard pour les autres mesures")
+    parser.add_argument("--graine", type=int, default=0, help="graine du hasard des parties")
+    arguments = parser.parse_args()
+
+    positions = _positions_de_parties(arguments.parties, arguments.graine)
+    print("{} positions".format(len(positions)))
+    resultats = [mesurer(classe_damier, positions, arguments.perft) for classe_damier in CLASSES_DAMIER]
+
+    print("{:<52} {:>10} {:>15} {:>8}".format("", *(classe.__name__ for classe in CLASSES_DAMIER), "rapport"))
+    for (description, duree), (_, duree_bitboard) in zip(*resultats):
+        print("{:<52} {:>9.3f}s {:>14.3f}s {:>7.2f}x".format(description, duree, duree_bitboard,
+                                                             duree / duree_bitboard))
+
+
+if __name__ == "__main__":
+    main()
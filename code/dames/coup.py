@@ -0,0 +1,126 @@
+#! /usr/bin/env python
+# -*- coding:Utf-8 -*-
+__author__ = "Jean-Francis Roy"
+
+# Nombre maximal de positions d'un chemin qui peut être encodé en entier de 64 bits (5 bits par position, plus 4 bits
+# pour la longueur).
+LONGUEUR_MAX_ENCODEE = 12
+
+
+def numero_case(position):
+    """
+    Retourne le numéro (0 à 31) d'une case jouable, en numérotant les cases ligne par ligne.
+
+    :param position: La position (ligne, colonne), sur une case jouable.
+    :return: Le numéro de la case.
+    """
+    return position[0] * 4 + position[1] // 2
+
+
+def position_case(numero):
+    """
+    Retourne la position (ligne, colonne) de la case jouable portant ce numéro (voir numero_case).
+    """
+    ligne = numero // 4
+    return ligne, (numero % 4) * 2 + (1 - ligne % 2)
+
+
+class Coup:
+    """
+    Classe représentant un tour complet d'un joueur: le chemin suivi par la pièce (la position de départ, puis chaque
+    position d'arrivée) et les positions des pièces prises, dans l'ordre.
+    """
+
+    __slots__ = ("chemin", "prises", "promotion")
+
+    def __init__(self, chemin, prises=(), promotion=False):
+        """
+        :param chemin: Les positions successives de la pièce, de la source à la cible.
+        :type chemin: tuple de positions (ligne, colonne).
+        :param prises: Les positions des pièces prises, dans l'ordre.
+        :type prises: tuple de positions (ligne, colonne).
+        :param promotion: True si la pièce est promue dame pendant le coup.
+        :type promotion: bool.
+        """
+        self.chemin = chemin
+        self.prises = prises
+        self.promotion = promotion
+
+    @property
+    def source(self):
+        return self.chemin[0]
+
+    @property
+    def cible(self):
+        return self.chemin[-1]
+
+    def est_prise(self):
+        """
+        :return: True si le coup prend au moins une pièce adverse, False autrement.
+        """
+        return len(self.prises) > 0
+
+    def deplacements(self):
+        """
+        Retourne la liste des sauts (source, cible) qui composent le coup, tels que Damier.deplacer les attend.
+        """
+        return list(zip(self.chemin, self.chemin[1:]))
+
+    def encoder(self):
+        """
+        Encode le chemin du coup en un entier non nul de 64 bits (voir encoder_chemin).
+        """
+        return encoder_chemin(self.chemin)
+
+    def __eq__(self, autre):
+        return isinstance(autre, Coup) and self.chemin == autre.chemin
+
+    def __hash__(self):
+        return hash(self.chemin)
+
+    def __repr__(self):
+        separateur = " x " if self.prises else " -> "
+        return separateur.join("{},{}".format(ligne, colonne) for ligne, colonne in self.chemin)
+
+
+def encoder_chemin(chemin):
+    """
+    Encode un chemin en un entier de 64 bits: la longueur sur 4 bits, puis le numéro (0 à 31) de chaque case jouable
+    sur 5 bits.
+
+    :param chemin: Les positions successives de la pièce.
+    :type chemin: tuple de positions (ligne, colonne).
+    :return: L'entier, ou 0 si le chemin est trop long pour être encodé.
+    """
+    if len(chemin) > LONGUEUR_MAX_ENCODEE:
+        return 0
+
+    code = len(chemin)
+    for decalage, position in enumerate(chemin):
+        code |= numero_case(position) << (4 + 5 * decalage)
+    return code
+
+
+def decoder_chemin(code):
+    """
+    Retrouve le chemin encodé par encoder_chemin.
+
+    :param code: L'entier encodé.
+    :type code: int.
+    :return: Le chemin, un tuple de positions (ligne, colonne).
+    """
+    return tuple(position_case((code >> (4 + 5 * decalage)) & 0x1F) for decalage in range(code & 0xF))
+
+
+def prises_du_chemin(chemin):
+    """
+    Retrouve les positions des pièces prises à partir du chemin d'un coup: chaque saut de deux cases prend la pièce
+    du milieu.
+
+    :param chemin: Les positions successives de la pièce.
+    :type chemin: tuple de positions (ligne, colonne).
+    :return: Les positions prises, dans l'ordre.
+    """
+    return tuple(((source[0] + cible[0]) // 2, (source[1] + cible[1]) // 2)
+                 for source, cible in zip(chemin, chemin[1:]) if abs(cible[0] - source[0]) == 2)
+
@@ -2,7 +2,66 @@
 # -*- coding:Utf-8 -*-
 __author__ = "Jean-Francis Roy"
 from dames.piece import Piece
+from dames.coup import Coup
 from dames.exceptions import PositionCibleInvalide, PositionSourceInvalide, ProblemeChargement
+from dames.zobrist import cle_piece, cle_trait
+from dames.table_positionnelle import TABLE_POSITIONNELLE
+
+# Les quatre directions diagonales (ligne, colonne), dans l'ordre où les déplacements sont listés: bas gauche,
+# bas droite, haut gauche, haut droite.
+DIRECTIONS = ((1, -1), (1, 1), (-1, -1), (-1, 1))
+
+
+def _construire_table_deplacements(directions_avance):
+    """
+    Construit, pour chaque position du damier, la liste des directions où une pièce peut se rendre. Chaque direction
+    est un tuple (diagonale, saut, avance):
+    - diagonale: la case voisine, qui est aussi la case sautée lors d'une prise;
+    - saut: la case d'arrivée d'une prise, ou None si elle est hors du damier;
+    - avance: True si la pièce peut s'y déplacer sans prise.
+    Les directions dont la diagonale est hors du damier sont omises.
+
+    :param directions_avance: Les sens de déplacement vertical (1 vers le bas, -1 vers le haut) permis sans prise.
+    :type directions_avance: tuple
+    :return: Un dictionnaire associant chaque position (ligne, colonne) à un tuple de directions.
+    """
+    table = {}
+    for ligne in range(8):
+        for colonne in range(8):
+            entrees = []
+            for d_ligne, d_colonne in DIRECTIONS:
+                diagonale = (ligne + d_ligne, colonne + d_colonne)
+                if not (0 <= diagonale[0] <= 7 and 0 <= diagonale[1] <= 7):
+                    continue
+                saut = (ligne + 2 * d_ligne, colonne + 2 * d_colonne)
+                if not (0 <= saut[0] <= 7 and 0 <= saut[1] <= 7):
+                    saut = None
+                entrees.append((diagonale, saut, d_ligne in directions_avance))
+            table[(ligne, colonne)] = tuple(entrees)
+
+    return table
+
+
+# Tables de déplacements construites une seule fois, selon la couleur et le type de la pièce: les pions noirs
+# descendent, les pions blancs montent et les dames vont dans les deux sens. Toutes les pièces prennent dans les
+# quatre directions.
+_TABLE_DAME = _construire_table_deplacements((1, -1))
+TABLE_DEPLACEMENTS = {
+    ("noir", "pion"): _construire_table_deplacements((1,)),
+    ("blanc", "pion"): _construire_table_deplacements((-1,)),
+    ("noir", "dame"): _TABLE_DAME,
+    ("blanc", "dame"): _TABLE_DAME,
+}
+
+
+def pieces_dune_chaine(chaine):
+    """
+    Génère les pièces d'une chaîne écrite par Damier.convertir_en_chaine, sous forme de tuples (position, piece).
+    """
+    for information_piece in chaine.split("\n"):
+        if information_piece != "":
+            ligne_string, colonne_string, couleur, type_piece = information_piece.split(",")
+            yield (int(ligne_string), int(colonne_string)), Piece(couleur, type_piece)
 
 
 class Damier:
@@ -10,13 +69,31 @@ class Damier:
     Classe représentant le damier d'un jeu de dames.
     """
 
-    def __init__(self):
+    def __init__(self, table_positionnelle=TABLE_POSITIONNELLE):
         """
         Méthode spéciale initialisant un nouveau damier.
+
+        :param table_positionnelle: La table dont le damier tient le score à jour (voir dames.table_positionnelle).
         """
         # Dictionnaire de cases. La clé est une position (ligne, colonne), et la valeur une instance de la classe Piece.
         self.cases = {}
 
+        # Index des positions occupées par chaque couleur, tenu à jour en même temps que self.cases. Les
+        # méthodes qui ne s'intéressent qu'à une couleur n'ont donc pas à parcourir toutes les cases.
+        self.positions_par_couleur = {"blanc": set(), "noir": set()}
+
+        # Hash de Zobrist des pièces du damier, mis à jour à chaque ajout ou retrait de pièce.
+        self.hash = 0
+
+        # Nombre de pièces de chaque sorte (indexé par Piece.code) et score du damier selon la table positionnelle,
+        # du point de vue des blancs, eux aussi mis à jour à chaque ajout ou retrait de pièce.
+        self.table_positionnelle = table_positionnelle
+        self.nombre_pieces = [0, 0, 0, 0]
+        self.score_positionnel = 0
+
+        # Pile des déplacements joués avec la méthode jouer, permettant de les annuler dans l'ordre inverse.
+        self.pile_annulation = []
+
         # Appel de la méthode qui initialise un damier par défaut.
         self.initialiser_damier_par_default()
 
@@ -68,68 +145,26 @@ class Damier:
         if piece is None:
             return []
 
-        diagonale_bas_gauche = (position[0] + 1, position[1] - 1)
-        diagonale_bas_droite = (position[0] + 1, position[1] + 1)
-        diagonale_haut_gauche = (position[0] - 1, position[1] - 1)
-        diagonale_haut_droite = (position[0] - 1, position[1] + 1)
-        saut_bas_gauche = (position[0] + 2, position[1] - 2)
-        saut_bas_droite = (position[0] + 2, position[1] + 2)
-        saut_haut_gauche = (position[0] - 2, position[1] - 2)
-        saut_haut_droite = (position[0] - 2, position[1] + 2)
-
-        piece_bas_gauche = self.get_piece(diagonale_bas_gauche)
-        piece_bas_droite = self.get_piece(diagonale_bas_droite)
-        piece_haut_gauche = self.get_piece(diagonale_haut_gauche)
-        piece_haut_droite = self.get_piece(diagonale_haut_droite)
-        piece_saut_bas_gauche = self.get_piece(saut_bas_gauche)
-        piece_saut_bas_droite = self.get_piece(saut_bas_droite)
-        piece_saut_haut_gauche = self.get_piece(saut_haut_gauche)
-        piece_saut_haut_droite = self.get_piece(saut_haut_droite)
-
         liste_deplacements = []
-
-        if self.position_valide(diagonale_bas_gauche):
-            if piece_bas_gauche is None:
-                if not doit_prendre:
-                    if piece.est_noir() or piece.est_dame():
-                        liste_deplacements.append(diagonale_bas_gauche)
-            else:
-                if self.position_valide(saut_bas_gauche):
-                    if piece_saut_bas_gauche is None and piece_bas_gauche.couleur != piece.couleur:
-                        liste_deplacements.append(saut_bas_gauche)
-
-        if self.position_valide(diagonale_bas_droite):
-            if piece_bas_droite is None:
-                if not doit_prendre:
-                    if piece.est_noir() or piece.est_dame():
-                        liste_deplacements.append(diagonale_bas_droite)
-            else:
-                if self.position_valide(saut_bas_droite):
-                    if piece_saut_bas_droite is None and piece_bas_droite.couleur != piece.couleur:
-                        liste_deplacements.append(saut_bas_droite)
-
-        if self.position_valide(diagonale_haut_gauche):
-            if piece_haut_gauche is None:
-                if not doit_prendre:
-                    if piece.est_blanc() or piece.est_dame():
-                        liste_deplacements.append(diagonale_haut_gauche)
-            else:
-                if self.position_valide(saut_haut_gauche):
-                    if piece_saut_haut_gauche is None and piece_haut_gauche.couleur != piece.couleur:
-                        liste_deplacements.append(saut_haut_gauche)
-
-        if self.position_valide(diagonale_haut_droite):
-            if piece_haut_droite is None:
-                if not doit_prendre:
-                    if piece.est_blanc() or piece.est_dame():
-                        liste_deplacements.append(diagonale_haut_droite)
-            else:
-                if self.position_valide(saut_haut_droite):
-                    if piece_saut_haut_droite is None and piece_haut_droite.couleur != piece.couleur:
-                        liste_deplacements.append(saut_haut_droite)
+        self._ajouter_deplacements(position, piece, doit_prendre, liste_deplacements)
 
         return liste_deplacements
 
+    def _ajouter_deplacements(self, position, piece, doit_prendre, liste_deplacements):
+        """
+        Ajoute à "liste_deplacements" les positions accessibles par "piece", placée sur "position". Les voisines et
+        les sauts sont lus dans TABLE_DEPLACEMENTS: les positions hors du damier n'y figurent pas.
+        """
+        cases = self.cases
+        couleur = piece.couleur
+        for diagonale, saut, avance in TABLE_DEPLACEMENTS[(couleur, piece.type_de_piece)].get(position, ()):
+            piece_diagonale = cases.get(diagonale)
+            if piece_diagonale is None:
+                if avance and not doit_prendre:
+                    liste_deplacements.append(diagonale)
+            elif saut is not None and piece_diagonale.couleur != couleur and saut not in cases:
+                liste_deplacements.append(saut)
+
     def lister_deplacements_possibles_de_couleur(self, couleur, doit_prendre=False):
         """
         Fonction retournant la liste des positions (déplacements) possibles des pièces d'une certaine couleur. Encore
@@ -146,10 +181,8 @@ class Damier:
         """
         deplacements_possibles = []
 
-        for (position, piece) in self.cases.items():
-            if piece.couleur == couleur:
-                deplacements_possibles += self.lister_deplacements_possibles_a_partir_de_position(position,
-                                                                                                  doit_prendre)
+        for position in self.positions_par_couleur[couleur]:
+            self._ajouter_deplacements(position, self.cases[position], doit_prendre, deplacements_possibles)
 
         return deplacements_possibles
 
@@ -171,7 +204,74 @@ class Damier:
         :type couleur_joueur: string.
         :return: True si le joueur peut faire une prise, False autrement.
         """
-        return len(self.lister_deplacements_possibles_de_couleur(couleur_joueur, True)) > 0
+        prises = []
+        for position in self.positions_par_couleur[couleur_joueur]:
+            self._ajouter_deplacements(position, self.cases[position], True, prises)
+            if prises:
+                return True
+
+        return False
+
+    def _ajouter_piece(self, position, piece):
+        """
+        Place une pièce sur le damier en mettant à jour l'index des positions par couleur.
+        """
+        self.cases[position] = piece
+        self.positions_par_couleur[piece.couleur].add(position)
+        self.hash ^= cle_piece(position, piece)
+        self.nombre_pieces[piece.code] += 1
+        self.score_positionnel += self.table_positionnelle[piece.code][position]
+
+    def _retirer_piece(self, position):
+        """
+        Retire la pièce d'une position en mettant à jour l'index des positions par couleur, et la retourne.
+        """
+        piece = self.cases.pop(position)
+        self.positions_par_couleur[piece.couleur].discard(position)
+        self.hash ^= cle_piece(position, piece)
+        self.nombre_pieces[piece.code] -= 1
+        self.score_positionnel -= self.table_positionnelle[piece.code][position]
+        return piece
+
+    def _vider(self):
+        """
+        Retire toutes les pièces du damier.
+        """
+        self.cases.clear()
+        for positions in self.positions_par_couleur.values():
+            positions.clear()
+        self.pile_annulation.clear()
+        self.hash = 0
+        self.nombre_pieces = [0, 0, 0, 0]
+        self.score_positionnel = 0
+
+    def compter_pieces(self, couleur, type_de_piece=None):
+        """
+        Retourne le nombre de pièces d'une couleur sur le damier, tenu à jour à chaque déplacement.
+
+        :param couleur: La couleur ("blanc", "noir").
+        :type couleur: string.
+        :param type_de_piece: Le type de pièces à compter ("pion", "dame"), ou None pour toutes les pièces.
+        :type type_de_piece: string.
+        :return: Le nombre de pièces.
+        """
+        code = 0 if couleur == "blanc" else 2
+        if type_de_piece is None:
+            return self.nombre_pieces[code] + self.nombre_pieces[code + 1]
+        return self.nombre_pieces[code + (type_de_piece == "dame")]
+
+    def hash_position(self, couleur_joueur, position_source_forcee=None):
+        """
+        Retourne le hash de Zobrist de la position: les pièces du damier, le joueur qui a le trait et la position
+        avec laquelle il doit continuer sa prise, s'il y en a une.
+
+        :param couleur_joueur: La couleur du joueur qui a le trait.
+        :type couleur_joueur: string.
+        :param position_source_forcee: La position avec laquelle le joueur doit jouer, ou None.
+        :type position_source_forcee: Tuple (ligne, colonne).
+        :return: Le hash, un entier de 64 bits.
+        """
+        return self.hash ^ cle_trait(couleur_joueur, position_source_forcee)
 
     def deplacer(self, position_source, position_cible):
         """
@@ -205,22 +305,145 @@ class Damier:
         if not position_cible in deplacements_possibles:
             raise PositionCibleInvalide("Déplacement invalide: position cible erronnée.")
 
-        self.cases[position_cible] = piece
-        del self.cases[position_source]
+        return self.jouer(position_source, position_cible, annulable=False)
+
+    def jouer(self, position_source, position_cible, annulable=True):
+        """
+        Effectue un déplacement que l'on sait valide, sans le vérifier. La pièce prise et la promotion, s'il y a
+        lieu, sont conservées dans self.pile_annulation afin que la méthode annuler puisse remettre le damier
+        exactement dans son état précédent.
+
+        Lors d'une promotion, la pièce est remplacée par une nouvelle dame: la pièce d'origine n'est pas modifiée.
+
+        :param position_source: La position source du déplacement.
+        :type position_source: Tuple (ligne, colonne).
+        :param position_cible: La position cible du déplacement.
+        :type position_cible: Tuple (ligne, colonne).
+        :param annulable: False pour ne pas conserver de quoi annuler le déplacement (un déplacement d'une partie,
+                          qui n'est jamais annulé).
+        :return: True si le déplacement a été effectué avec prise, False autrement.
+        """
+        piece = self._retirer_piece(position_source)
 
         # Si la pièce est rendue au bout, elle est promue reine!
-        if (position_cible[0] == 0 and piece.est_blanc()) or (position_cible[0] == 7 and piece.est_noir()):
-            piece.promouvoir()
+        piece_jouee = piece
+        if piece.est_pion() and ((position_cible[0] == 0 and piece.est_blanc()) or
+                                 (position_cible[0] == 7 and piece.est_noir())):
+            piece_jouee = piece.promouvoir()
+        self._ajouter_piece(position_cible, piece_jouee)
 
         # Si le déplacement est une prise, on doit supprimer la pièce prise.
+        position_prise = None
+        piece_prise = None
         if abs(position_cible[0] - position_source[0]) == 2:
-            position_prise = ((position_cible[0] + position_source[0]) / 2,
-                              (position_cible[1] + position_source[1]) / 2)
-            del self.cases[position_prise]
+            position_prise = ((position_cible[0] + position_source[0]) // 2,
+                              (position_cible[1] + position_source[1]) // 2)
+            piece_prise = self._retirer_piece(position_prise)
 
-            return True
+        if annulable:
+            self.pile_annulation.append((position_source, position_cible, piece, position_prise, piece_prise))
 
-        return False
+        return piece_prise is not None
+
+    def annuler(self):
+        """
+        Annule le dernier déplacement joué avec la méthode jouer: la pièce retourne à sa position source, sans sa
+        promotion, et la pièce prise est remise sur le damier.
+        """
+        position_source, position_cible, piece, position_prise, piece_prise = self.pile_annulation.pop()
+        self._retirer_piece(position_cible)
+        self._ajouter_piece(position_source, piece)
+        if piece_prise is not None:
+            self._ajouter_piece(position_prise, piece_prise)
+
+    def lister_coups(self, couleur, position_source_forcee=None):
+        """
+        Retourne la liste des coups complets (tours entiers) permis à un joueur. Si le joueur peut prendre une pièce
+        adverse, seuls les coups avec prise sont retournés, et chaque prise multiple est suivie jusqu'au bout: un
+        coup ne s'arrête que lorsque la pièce ne peut plus prendre. Le damier n'est pas modifié.
+
+        :param couleur: La couleur du joueur.
+        :type couleur: string.
+        :param position_source_forcee: Si elle est fournie, seules les prises de la pièce à cette position sont
+                                       retournées.
+        :type position_source_forcee: Tuple (ligne, colonne).
+        :return: Une liste d'instances de Coup.
+        """
+        if position_source_forcee is not None:
+            positions = [position_source_forcee]
+        else:
+            positions = self.positions_par_couleur[couleur]
+
+        coups = []
+        for position in positions:
+            piece = self.cases[position]
+            self._explorer_prises(position, couleur, piece.type_de_piece, [position], [], False, coups)
+
+        if coups or position_source_forcee is not None:
+            return coups
+
+        ligne_promotion = 0 if couleur == "blanc" else 7
+        for position in positions:
+            piece = self.cases[position]
+            cibles = []
+            self._ajouter_deplacements(position, piece, False, cibles)
+            for cible in cibles:
+                coups.append(Coup((position, cible), (), piece.est_pion() and cible[0] == ligne_promotion))
+
+        return coups
+
+    def _explorer_prises(self, position, couleur, type_de_piece, chemin, prises, promotion, coups):
+        """
+        Parcours en profondeur des prises possibles depuis "position", sans modifier le damier: comme avec deplacer,
+        la case de départ et les pièces déjà prises sont considérées comme vides. Chaque séquence qui ne peut plus
+        être prolongée est ajoutée à "coups".
+        """
+        cases = self.cases
+        depart = chemin[0]
+        prolongee = False
+        for diagonale, saut, _ in TABLE_DEPLACEMENTS[(couleur, type_de_piece)].get(position, ()):
+            if saut is None or diagonale in prises:
+                continue
+            piece_sautee = cases.get(diagonale)
+            if piece_sautee is None or piece_sautee.couleur == couleur:
+                continue
+            if saut in cases and saut != depart and saut not in prises:
+                continue
+
+            prolongee = True
+            promue = type_de_piece == "pion" and ((couleur == "blanc" and saut[0] == 0) or
+                                                  (couleur == "noir" and saut[0] == 7))
+            chemin.append(saut)
+            prises.append(diagonale)
+            self._explorer_prises(saut, couleur, "dame" if promue else type_de_piece, chemin, prises,
+                                  promotion or promue, coups)
+            chemin.pop()
+            prises.pop()
+
+        if not prolongee and len(chemin) > 1:
+            coups.append(Coup(tuple(chemin), tuple(prises), promotion))
+
+    def jouer_coup(self, coup, annulable=True):
+        """
+        Joue un coup complet que l'on sait valide, un saut à la fois avec la méthode jouer.
+
+        :param coup: Le coup à jouer.
+        :type coup: Coup.
+        :param annulable: False si le coup ne sera pas annulé (voir jouer).
+        """
+        chemin = coup.chemin
+        for i in range(len(chemin) - 1):
+            self.jouer(chemin[i], chemin[i + 1], annulable)
+
+    def annuler_coup(self, coup):
+        """
+        Annule un coup complet joué avec la méthode jouer_coup.
+
+        :param coup: Le dernier coup joué.
+        :type coup: Coup.
+        """
+        for _ in range(len(coup.chemin) - 1):
+            self.annuler()
 
     def convertir_en_chaine(self):
         """
@@ -232,11 +455,8 @@ class Damier:
 
         :return: La chaîne de caractères.
         """
-        chaine = ""
-        for position, piece in self.cases.items():
-            chaine += "{},{},{},{}\n".format(position[0], position[1], piece.couleur, piece.type_de_piece)
-
-        return chaine
+        return "".join("{},{},{},{}\n".format(position[0], position[1], piece.couleur, piece.type_de_piece)
+                       for position, piece in self.cases.items())
 
     def charger_dune_chaine(self, chaine):
         """
@@ -246,14 +466,28 @@ class Damier:
 
         :param chaine: La chaîne de caractères.
         :type chaine: string
-        :raise ProblemeChargement: Exception lancée si un problème survient lors du chargement.
+        :raise ProblemeChargement: Exception lancée si un problème survient lors du chargement, notamment si une
+                                   pièce est placée sur une case qui n'est pas jouable ou sur une case déjà occupée.
+        """
+        self.charger_pieces(pieces_dune_chaine(chaine))
+
+    def charger_pieces(self, pieces):
+        """
+        Remplit le damier avec des pièces.
+
+        :param pieces: Les pièces, sous forme de tuples (position, piece).
+        :type pieces: itérable de tuples ((ligne, colonne), Piece).
+        :raise ProblemeChargement: Exception lancée si un problème survient lors du chargement, notamment si une
+                                   pièce est placée sur une case qui n'est pas jouable ou sur une case déjà occupée.
         """
         try:
-            self.cases.clear()
-            for information_piece in chaine.split("\n"):
-                if information_piece != "":
-                    ligne_string, colonne_string, couleur, type_piece = information_piece.split(",")
-                    self.cases[(int(ligne_string), int(colonne_string))] = Piece(couleur, type_piece)
+            self._vider()
+            for position, piece in pieces:
+                if not self.position_valide(position) or (position[0] + position[1]) % 2 == 0:
+                    raise ValueError("Case non jouable: {}".format(position))
+                if position in self.cases:
+                    raise ValueError("Deux pièces sur la case {}".format(position))
+                self._ajouter_piece(position, piece)
         except:
             raise ProblemeChargement("Problème lors du chargement.")
 
@@ -261,31 +495,31 @@ class Damier:
         """
         Initialise un damier de base avec la position initiale des pièces.
         """
-        self.cases.clear()
-        self.cases[(7, 0)] = Piece("blanc", "pion")
-        self.cases[(7, 2)] = Piece("blanc", "pion")
-        self.cases[(7, 4)] = Piece("blanc", "pion")
-        self.cases[(7, 6)] = Piece("blanc", "pion")
-        self.cases[(6, 1)] = Piece("blanc", "pion")
-        self.cases[(6, 3)] = Piece("blanc", "pion")
-        self.cases[(6, 5)] = Piece("blanc", "pion")
-        self.cases[(6, 7)] = Piece("blanc", "pion")
-        self.cases[(5, 0)] = Piece("blanc", "pion")
-        self.cases[(5, 2)] = Piece("blanc", "pion")
-        self.cases[(5, 4)] = Piece("blanc", "pion")
-        self.cases[(5, 6)] = Piece("blanc", "pion")
-        self.cases[(2, 1)] = Piece("noir", "pion")
-        self.cases[(2, 3)] = Piece("noir", "pion")
-        self.cases[(2, 5)] = Piece("noir", "pion")
-        self.cases[(2, 7)] = Piece("noir", "pion")
-        self.cases[(1, 0)] = Piece("noir", "pion")
-        self.cases[(1, 2)] = Piece("noir", "pion")
-        self.cases[(1, 4)] = Piece("noir", "pion")
-        self.cases[(1, 6)] = Piece("noir", "pion")
-        self.cases[(0, 1)] = Piece("noir", "pion")
-        self.cases[(0, 3)] = Piece("noir", "pion")
-        self.cases[(0, 5)] = Piece("noir", "pion")
-        self.cases[(0, 7)] = Piece("noir", "pion")
+        self._vider()
+        self._ajouter_piece((7, 0), Piece("blanc", "pion"))
+        self._ajouter_piece((7, 2), Piece("blanc", "pion"))
+        self._ajouter_piece((7, 4), Piece("blanc", "pion"))
+        self._ajouter_piece((7, 6), Piece("blanc", "pion"))
+        self._ajouter_piece((6, 1), Piece("blanc", "pion"))
+        self._ajouter_piece((6, 3), Piece("blanc", "pion"))
+        self._ajouter_piece((6, 5), Piece("blanc", "pion"))
+        self._ajouter_piece((6, 7), Piece("blanc", "pion"))
+        self._ajouter_piece((5, 0), Piece("blanc", "pion"))
+        self._ajouter_piece((5, 2), Piece("blanc", "pion"))
+        self._ajouter_piece((5, 4), Piece("blanc", "pion"))
+        self._ajouter_piece((5, 6), Piece("blanc", "pion"))
+        self._ajouter_piece((2, 1), Piece("noir", "pion"))
+        self._ajouter_piece((2, 3), Piece("noir", "pion"))
+        self._ajouter_piece((2, 5), Piece("noir", "pion"))
+        self._ajouter_piece((2, 7), Piece("noir", "pion"))
+        self._ajouter_piece((1, 0), Piece("noir", "pion"))
+        self._ajouter_piece((1, 2), Piece("noir", "pion"))
+        self._ajouter_piece((1, 4), Piece("noir", "pion"))
+        self._ajouter_piece((1, 6), Piece("noir", "pion"))
+        self._ajouter_piece((0, 1), Piece("noir", "pion"))
+        self._ajouter_piece((0, 3), Piece("noir", "pion"))
+        self._ajouter_piece((0, 5), Piece("noir", "pion"))
+        self._ajouter_piece((0, 7), Piece("noir", "pion"))
 
     def __repr__(self):
         """
@@ -0,0 +1,700 @@
+#! /usr/bin/env python
+# -*- coding:Utf-8 -*-
+__author__ = "Jean-Francis Roy"
+from dames.piece import Piece
+from dames.coup import Coup
+from dames.damier import pieces_dune_chaine
+from dames.exceptions import PositionCibleInvalide, PositionSourceInvalide, ProblemeChargement
+from dames.zobrist import cle_piece, cle_trait
+from dames.table_positionnelle import TABLE_POSITIONNELLE
+
+# Les 32 cases jouables (celles où ligne + colonne est impair) sont numérotées de 0 à 31, ligne par ligne. Le bit
+# numéro i d'un entier représente donc la case POSITIONS[i].
+POSITIONS = tuple((ligne, colonne) for ligne in range(8) for colonne in range(8) if (ligne + colonne) % 2 == 1)
+INDICES = {position: indice for indice, position in enumerate(POSITIONS)}
+
+PLEIN = (1 << len(POSITIONS)) - 1
+LIGNES_PAIRES = sum(1 << indice for indice, (ligne, colonne) in enumerate(POSITIONS) if ligne % 2 == 0)
+LIGNES_IMPAIRES = PLEIN & ~LIGNES_PAIRES
+
+
+def _construire_direction(d_ligne, d_colonne):
+    """
+    Calcule les masques et les décalages permettant de déplacer un ensemble de cases d'un pas dans une direction.
+    Le décalage à appliquer dépend de la parité de la ligne, et le masque ne conserve que les cases dont la voisine
+    est sur le damier.
+
+    :return: Un tuple (masque_pair, decalage_pair, masque_impair, decalage_impair).
+    """
+    masque = 0
+    decalages = {}
+    for indice, (ligne, colonne) in enumerate(POSITIONS):
+        voisine = (ligne + d_ligne, colonne + d_colonne)
+        if voisine in INDICES:
+            masque |= 1 << indice
+            decalages[ligne % 2] = INDICES[voisine] - indice
+
+    return masque & LIGNES_PAIRES, decalages[0], masque & LIGNES_IMPAIRES, decalages[1]
+
+
+# Les quatre directions, dans le même ordre que Damier.lister_deplacements_possibles_a_partir_de_position.
+BAS_GAUCHE = _construire_direction(1, -1)
+BAS_DROITE = _construire_direction(1, 1)
+HAUT_GAUCHE = _construire_direction(-1, -1)
+HAUT_DROITE = _construire_direction(-1, 1)
+DIRECTIONS = (BAS_GAUCHE, BAS_DROITE, HAUT_GAUCHE, HAUT_DROITE)
+DIRECTIONS_BAS = (BAS_GAUCHE, BAS_DROITE)
+DIRECTIONS_HAUT = (HAUT_GAUCHE, HAUT_DROITE)
+
+
+# Les mêmes directions en (ligne, colonne).
+SENS = ((1, -1), (1, 1), (-1, -1), (-1, 1))
+
+# Bit de chaque case.
+BITS = tuple(1 << indice for indice in range(len(POSITIONS)))
+
+# Les quatre pièces, dans l'ordre de Piece.code.
+PIECES = (Piece("blanc", "pion"), Piece("blanc", "dame"), Piece("noir", "pion"), Piece("noir", "dame"))
+
+# Clés de Zobrist de chaque pièce (selon Piece.code) sur chaque case, lues dans dames.zobrist.
+CLES = tuple(tuple(cle_piece(position, piece) for position in POSITIONS) for piece in PIECES)
+
+# Cases où chaque pièce (selon Piece.code) est promue: la première ligne pour les pions blancs, la dernière pour les
+# pions noirs, aucune pour les dames.
+LIGNES_PROMOTION = (sum(BITS[indice] for indice, (ligne, colonne) in enumerate(POSITIONS) if ligne == 0), 0,
+                    sum(BITS[indice] for indice, (ligne, colonne) in enumerate(POSITIONS) if ligne == 7), 0)
+
+
+def _voisine(indice, sens, distance=1):
+    """
+    Retourne le numéro de la case à "distance" pas de la case "indice" dans le sens (d_ligne, d_colonne) donné, ou
+    None si elle est hors du damier.
+    """
+    ligne, colonne = POSITIONS[indice]
+    return INDICES.get((ligne + distance * sens[0], colonne + distance * sens[1]))
+
+
+def _masque_saut(sens):
+    """
+    Retourne le bitboard des cases d'où un saut dans le sens donné arrive sur le damier.
+    """
+    return sum(BITS[indice] for indice in range(len(POSITIONS)) if _voisine(indice, sens, 2) is not None)
+
+
+# Cases d'où une prise est possible dans chaque direction, pour _preneuses.
+SAUT_BAS_GAUCHE, SAUT_BAS_DROITE, SAUT_HAUT_GAUCHE, SAUT_HAUT_DROITE = (_masque_saut(sens) for sens in SENS)
+
+# Sauts possibles à partir de chaque case, dans l'ordre de DIRECTIONS: des tuples (bit de la case sautée, position de
+# la case sautée, bit de la case d'arrivée, numéro de la case d'arrivée, position de la case d'arrivée).
+SAUTS = tuple(
+    tuple((BITS[_voisine(indice, sens)], POSITIONS[_voisine(indice, sens)], BITS[_voisine(indice, sens, 2)],
+           _voisine(indice, sens, 2), POSITIONS[_voisine(indice, sens, 2)])
+          for sens in SENS if _voisine(indice, sens, 2) is not None)
+    for indice in range(len(POSITIONS)))
+
+# Numéro de la case sautée par un déplacement, à l'indice source * 32 + cible, ou None si ce n'est pas un saut.
+CASES_SAUTEES = [None] * (len(POSITIONS) * len(POSITIONS))
+for _indice in range(len(POSITIONS)):
+    for _sens in SENS:
+        if _voisine(_indice, _sens, 2) is not None:
+            CASES_SAUTEES[_indice * len(POSITIONS) + _voisine(_indice, _sens, 2)] = _voisine(_indice, _sens)
+
+
+def _construire_voisines(directions_avance):
+    """
+    Construit, pour chaque case, les directions où une pièce peut se rendre, comme
+    dames.damier._construire_table_deplacements. Chaque direction est un tuple (numéro de la voisine, position de la
+    voisine, numéro du saut (None s'il est hors du damier), position du saut, avance), où "avance" est True si la
+    pièce peut se déplacer vers la voisine sans prise.
+    """
+    table = []
+    for indice in range(len(POSITIONS)):
+        entrees = []
+        for sens in SENS:
+            voisine = _voisine(indice, sens)
+            if voisine is None:
+                continue
+            saut = _voisine(indice, sens, 2)
+            entrees.append((voisine, POSITIONS[voisine], saut, None if saut is None else POSITIONS[saut],
+                            sens[0] in directions_avance))
+        table.append(tuple(entrees))
+    return tuple(table)
+
+
+# Voisines de chaque case selon Piece.code: les pions blancs montent, les pions noirs descendent et les dames vont
+# dans les deux sens.
+_VOISINES_DAME = _construire_voisines((1, -1))
+VOISINES = (_construire_voisines((-1,)), _VOISINES_DAME, _construire_voisines((1,)), _VOISINES_DAME)
+
+
+def _construire_coups_simples(sens, promotion):
+    """
+    Construit les coups sans prise dans un sens, indexés par le numéro de leur case cible (None si aucune case
+    source ne mène à cette case). Ces coups ne changent jamais: lister_coups retourne toujours les mêmes instances.
+
+    :param promotion: True pour les coups d'un pion, promu s'il arrive à la dernière ligne dans ce sens.
+    """
+    coups = [None] * len(POSITIONS)
+    for indice, position in enumerate(POSITIONS):
+        cible = _voisine(indice, sens)
+        if cible is not None:
+            ligne_cible = POSITIONS[cible][0]
+            coups[cible] = Coup((position, POSITIONS[cible]), (), promotion and ligne_cible in (0, 7))
+    return tuple(coups)
+
+
+# Déplacements sans prise vers le bas puis vers le haut: des tuples (masque_pair, decalage_pair, masque_impair,
+# decalage_impair, coups des pions, coups des dames), où les décalages sont tous positifs: vers la gauche (<<) pour
+# le bas, vers la droite (>>) pour le haut.
+DEPLACEMENTS_BAS = tuple((direction[0], direction[1], direction[2], direction[3],
+                          _construire_coups_simples(sens, True), _construire_coups_simples(sens, False))
+                         for direction, sens in zip(DIRECTIONS_BAS, SENS[:2]))
+DEPLACEMENTS_HAUT = tuple((direction[0], -direction[1], direction[2], -direction[3],
+                           _construire_coups_simples(sens, True), _construire_coups_simples(sens, False))
+                          for direction, sens in zip(DIRECTIONS_HAUT, SENS[2:]))
+
+
+def _decaler(bits, decalage):
+    return bits << decalage if decalage > 0 else bits >> -decalage
+
+
+def _pas(bits, direction):
+    """
+    Déplace toutes les cases de "bits" d'un pas dans la direction donnée. Les cases qui sortiraient du damier
+    disparaissent.
+    """
+    masque_pair, decalage_pair, masque_impair, decalage_impair = direction
+    return _decaler(bits & masque_pair, decalage_pair) | _decaler(bits & masque_impair, decalage_impair)
+
+
+def _indices(bits):
+    """
+    Retourne la liste des numéros de cases correspondant aux bits à 1.
+    """
+    indices = []
+    while bits:
+        bit = bits & -bits
+        indices.append(bit.bit_length() - 1)
+        bits ^= bit
+    return indices
+
+
+def _positions(bits):
+    """
+    Retourne la liste des positions (ligne, colonne) correspondant aux bits à 1.
+    """
+    positions = []
+    while bits:
+        bit = bits & -bits
+        positions.append(POSITIONS[bit.bit_length() - 1])
+        bits ^= bit
+    return positions
+
+
+def _preneuses(pieces, adverses, vides):
+    """
+    Retourne les cases de "pieces" d'où une prise est possible: la voisine dans une direction est adverse et la case
+    suivante est vide. Un saut déplace une case de deux lignes: il a le même décalage (7 ou 9) quelle que soit la
+    parité de la ligne, et seule la voisine dépend de cette parité (voir DIRECTIONS).
+    """
+    return pieces & (
+        SAUT_BAS_GAUCHE & vides >> 7 & (adverses >> 4 & LIGNES_PAIRES | adverses >> 3 & LIGNES_IMPAIRES) |
+        SAUT_BAS_DROITE & vides >> 9 & (adverses >> 5 & LIGNES_PAIRES | adverses >> 4 & LIGNES_IMPAIRES) |
+        SAUT_HAUT_GAUCHE & vides << 9 & (adverses << 4 & LIGNES_PAIRES | adverses << 5 & LIGNES_IMPAIRES) |
+        SAUT_HAUT_DROITE & vides << 7 & (adverses << 3 & LIGNES_PAIRES | adverses << 4 & LIGNES_IMPAIRES))
+
+
+def _ajouter_coups(cibles, coups_direction, coups):
+    """
+    Ajoute à "coups" les coups de "coups_direction" (voir DEPLACEMENTS_BAS) qui mènent aux cases de "cibles".
+    """
+    while cibles:
+        bit = cibles & -cibles
+        coups.append(coups_direction[bit.bit_length() - 1])
+        cibles ^= bit
+
+
+class DamierBitboard:
+    """
+    Damier équivalent à dames.damier.Damier, mais qui conserve les pièces dans quatre entiers de 32 bits (pions
+    blancs, dames blanches, pions noirs, dames noires). Les déplacements et les prises sont calculés pour toutes les
+    pièces d'une couleur à la fois à l'aide de décalages et de masques.
+
+    Les méthodes publiques sont les mêmes que celles de Damier: une Partie peut donc utiliser l'un ou l'autre.
+    """
+
+    def __init__(self, table_positionnelle=TABLE_POSITIONNELLE):
+        """
+        Méthode spéciale initialisant un nouveau damier.
+
+        :param table_positionnelle: La table dont le damier tient le score à jour (voir dames.table_positionnelle).
+        """
+        # Bitboards des pièces de chaque sorte, indexés par Piece.code: pions blancs, dames blanches, pions noirs et
+        # dames noires.
+        self.bitboards = [0, 0, 0, 0]
+
+        # Pièce (l'une des quatre instances partagées de Piece) de chaque case, pour que get_piece n'ait pas à
+        # consulter les quatre bitboards.
+        self._pieces = [None] * len(POSITIONS)
+
+        # Dictionnaire retourné par la propriété cases, construit seulement lorsqu'on le demande, ou None s'il doit
+        # être reconstruit.
+        self._cases = None
+
+        # Hash de Zobrist des pièces du damier, identique à celui de Damier pour les mêmes pièces.
+        self.hash = 0
+
+        # Nombre de pièces de chaque sorte et score positionnel, comme dans Damier.
+        self.table_positionnelle = table_positionnelle
+        self.nombre_pieces = [0, 0, 0, 0]
+        self.score_positionnel = 0
+
+        # Valeurs de la table positionnelle selon Piece.code puis le numéro de la case, pour _poser et _retirer.
+        self._valeurs = [[table_positionnelle[code][position] for position in POSITIONS] for code in range(4)]
+
+        # Pile des déplacements joués avec la méthode jouer, permettant de les annuler dans l'ordre inverse.
+        self.pile_annulation = []
+
+        self.initialiser_damier_par_default()
+
+    @property
+    def cases(self):
+        """
+        Dictionnaire de cases, construit à partir des pièces du damier. La clé est une position (ligne, colonne), et
+        la valeur une instance de la classe Piece. Il n'est reconstruit qu'après une modification du damier: il ne
+        doit pas être modifié.
+        """
+        if self._cases is None:
+            self._cases = {POSITIONS[indice]: piece for indice, piece in enumerate(self._pieces) if piece is not None}
+        return self._cases
+
+    def _bits_de_couleur(self, couleur):
+        """
+        Retourne les bitboards (pions, dames, adverses) du point de vue du joueur de couleur "couleur".
+        """
+        bitboards = self.bitboards
+        if couleur == "blanc":
+            return bitboards[0], bitboards[1], bitboards[2] | bitboards[3]
+        return bitboards[2], bitboards[3], bitboards[0] | bitboards[1]
+
+    def _vides(self):
+        bitboards = self.bitboards
+        return PLEIN & ~(bitboards[0] | bitboards[1] | bitboards[2] | bitboards[3])
+
+    def get_piece(self, position):
+        """
+        Récupère une pièce dans le damier.
+
+        :param position: La position où récupérer la pièce.
+        :type position: Tuple de coordonnées matricielles (ligne, colonne).
+        :return: La pièce à cette position s'il y en a une, None autrement.
+        """
+        indice = INDICES.get(position)
+        if indice is None:
+            return None
+
+        return self._pieces[indice]
+
+    def position_valide(self, position):
+        """
+        Vérifie si une position est valide (chaque coordonnée doit être dans les bornes).
+
+        :param position: Un couple (ligne, colonne).
+        :type position: tuple de deux éléments
+        :return: True si la position est valide, False autrement
+        """
+        return 0 <= position[0] <= 7 and 0 <= position[1] <= 7
+
+    def lister_deplacements_possibles_a_partir_de_position(self, position, doit_prendre=False):
+        """
+        Retourne la liste des positions accessibles par la pièce placée sur "position", dans le même ordre que
+        Damier.lister_deplacements_possibles_a_partir_de_position.
+
+        :param position: La position de départ du déplacement.
+        :type position: Tuple de deux éléments (ligne, colonne)
+        :param doit_prendre: Indique si oui ou non on force la liste de positions à ne contenir que les déplacements
+                             résultants de la prise d'une pièce adverse.
+        :type doit_prendre: Booléen.
+        :return: Une liste de positions où il est possible de se déplacer depuis la position "position".
+        """
+        # Pour une seule pièce, les cases voisines sont lues directement dans self._pieces plutôt que dans les
+        # bitboards.
+        indice = INDICES.get(position)
+        pieces = self._pieces
+        piece = None if indice is None else pieces[indice]
+        if piece is None:
+            return []
+
+        couleur = piece.code_couleur
+        liste_deplacements = []
+        for indice_diagonale, diagonale, indice_saut, saut, avance in VOISINES[piece.code][indice]:
+            piece_diagonale = pieces[indice_diagonale]
+            if piece_diagonale is None:
+                if avance and not doit_prendre:
+                    liste_deplacements.append(diagonale)
+            elif indice_saut is not None and piece_diagonale.code_couleur != couleur and pieces[indice_saut] is None:
+                liste_deplacements.append(saut)
+
+        return liste_deplacements
+
+    def _prises_de_couleur(self, couleur):
+        """
+        Retourne, pour chaque direction, le bitboard des cases d'arrivée des prises possibles pour une couleur.
+        """
+        pions, dames, adverses = self._bits_de_couleur(couleur)
+        pieces = pions | dames
+        vides = self._vides()
+        return [_pas(_pas(pieces, direction) & adverses, direction) & vides for direction in DIRECTIONS]
+
+    def lister_deplacements_possibles_de_couleur(self, couleur, doit_prendre=False):
+        """
+        Retourne la liste des positions (déplacements) possibles des pièces d'une certaine couleur. Comme pour Damier,
+        une position apparaît une fois par pièce qui peut l'atteindre; seul l'ordre de la liste diffère.
+
+        :param couleur: La couleur ("blanc", "noir") des pièces dont on considère le déplacement.
+        :type couleur: string
+        :param doit_prendre: Indique si oui ou non on force la liste de positions à ne contenir que les déplacements
+                             résultants de la prise d'une pièce adverse.
+        :return: Une liste de positions où les pièces de couleur "couleur" peuvent de se déplacer.
+        """
+        deplacements_possibles = []
+        for cibles in self._prises_de_couleur(couleur):
+            deplacements_possibles += _positions(cibles)
+
+        if not doit_prendre:
+            pions, dames, _ = self._bits_de_couleur(couleur)
+            vides = self._vides()
+            directions_pions = DIRECTIONS_BAS if couleur == "noir" else DIRECTIONS_HAUT
+            for direction in DIRECTIONS:
+                pieces = pions | dames if direction in directions_pions else dames
+                deplacements_possibles += _positions(_pas(pieces, direction) & vides)
+
+        return deplacements_possibles
+
+    def position_peut_prendre_une_piece_adverse(self, position):
+        """
+        Vérifie si la pièce à une certaine position peut prendre une pièce adverse.
+
+        :param position: La position source.
+        :type position: tuple (ligne, colonne)
+        :return: True si la pièce peut faire une prise, False autrement.
+        """
+        piece = self.get_piece(position)
+        if piece is None:
+            return False
+
+        _, _, adverses = self._bits_de_couleur(piece.couleur)
+        return _preneuses(BITS[INDICES[position]], adverses, self._vides()) != 0
+
+    def joueur_peut_prendre_une_piece_adverse(self, couleur_joueur):
+        """
+        Vérifie si un joueur peut prendre une pièce adverse.
+
+        :param couleur_joueur: La couleur du joueur.
+        :type couleur_joueur: string.
+        :return: True si le joueur peut faire une prise, False autrement.
+        """
+        pions, dames, adverses = self._bits_de_couleur(couleur_joueur)
+        return _preneuses(pions | dames, adverses, self._vides()) != 0
+
+    def _poser(self, indice, piece):
+        """
+        Place une pièce sur une case vide, en mettant à jour le bitboard correspondant.
+        """
+        code = piece.code
+        self.bitboards[code] |= BITS[indice]
+        self._pieces[indice] = piece
+        self._cases = None
+        self.hash ^= CLES[code][indice]
+        self.nombre_pieces[code] += 1
+        self.score_positionnel += self._valeurs[code][indice]
+
+    def _retirer(self, indice):
+        """
+        Retire la pièce d'une case et la retourne.
+        """
+        piece = self._pieces[indice]
+        code = piece.code
+        self.bitboards[code] ^= BITS[indice]
+        self._pieces[indice] = None
+        self._cases = None
+        self.hash ^= CLES[code][indice]
+        self.nombre_pieces[code] -= 1
+        self.score_positionnel -= self._valeurs[code][indice]
+        return piece
+
+    def deplacer(self, position_source, position_cible):
+        """
+        Effectue un déplacement sur le damier, exactement comme Damier.deplacer: promotion d'un pion rendu au bout et
+        suppression de la pièce prise, s'il y a lieu.
+
+        :param position_source: La position source du déplacement.
+        :type position_source: Tuple (ligne, colonne).
+        :param position_cible: La position cible du déplacement.
+        :type position_cible: Tuple (ligne, colonne).
+        :return: True si le déplacement a été effectué avec prise, False autrement.
+        :raise PositionSourceInvalide: Exception retournée si la position source est invalide.
+        :raise PositionCibleInvalide: Exception retournée si la position cible est invalide.
+        """
+        piece = self.get_piece(position_source)
+
+        if piece is None:
+            raise PositionSourceInvalide("Déplacement invalide: aucune pièce à la position source.")
+
+        deplacements_possibles = self.lister_deplacements_possibles_a_partir_de_position(position_source)
+        if not position_cible in deplacements_possibles:
+            raise PositionCibleInvalide("Déplacement invalide: position cible erronnée.")
+
+        return self.jouer(position_source, position_cible, annulable=False)
+
+    def jouer(self, position_source, position_cible, annulable=True):
+        """
+        Effectue un déplacement que l'on sait valide, sans le vérifier, comme Damier.jouer. Le déplacement peut
+        ensuite être annulé avec la méthode annuler.
+
+        :param position_source: La position source du déplacement.
+        :type position_source: Tuple (ligne, colonne).
+        :param position_cible: La position cible du déplacement.
+        :type position_cible: Tuple (ligne, colonne).
+        :param annulable: False pour ne pas conserver de quoi annuler le déplacement (un déplacement d'une partie,
+                          qui n'est jamais annulé).
+        :return: True si le déplacement a été effectué avec prise, False autrement.
+        """
+        indice_source = INDICES[position_source]
+        indice_cible = INDICES[position_cible]
+        piece = self._retirer(indice_source)
+
+        # Si la pièce est rendue au bout, elle est promue reine!
+        piece_jouee = piece
+        if BITS[indice_cible] & LIGNES_PROMOTION[piece.code]:
+            piece_jouee = piece.promouvoir()
+        self._poser(indice_cible, piece_jouee)
+
+        # Si le déplacement est une prise, on doit supprimer la pièce prise.
+        indice_prise = CASES_SAUTEES[indice_source * len(POSITIONS) + indice_cible]
+        piece_prise = None
+        if indice_prise is not None:
+            piece_prise = self._retirer(indice_prise)
+
+        if annulable:
+            self.pile_annulation.append((indice_source, indice_cible, piece, indice_prise, piece_prise))
+
+        return piece_prise is not None
+
+    def annuler(self):
+        """
+        Annule le dernier déplacement joué avec la méthode jouer.
+        """
+        indice_source, indice_cible, piece, indice_prise, piece_prise = self.pile_annulation.pop()
+        self._retirer(indice_cible)
+        self._poser(indice_source, piece)
+        if piece_prise is not None:
+            self._poser(indice_prise, piece_prise)
+
+    def lister_coups(self, couleur, position_source_forcee=None):
+        """
+        Retourne la liste des coups complets (tours entiers) permis à un joueur, comme Damier.lister_coups.
+
+        :param couleur: La couleur du joueur.
+        :type couleur: string.
+        :param position_source_forcee: Si elle est fournie, seules les prises de la pièce à cette position sont
+                                       retournées.
+        :type position_source_forcee: Tuple (ligne, colonne).
+        :return: Une liste d'instances de Coup.
+        """
+        pions, dames, adverses = self._bits_de_couleur(couleur)
+        vides = PLEIN & ~(pions | dames | adverses)
+        if position_source_forcee is not None:
+            sources = (pions | dames) & BITS[INDICES[position_source_forcee]]
+        else:
+            sources = pions | dames
+
+        # Les prises ne sont cherchées qu'à partir des pièces qui peuvent en faire une, trouvées toutes à la fois.
+        coups = []
+        preneuses = _preneuses(sources, adverses, vides)
+        if preneuses:
+            lignes_promotion = LIGNES_PROMOTION[0 if couleur == "blanc" else 2]
+            for indice in _indices(preneuses):
+                self._explorer_prises(indice, bool(pions & BITS[indice]), lignes_promotion, vides, adverses,
+                                      [POSITIONS[indice]], [], False, coups)
+            return coups
+
+        if position_source_forcee is not None:
+            return coups
+
+        # Les déplacements sans prise sont calculés direction par direction pour toutes les pièces à la fois.
+        pions_bas, pions_haut = (pions, 0) if couleur == "noir" else (0, pions)
+        for masque_pair, decalage_pair, masque_impair, decalage_impair, coups_pions, coups_dames in DEPLACEMENTS_BAS:
+            if pions_bas:
+                _ajouter_coups(((pions_bas & masque_pair) << decalage_pair |
+                                (pions_bas & masque_impair) << decalage_impair) & vides, coups_pions, coups)
+            if dames:
+                _ajouter_coups(((dames & masque_pair) << decalage_pair |
+                                (dames & masque_impair) << decalage_impair) & vides, coups_dames, coups)
+        for masque_pair, decalage_pair, masque_impair, decalage_impair, coups_pions, coups_dames in DEPLACEMENTS_HAUT:
+            if pions_haut:
+                _ajouter_coups(((pions_haut & masque_pair) >> decalage_pair |
+                                (pions_haut & masque_impair) >> decalage_impair) & vides, coups_pions, coups)
+            if dames:
+                _ajouter_coups(((dames & masque_pair) >> decalage_pair |
+                                (dames & masque_impair) >> decalage_impair) & vides, coups_dames, coups)
+
+        return coups
+
+    def _explorer_prises(self, indice, pion, lignes_promotion, vides, adverses, chemin, prises, promotion, coups):
+        """
+        Parcours en profondeur des prises possibles depuis la case "indice". Les bitboards "vides" et "adverses"
+        reflètent l'état du damier après les sauts déjà faits; le damier lui-même n'est pas modifié. Les sauts
+        possibles de chaque case sont lus dans SAUTS.
+        """
+        bit = BITS[indice]
+        prolongee = False
+        for bit_diagonale, diagonale, bit_saut, indice_saut, saut in SAUTS[indice]:
+            if not (bit_diagonale & adverses and bit_saut & vides):
+                continue
+
+            prolongee = True
+            promue = pion and (bit_saut & lignes_promotion) != 0
+            chemin.append(saut)
+            prises.append(diagonale)
+            self._explorer_prises(indice_saut, pion and not promue, lignes_promotion,
+                                  (vides | bit | bit_diagonale) & ~bit_saut, adverses & ~bit_diagonale, chemin, prises,
+                                  promotion or promue, coups)
+            chemin.pop()
+            prises.pop()
+
+        if not prolongee and len(chemin) > 1:
+            coups.append(Coup(tuple(chemin), tuple(prises), promotion))
+
+    def jouer_coup(self, coup, annulable=True):
+        """
+        Joue un coup complet que l'on sait valide, un saut à la fois avec la méthode jouer.
+
+        :param coup: Le coup à jouer.
+        :type coup: Coup.
+        :param annulable: False si le coup ne sera pas annulé (voir jouer).
+        """
+        chemin = coup.chemin
+        for i in range(len(chemin) - 1):
+            self.jouer(chemin[i], chemin[i + 1], annulable)
+
+    def annuler_coup(self, coup):
+        """
+        Annule un coup complet joué avec la méthode jouer_coup.
+
+        :param coup: Le dernier coup joué.
+        :type coup: Coup.
+        """
+        for _ in range(len(coup.chemin) - 1):
+            self.annuler()
+
+    def convertir_en_chaine(self):
+        """
+        Retourne une chaîne de caractères où chaque case est écrite sur une ligne distincte, dans le même format que
+        Damier.convertir_en_chaine:
+        ligne,colonne,couleur,type
+
+        :return: La chaîne de caractères.
+        """
+        return "".join("{},{},{},{}\n".format(POSITIONS[indice][0], POSITIONS[indice][1], piece.couleur,
+                                              piece.type_de_piece)
+                       for indice, piece in enumerate(self._pieces) if piece is not None)
+
+    def _vider(self):
+        """
+        Retire toutes les pièces du damier.
+        """
+        self.bitboards = [0, 0, 0, 0]
+        self._pieces = [None] * len(POSITIONS)
+        self._cases = None
+        self.pile_annulation.clear()
+        self.hash = 0
+        self.nombre_pieces = [0, 0, 0, 0]
+        self.score_positionnel = 0
+
+    def compter_pieces(self, couleur, type_de_piece=None):
+        """
+        Retourne le nombre de pièces d'une couleur sur le damier, comme Damier.compter_pieces.
+
+        :param couleur: La couleur ("blanc", "noir").
+        :type couleur: string.
+        :param type_de_piece: Le type de pièces à compter ("pion", "dame"), ou None pour toutes les pièces.
+        :type type_de_piece: string.
+        :return: Le nombre de pièces.
+        """
+        code = 0 if couleur == "blanc" else 2
+        if type_de_piece is None:
+            return self.nombre_pieces[code] + self.nombre_pieces[code + 1]
+        return self.nombre_pieces[code + (type_de_piece == "dame")]
+
+    def hash_position(self, couleur_joueur, position_source_forcee=None):
+        """
+        Retourne le hash de Zobrist de la position, comme Damier.hash_position.
+
+        :param couleur_joueur: La couleur du joueur qui a le trait.
+        :type couleur_joueur: string.
+        :param position_source_forcee: La position avec laquelle le joueur doit jouer, ou None.
+        :type position_source_forcee: Tuple (ligne, colonne).
+        :return: Le hash, un entier de 64 bits.
+        """
+        return self.hash ^ cle_trait(couleur_joueur, position_source_forcee)
+
+    def charger_dune_chaine(self, chaine):
+        """
+        Remplit le damier à partir d'une chaîne de caractères comportant l'information d'une pièce sur chaque ligne.
+        Chaque ligne contient l'information suivante :
+        ligne,colonne,couleur,type
+
+        :param chaine: La chaîne de caractères.
+        :type chaine: string
+        :raise ProblemeChargement: Exception lancée si un problème survient lors du chargement, notamment si une
+                                   pièce est placée sur une case qui n'est pas jouable ou sur une case déjà occupée.
+        """
+        self.charger_pieces(pieces_dune_chaine(chaine))
+
+    def charger_pieces(self, pieces):
+        """
+        Remplit le damier avec des pièces (voir Damier.charger_pieces).
+
+        :param pieces: Les pièces, sous forme de tuples (position, piece).
+        :type pieces: itérable de tuples ((ligne, colonne), Piece).
+        :raise ProblemeChargement: Exception lancée si un problème survient lors du chargement, notamment si une
+                                   pièce est placée sur une case qui n'est pas jouable ou sur une case déjà occupée.
+        """
+        try:
+            self._vider()
+            for position, piece in pieces:
+                indice = INDICES[position]
+                if self._pieces[indice] is not None:
+                    raise ValueError("Deux pièces sur la case {}".format(position))
+                self._poser(indice, piece)
+        except:
+            raise ProblemeChargement("Problème lors du chargement.")
+
+    def initialiser_damier_par_default(self):
+        """
+        Initialise un damier de base avec la position initiale des pièces.
+        """
+        self._vider()
+        for indice in range(12):
+            self._poser(indice, Piece("noir", "pion"))
+        for indice in range(20, 32):
+            self._poser(indice, Piece("blanc", "pion"))
+
+    def __repr__(self):
+        """
+        Cette méthode spéciale permet de modifier le comportement d'une instance de la classe DamierBitboard pour
+        l'affichage. Faire un print(un_damier) affichera le damier à l'écran.
+        """
+        s = " +-0-+-1-+-2-+-3-+-4-+-5-+-6-+-7-+\n"
+        for i in range(0, 8):
+            s += str(i)+"| "
+            for j in range(0, 8):
+                piece = self.get_piece((i, j))
+                if piece is not None:
+                    s += str(piece)+" | "
+                else:
+                    s += "  | "
+            s += "\n +---+---+---+---+---+---+---+---+\n"
+
+        return s
@@ -0,0 +1,63 @@
+#! /usr/bin/env python
+# -*- coding:Utf-8 -*-
+__author__ = "Jean-Francis Roy"
+from dames.coup import numero_case
+
+# NumPy n'est nécessaire que pour encoder plusieurs positions à la fois (encoder_lot).
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Une position est encodée en 32 entiers signés de 8 bits, un par case jouable (voir dames.coup.numero_case): le signe
+# donne la couleur (positif pour les blancs) et la valeur absolue le type de pièce.
+VIDE = 0
+PION_BLANC = 1
+DAME_BLANCHE = 2
+PION_NOIR = -1
+DAME_NOIRE = -2
+
+NOMBRE_CASES = 32
+
+
+def valeur_piece(piece):
+    """
+    Retourne le code d'une pièce (PION_BLANC, DAME_BLANCHE, PION_NOIR ou DAME_NOIRE).
+
+    :param piece: La pièce.
+    :type piece: Piece.
+    """
+    valeur = DAME_BLANCHE if piece.est_dame() else PION_BLANC
+    return valeur if piece.est_blanc() else -valeur
+
+
+def encoder(damier):
+    """
+    Encode le contenu d'un damier (Damier ou DamierBitboard).
+
+    :param damier: Le damier.
+    :return: Une liste de NOMBRE_CASES codes, dans l'ordre des numéros de cases.
+    """
+    valeurs = [VIDE] * NOMBRE_CASES
+    for position, piece in damier.cases.items():
+        valeurs[numero_case(position)] = valeur_piece(piece)
+    return valeurs
+
+
+def encoder_lot(damiers):
+    """
+    Encode plusieurs damiers dans un seul tableau NumPy, une ligne par damier.
+
+    :param damiers: Les damiers.
+    :type damiers: itérable de Damier.
+    :return: Un tableau numpy.int8 de forme (nombre de damiers, NOMBRE_CASES).
+    :raise ImportError: Si NumPy n'est pas installé.
+    """
+    if numpy is None:
+        raise ImportError("NumPy est nécessaire pour encoder des positions en lot.")
+
+    # Les codes sont accumulés en octets (complément à deux), puis interprétés d'un coup en int8.
+    octets = bytearray()
+    for damier in damiers:
+        octets.extend(valeur & 0xFF for valeur in encoder(damier))
+    return numpy.frombuffer(bytes(octets), dtype=numpy.int8).reshape(-1, NOMBRE_CASES)
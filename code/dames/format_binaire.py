@@ -0,0 +1,117 @@
+#! /usr/bin/env python
+# -*- coding:Utf-8 -*-
+__author__ = "Jean-Francis Roy"
+import struct
+from dames.coup import Coup, numero_case, position_case, prises_du_chemin
+from dames.piece import Piece
+
+# Format binaire d'une partie sauvegardée:
+# - un en-tête fixe: l'identifiant IDENTIFIANT, la version, un octet de drapeaux (trait aux noirs, prise
+#   obligatoire), le numéro de la case source forcée (CASE_AUCUNE s'il n'y en a pas), puis le damier sous forme de
+#   trois masques de 32 bits (cases occupées, pièces noires, dames), le bit i représentant la case numéro i (voir
+#   numero_case);
+# - l'historique: le nombre de coups joués (Partie.coups), puis chaque coup: un octet contenant la longueur du chemin
+#   (et le bit _PROMOTION si la pièce est promue), suivi du numéro de chaque case du chemin;
+# - la longueur en octets du texte libre de Partie.historique, puis ce texte encodé en UTF-8.
+IDENTIFIANT = b"DAMB"
+VERSION = 1
+CASE_AUCUNE = 0xFF
+
+_EN_TETE = struct.Struct("<4sBBBIII")
+_LONGUEUR = struct.Struct("<I")
+_TRAIT_NOIR = 0x01
+_DOIT_PRENDRE = 0x02
+_PROMOTION = 0x80
+
+
+def est_binaire(debut):
+    """
+    Indique si un fichier est au format binaire, d'après ses premiers octets.
+
+    :param debut: Les premiers octets du fichier (au moins len(IDENTIFIANT)).
+    :type debut: bytes.
+    """
+    return debut[:len(IDENTIFIANT)] == IDENTIFIANT
+
+
+def ecrire_partie(partie, avec_historique=True):
+    """
+    Retourne le contenu binaire d'une partie.
+
+    :param partie: La partie à écrire.
+    :param avec_historique: False pour n'écrire que la position, sans les coups joués ni Partie.historique.
+    :type avec_historique: bool.
+    :return: Les octets de la partie.
+    :rtype: bytes.
+    """
+    occupation = noires = dames = 0
+    for position, piece in partie.damier.cases.items():
+        bit = 1 << numero_case(position)
+        occupation |= bit
+        if piece.est_noir():
+            noires |= bit
+        if piece.est_dame():
+            dames |= bit
+
+    drapeaux = (_TRAIT_NOIR if partie.couleur_joueur_courant == "noir" else 0) | \
+               (_DOIT_PRENDRE if partie.doit_prendre else 0)
+    case_forcee = CASE_AUCUNE if partie.position_source_forcee is None else \
+        numero_case(partie.position_source_forcee)
+
+    coups = partie.coups if avec_historique else []
+    morceaux = [_EN_TETE.pack(IDENTIFIANT, VERSION, drapeaux, case_forcee, occupation, noires, dames),
+                _LONGUEUR.pack(len(coups))]
+    for coup in coups:
+        morceaux.append(bytes([len(coup.chemin) | (_PROMOTION if coup.promotion else 0)]))
+        morceaux.append(bytes(numero_case(position) for position in coup.chemin))
+
+    texte = partie.historique.encode("utf-8") if avec_historique else b""
+    morceaux.append(_LONGUEUR.pack(len(texte)))
+    morceaux.append(texte)
+    return b"".join(morceaux)
+
+
+def lire_partie(partie, donnees):
+    """
+    Charge dans une partie le contenu binaire écrit par ecrire_partie.
+
+    :param partie: La partie à remplir (son damier, son joueur courant, sa prise forcée, ses coups et son historique
+                   sont remplacés).
+    :param donnees: Les octets de la partie.
+    :type donnees: bytes.
+    :return: True si la partie contient un historique, False autrement.
+    :raise ValueError: Si les données ne sont pas une partie au format binaire.
+    """
+    identifiant, version, drapeaux, case_forcee, occupation, noires, dames = _EN_TETE.unpack_from(donnees, 0)
+    if identifiant != IDENTIFIANT or version != VERSION:
+        raise ValueError("Format de partie inconnu.")
+
+    pieces = []
+    for numero in range(32):
+        bit = 1 << numero
+        if occupation & bit:
+            pieces.append((position_case(numero), Piece("noir" if noires & bit else "blanc",
+                                                        "dame" if dames & bit else "pion")))
+
+    decalage = _EN_TETE.size
+    nombre_coups, = _LONGUEUR.unpack_from(donnees, decalage)
+    decalage += _LONGUEUR.size
+    coups = []
+    for _ in range(nombre_coups):
+        longueur = donnees[decalage] & ~_PROMOTION
+        chemin = tuple(position_case(numero) for numero in donnees[decalage + 1:decalage + 1 + longueur])
+        coups.append(Coup(chemin, prises_du_chemin(chemin), bool(donnees[decalage] & _PROMOTION)))
+        decalage += 1 + longueur
+
+    longueur_historique, = _LONGUEUR.unpack_from(donnees, decalage)
+    decalage += _LONGUEUR.size
+    historique = donnees[decalage:decalage + longueur_historique].decode("utf-8")
+
+    partie.damier.charger_pieces(pieces)
+    partie.couleur_joueur_courant = "noir" if drapeaux & _TRAIT_NOIR else "blanc"
+    partie.doit_prendre = bool(drapeaux & _DOIT_PRENDRE)
+    partie.position_source_forcee = None if case_forcee == CASE_AUCUNE else position_case(case_forcee)
+    partie.coups = coups
+    partie.coup_en_cours = None
+    partie.historique = historique
+    return len(coups) > 0 or historique != ""
@@ -0,0 +1,159 @@
+#! /usr/bin/env python
+# -*- coding:Utf-8 -*-
+__author__ = "Jean-Francis Roy"
+from dames.coup import position_case
+from dames.encodage import encoder, NOMBRE_CASES, PION_BLANC, DAME_BLANCHE, PION_NOIR, DAME_NOIRE
+
+# NumPy n'est nécessaire que pour utiliser LotPositions (voir dames.encodage).
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Les quatre directions, dans l'ordre de leur numéro: les deux vers le haut (celles des pions blancs), puis les deux
+# vers le bas (celles des pions noirs).
+DIRECTIONS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+
+AUCUNE_CASE = -1
+
+
+def _destinations(distance):
+    # Pour chaque direction, le numéro de la case à cette distance de chaque case, ou NOMBRE_CASES hors du damier.
+    destinations = numpy.full((NOMBRE_CASES, len(DIRECTIONS)), NOMBRE_CASES)
+    for numero in range(NOMBRE_CASES):
+        ligne, colonne = position_case(numero)
+        for direction, (delta_ligne, delta_colonne) in enumerate(DIRECTIONS):
+            ligne_cible, colonne_cible = ligne + distance * delta_ligne, colonne + distance * delta_colonne
+            if 0 <= ligne_cible <= 7 and 0 <= colonne_cible <= 7:
+                destinations[numero, direction] = ligne_cible * 4 + colonne_cible // 2
+    return destinations
+
+
+# VOISINES[case, direction] est la case diagonale voisine, SAUTS[case, direction] la case d'arrivée d'une prise.
+if numpy is not None:
+    VOISINES = _destinations(1)
+    SAUTS = _destinations(2)
+
+
+def _completer(cases):
+    # Ajoute une colonne fausse, pour la case NOMBRE_CASES qui représente l'extérieur du damier.
+    return numpy.concatenate((cases, numpy.zeros((len(cases), 1), dtype=bool)), axis=1)
+
+
+class LotPositions:
+    """
+    Plusieurs positions (une par partie) dont on calcule les déplacements d'un coup, avec des opérations sur des
+    tableaux NumPy plutôt qu'une boucle Python par damier. Les résultats sont les mêmes que ceux de
+    Damier.lister_deplacements_possibles_a_partir_de_position, pour le joueur qui a le trait dans chaque position.
+
+    Un déplacement est repéré par sa case source (numéro de 0 à 31, voir dames.coup.numero_case) et sa direction
+    (indice dans DIRECTIONS): les tableaux de déplacements sont de forme (nombre de positions, NOMBRE_CASES,
+    len(DIRECTIONS)). La case cible est VOISINES[source, direction] pour un déplacement simple et
+    SAUTS[source, direction] pour une prise.
+    """
+
+    def __init__(self, positions, couleurs, cases_forcees=None):
+        """
+        :param positions: Les positions encodées (voir dames.encodage).
+        :type positions: tableau de forme (nombre de positions, NOMBRE_CASES).
+        :param couleurs: La couleur du joueur qui a le trait dans chaque position, ou une seule couleur pour toutes.
+        :type couleurs: string ou liste de strings.
+        :param cases_forcees: Pour chaque position, le numéro de la case avec laquelle le joueur doit continuer une
+                              prise, ou AUCUNE_CASE (voir Partie.position_source_forcee). None si aucune case n'est
+                              forcée.
+        :raise ImportError: Si NumPy n'est pas installé.
+        """
+        if numpy is None:
+            raise ImportError("NumPy est nécessaire pour calculer les déplacements de positions en lot.")
+        self.positions = numpy.asarray(positions, dtype=numpy.int8).reshape(-1, NOMBRE_CASES)
+        nombre = len(self.positions)
+        self.trait_blanc = numpy.broadcast_to(numpy.asarray(couleurs) == "blanc", (nombre,))
+
+        blancs = (self.positions == PION_BLANC) | (self.positions == DAME_BLANCHE)
+        noirs = (self.positions == PION_NOIR) | (self.positions == DAME_NOIRE)
+        trait_blanc = self.trait_blanc[:, None]
+        self.amies = numpy.where(trait_blanc, blancs, noirs)
+        self.adverses = _completer(numpy.where(trait_blanc, noirs, blancs))
+        self.vides = _completer(self.positions == 0)
+        self.dames_amies = numpy.where(trait_blanc, self.positions == DAME_BLANCHE, self.positions == DAME_NOIRE)
+
+        if cases_forcees is not None:
+            cases_forcees = numpy.broadcast_to(numpy.asarray(cases_forcees), (nombre,))
+            forcees = cases_forcees[:, None] == numpy.arange(NOMBRE_CASES)
+            forcees |= (cases_forcees == AUCUNE_CASE)[:, None]
+            self.amies &= forcees
+            self.dames_amies &= forcees
+
+    @classmethod
+    def depuis_damiers(cls, damiers, couleurs):
+        """
+        Crée un lot à partir de damiers (Damier ou DamierBitboard).
+
+        :param damiers: Les damiers.
+        :param couleurs: La couleur du joueur qui a le trait sur chaque damier, ou une seule couleur pour tous.
+        """
+        return cls([encoder(damier) for damier in damiers], couleurs)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def deplacements_simples(self, selection=slice(None)):
+        """
+        Retourne les déplacements sans prise: vers une case diagonale vide, vers l'avant pour un pion.
+
+        :param selection: Les positions du lot à considérer (un indice, une tranche ou un tableau d'indices).
+        :return: Un tableau booléen de forme (nombre de positions, NOMBRE_CASES, len(DIRECTIONS)).
+        """
+        # Les pions blancs avancent vers le haut (directions 0 et 1), les pions noirs vers le bas (2 et 3).
+        vers_le_haut = numpy.arange(len(DIRECTIONS)) < 2
+        avance = self.trait_blanc[selection, None] == vers_le_haut
+        pieces = self.dames_amies[selection, :, None] | (self.amies[selection, :, None] & avance[..., None, :])
+        return pieces & self.vides[selection][..., VOISINES]
+
+    def prises(self, selection=slice(None)):
+        """
+        Retourne les prises: par-dessus une pièce adverse voisine, vers une case vide, dans toutes les directions.
+
+        :param selection: Les positions du lot à considérer (voir deplacements_simples).
+        :return: Un tableau booléen de forme (nombre de positions, NOMBRE_CASES, len(DIRECTIONS)).
+        """
+        return self.amies[selection, :, None] & self.adverses[selection][..., VOISINES] & \
+            self.vides[selection][..., SAUTS]
+
+    def doit_prendre(self, prises=None):
+        """
+        Retourne, pour chaque position, si le joueur doit faire une prise.
+
+        :param prises: Le résultat de prises(), s'il est déjà calculé.
+        :return: Un tableau booléen d'une valeur par position.
+        """
+        prises = self.prises() if prises is None else prises
+        return prises.any(axis=(1, 2))
+
+    def deplacements_legaux(self):
+        """
+        Retourne les déplacements permis en respectant la prise obligatoire: les prises dans les positions où il y en
+        a, les déplacements simples dans les autres.
+
+        :return: Un tuple (deplacements, doit_prendre): le tableau booléen des déplacements permis, et le tableau
+                 booléen indiquant les positions où ce sont des prises.
+        """
+        prises = self.prises()
+        doit_prendre = self.doit_prendre(prises)
+        return numpy.where(doit_prendre[:, None, None], prises, self.deplacements_simples()), doit_prendre
+
+    def lister_deplacements(self, numero):
+        """
+        Retourne les déplacements permis dans une position du lot, sous forme de positions (ligne, colonne).
+
+        :param numero: L'indice de la position dans le lot.
+        :type numero: int.
+        :return: Une liste de tuples (position source, position cible).
+        """
+        prises = self.prises(numero)
+        if prises.any():
+            deplacements, cibles = prises, SAUTS
+        else:
+            deplacements, cibles = self.deplacements_simples(numero), VOISINES
+        return [(position_case(int(source)), position_case(int(cibles[source, direction])))
+                for source, direction in zip(*numpy.nonzero(deplacements))]
@@ -1,26 +1,58 @@
 #! /usr/bin/env python
 # -*- coding:Utf-8 -*-
 __author__ = "Jean-Francis Roy"
+from dames.coup import Coup, prises_du_chemin
 from dames.damier import Damier
+from dames.pdn import texte_coups, lire_texte_coups, trouver_coup
+from dames.format_binaire import est_binaire, ecrire_partie, lire_partie
 from dames.exceptions import PositionSourceInvalide, PositionCibleInvalide, ProblemeChargement, ProblemeSauvegarde
 
 
 class Partie:
-    def __init__(self):
+    def __init__(self, damier=None):
         """
         Méthode d'initialisation d'une partie. On initialise 4 membres:
-        - damier: contient le damier de la partie, celui-ci contenant le dictionnaire de pièces.
+        - damier: contient le damier de la partie, celui-ci contenant le dictionnaire de pièces. Un damier peut être
+          fourni en paramètre (par exemple un DamierBitboard); sinon, un Damier par défaut est créé.
         - couleur_joueur_courant: le joueur à qui c'est le tour de jouer.
         - doit_prendre: un booléen représentant si le joueur actif doit absoluement effectuer une prise de pièce.
         - position_source_forcee: Une position avec laquelle le joueur actif doit absoluement jouer. Le seul moment
           où cette position est utilisée est après une prise: si le joueur peut encore prendre d'autres pièces adverses,
           il doit absolument le faire. Ce membre contient None si aucune position n'est forcée.
         """
-        self.damier = Damier()
+        self.damier = damier if damier is not None else Damier()
         self.couleur_joueur_courant = "blanc"
         self.doit_prendre = False
         self.position_source_forcee = None
-        self.historique = "" #Permet de récupérer l,historique des coups joués.
+        self.historique = "" #Texte libre de l'historique d'une ancienne sauvegarde, qui ne peut pas être relu en coups.
+        self.coups = [] # Historique: les coups complets (instances de Coup) joués, dans l'ordre.
+        self.coup_en_cours = None # Partie déjà jouée (avec deplacer) d'un tour qui n'est pas terminé, ou None.
+        self.observateurs = [] # Fonctions averties de chaque déplacement joué (voir ajouter_observateur).
+
+        # Déplacements permis dans la position courante (voir deplacements_permis), calculés une seule fois par
+        # position: un tuple (hash de la position, deplacements, doit prendre, coups complets ou None), ou None.
+        self._cache_deplacements = None
+
+    def ajouter_observateur(self, observateur):
+        """
+        Ajoute une fonction appelée après chaque déplacement joué avec deplacer ou jouer_coup. Elle reçoit un Coup
+        qui ne décrit que ce qui a changé sur le damier: la pièce passée de coup.source à coup.cible, les pièces
+        prises (coup.prises) retirées et, si coup.promotion est vrai, la promotion de la pièce jouée. Elle reçoit
+        None après nouvelle_partie et charger (même si le chargement échoue): tout le damier a pu changer.
+
+        :param observateur: La fonction, qui prend un Coup ou None en paramètre.
+        """
+        self.observateurs.append(observateur)
+
+    def retirer_observateur(self, observateur):
+        """
+        Retire une fonction ajoutée avec ajouter_observateur.
+        """
+        self.observateurs.remove(observateur)
+
+    def _notifier(self, coup):
+        for observateur in self.observateurs:
+            observateur(coup)
 
     def valider_position_source(self, position_source):
         """
@@ -31,24 +63,19 @@ class Partie:
         - Si le joueur doit absoluement continuer son mouvement avec une prise supplémentaire, a-t-il choisi la
           bonne pièce?
 
-        ATTENTION: Utilisez self.couleur_joueur_courant, self.doit_prendre et self.position_source_forcee pour
-                   connaître les informations nécessaires.
-        ATTENTION: Bien que cette méthode valide plusieurs choses, les méthodes programmées dans le damier vous
-                   simplifieront la tâche!
+        Les déplacements permis sont lus dans le cache de deplacements_permis.
 
         :param position_source: La position source à valider.
         :return: Cette méthode ne retourne rien.
         :raise PositionSourceInvalide: Exception lancée si la position source est invalide.
         """
-        if self.doit_prendre:
-            if len(self.damier.lister_deplacements_possibles_a_partir_de_position(position_source, True)) == 0:
-                raise PositionSourceInvalide("Position source invalide:\ncette pièce ne peut\npas faire de prise.")
-
+        deplacements, doit_prendre = self._deplacements_permis()[1:3]
+        if doit_prendre and position_source not in deplacements:
             if self.position_source_forcee is not None:
-                if not (self.position_source_forcee == position_source):
-                    raise PositionSourceInvalide("Position source invalide:\nvous devez faire\nune prise avec la pièce " +
-                                                 "en ({},{}).".format(self.position_source_forcee[0],
-                                                                      self.position_source_forcee[1]))
+                raise PositionSourceInvalide("Position source invalide:\nvous devez faire\nune prise avec la pièce " +
+                                             "en ({},{}).".format(self.position_source_forcee[0],
+                                                                  self.position_source_forcee[1]))
+            raise PositionSourceInvalide("Position source invalide:\ncette pièce ne peut\npas faire de prise.")
 
         piece_source = self.damier.get_piece(position_source)
         if piece_source is None:
@@ -65,8 +92,7 @@ class Partie:
         :return: Cette méthode ne retourne rien.
         :raise PositionCibleInvalide: Exception lancée si la position cible est invalide.
         """
-        if position_cible not in self.damier.lister_deplacements_possibles_a_partir_de_position(position_source,
-                                                                                                self.doit_prendre):
+        if position_cible not in self.deplacements_possibles(position_source):
             raise PositionCibleInvalide("Position cible invalide.")
 
     def passer_au_joueur_suivant(self):
@@ -84,22 +110,178 @@ class Partie:
 
         :return: True si le joueur courant peut faire une prise, False autrement.
         """
-        return self.damier.joueur_peut_prendre_une_piece_adverse(self.couleur_joueur_courant)
+        return self._deplacements_permis()[2]
+
+    def _deplacements_permis(self):
+        # Le cache est associé au hash de la position: il est recalculé après un déplacement, un chargement, ou
+        # toute autre modification du damier ou du joueur courant. Les déplacements d'un seul saut sont les premiers
+        # sauts des coups complets du damier, pour que l'interface et l'AI partagent la même liste de coups.
+        position_forcee = self.position_source_forcee if self.doit_prendre else None
+        cle = self.damier.hash_position(self.couleur_joueur_courant, position_forcee)
+        if self._cache_deplacements is None or self._cache_deplacements[0] != cle:
+            coups = self.damier.lister_coups(self.couleur_joueur_courant, position_forcee)
+            deplacements = {}
+            for coup in coups:
+                cibles = deplacements.setdefault(coup.chemin[0], [])
+                if coup.chemin[1] not in cibles:
+                    cibles.append(coup.chemin[1])
+            doit_prendre = position_forcee is not None or any(coup.prises for coup in coups)
+            self._cache_deplacements = (cle, deplacements, doit_prendre, coups)
+        return self._cache_deplacements
+
+    def deplacements_permis(self):
+        """
+        Retourne les déplacements (un seul saut) permis au joueur courant, en respectant la prise obligatoire et la
+        position source forcée. Ils ne sont calculés qu'une fois par position.
+
+        :return: Un dictionnaire dont les clés sont les positions sources et les valeurs, les listes de positions
+                 cibles. Il ne doit pas être modifié.
+        """
+        return self._deplacements_permis()[1]
 
-    def sauvegarder(self, nom_fichier,historique):
+    def deplacements_possibles(self, position_source):
+        """
+        Retourne les positions cibles permises au joueur courant à partir d'une position source (voir
+        deplacements_permis).
+
+        :param position_source: La position source.
+        :type position_source: Tuple (ligne, colonne).
+        :return: La liste des positions cibles, vide si la pièce ne peut pas jouer.
+        """
+        return self._deplacements_permis()[1].get(position_source, [])
+
+    def lister_coups(self):
+        """
+        Retourne la liste des coups complets permis au joueur courant, en respectant la prise obligatoire et la
+        position source forcée. Ils ne sont calculés qu'une fois par position.
+
+        :return: Une liste d'instances de Coup.
+        """
+        return list(self._deplacements_permis()[3])
+
+    def jouer_coup(self, coup):
+        """
+        Joue un coup complet (obtenu avec lister_coups) pour le joueur courant, puis passe au joueur suivant.
+
+        :param coup: Le coup à jouer.
+        :type coup: Coup.
+        """
+        self.damier.jouer_coup(coup, annulable=False)
+        self._terminer_tour(coup)
+        self._notifier(coup)
+
+    def deplacer(self, position_source, position_cible):
+        """
+        Joue un seul déplacement (un saut d'une prise multiple, par exemple) pour le joueur courant. Si la pièce a
+        fait une prise et peut en faire une autre, le joueur doit continuer avec elle: doit_prendre et
+        position_source_forcee sont mis à jour et le tour n'est pas terminé. Sinon, le tour complet est ajouté à
+        l'historique et on passe au joueur suivant.
+
+        :param position_source: La position source du déplacement.
+        :type position_source: Tuple (ligne, colonne).
+        :param position_cible: La position cible du déplacement.
+        :type position_cible: Tuple (ligne, colonne).
+        :return: Le coup complet si le tour est terminé, None si le joueur doit continuer sa prise.
+        :raise PositionSourceInvalide: Exception lancée si la position source est invalide.
+        :raise PositionCibleInvalide: Exception lancée si la position cible est invalide.
+        """
+        if not self.doit_prendre:
+            self.doit_prendre = self.joueur_courant_peut_prendre_piece_adverse()
+        self.valider_position_source(position_source)
+        self.valider_position_cible(position_source, position_cible)
+
+        etait_pion = self.damier.get_piece(position_source).est_pion()
+        prise = self.damier.deplacer(position_source, position_cible)
+        promotion = etait_pion and self.damier.get_piece(position_cible).est_dame()
+
+        if self.coup_en_cours is None:
+            self.coup_en_cours = Coup((position_source,))
+        chemin = self.coup_en_cours.chemin + (position_cible,)
+        coup = Coup(chemin, prises_du_chemin(chemin), self.coup_en_cours.promotion or promotion)
+        saut = (position_source, position_cible)
+        deplacement = Coup(saut, prises_du_chemin(saut), promotion)
+
+        if prise and self.damier.position_peut_prendre_une_piece_adverse(position_cible):
+            self.coup_en_cours = coup
+            self.doit_prendre = True
+            self.position_source_forcee = position_cible
+            self._notifier(deplacement)
+            return None
+
+        self._terminer_tour(coup)
+        self._notifier(deplacement)
+        return coup
+
+    def _terminer_tour(self, coup):
+        self.coups.append(coup)
+        self.coup_en_cours = None
+        self.doit_prendre = False
+        self.position_source_forcee = None
+        self.passer_au_joueur_suivant()
+
+    def texte_historique(self):
+        """
+        Retourne l'historique en texte: le texte libre d'une ancienne sauvegarde, s'il y en a un, suivi des coups
+        joués en notation PDN (voir dames.pdn).
+        """
+        # Les coups alternent entre les joueurs: on retrouve la couleur du premier à partir du joueur courant.
+        if (len(self.coups) % 2 == 0) == (self.couleur_joueur_courant == "blanc"):
+            premier_trait = "blanc"
+        else:
+            premier_trait = "noir"
+        return self.historique + texte_coups(self.coups, premier_trait)
+
+    def copier(self):
+        """
+        Retourne une copie de la position de la partie (damier du même type, joueur courant, prise forcée), sans
+        historique ni observateurs. Jouer dans la copie ne modifie pas la partie.
+
+        :return: La copie.
+        :rtype: Partie.
+        """
+        copie = Partie(type(self.damier)(self.damier.table_positionnelle))
+        copie.damier.charger_pieces(self.damier.cases.items())
+        copie.couleur_joueur_courant = self.couleur_joueur_courant
+        copie.doit_prendre = self.doit_prendre
+        copie.position_source_forcee = self.position_source_forcee
+        copie.coup_en_cours = self.coup_en_cours
+        return copie
+
+    def hash_position(self):
+        """
+        Retourne le hash de Zobrist de la position courante, qui tient compte du joueur courant et de la position
+        source forcée.
+
+        :return: Le hash, un entier de 64 bits.
+        """
+        return self.damier.hash_position(self.couleur_joueur_courant, self.position_source_forcee)
+
+    def sauvegarder(self, nom_fichier, avec_historique=False, binaire=False):
         """
         Sauvegarde une partie dans un fichier. Le fichier condiendra:
         - Une ligne indiquant la couleur du joueur courant.
         - Une ligne contenant True ou False, si le joueur courant doit absolument effectuer une prise à son tour.
         - Une ligne contenant None si self.position_source_forcee est à None, et la position ligne,colonne autrement.
         - Le reste des lignes correspondent au damier. Voir la méthode convertir_en_chaine du damier pour le format.
+        - Si l'historique est sauvegardé, une ligne contenant #, suivie de l'historique (voir texte_historique).
+
+        En format binaire (voir dames.format_binaire), le fichier contient plutôt un en-tête fixe, le damier sur
+        quelques octets et la liste des coups joués (self.coups).
 
         :param nom_fichier: Le nom du fichier où sauvegarder.
         :type nom_fichier: string.
-        :param historique : Contient la liste des coups joués.
+        :param avec_historique: True pour sauvegarder aussi l'historique des coups joués.
+        :type avec_historique: bool.
+        :param binaire: True pour sauvegarder en format binaire.
+        :type binaire: bool.
         """
         try:
-            with open(nom_fichier, "w") as f:
+            if binaire:
+                with open(nom_fichier, "wb") as f:
+                    f.write(ecrire_partie(self, avec_historique))
+                return
+
+            with open(nom_fichier, "w", encoding="utf-8") as f:
                 f.write("{}\n".format(self.couleur_joueur_courant))
                 f.write("{}\n".format(self.doit_prendre))
                 if self.position_source_forcee is not None:
@@ -107,53 +289,79 @@ class Partie:
                 else:
                     f.write("None\n")
                 f.writelines(self.damier.convertir_en_chaine())
-                if historique!="": #Controle si le joueur veut sauvegarder l'historique
+                if avec_historique: #Controle si le joueur veut sauvegarder l'historique
                     f.write("#\n") # début de la section de l'historique
-                    f.write("{}\n".format(historique))
+                    f.write(self.texte_historique())
         except:
             raise ProblemeSauvegarde("Problème lors de la sauvegarde.")
 
     def charger(self, nom_fichier):
         """
-        Charge une partie dans à partir d'un fichier. Le fichier a le même format que la méthode de sauvegarde.
+        Charge une partie dans à partir d'un fichier. Le fichier a le même format que la méthode de sauvegarde; le
+        format binaire est reconnu à ses premiers octets.
 
         :param nom_fichier: Le nom du fichier à charger.
         :type nom_fichier: string.
+        :return: True si le fichier contient un historique, False autrement.
         """
-        avecHistorique = False
         try:
-            with open(nom_fichier) as f:
-                self.couleur_joueur_courant = f.readline().rstrip("\n")
-                doit_prendre_string = f.readline().rstrip("\n")
-                if doit_prendre_string == "True":
-                    self.doit_prendre = True
-                else:
-                    self.doit_prendre = False
+            with open(nom_fichier, "rb") as f:
+                donnees = f.read()
+            if est_binaire(donnees):
+                return lire_partie(self, donnees)
 
-                position_string = f.readline().rstrip("\n")
-                if position_string == "None":
-                    self.position_source_forcee = None
-                else:
-                    ligne_string, colonne_string = position_string.split(",")
-                    self.position_source_forcee = (int(ligne_string), int(colonne_string))
-                chaine = ""
-                while 1:
-                    ligne=f.readline().rstrip("\n")#Lecture de la ligne suivante du fichier
-                    if ligne=='':
-                        break
-                    elif ligne=="#": # Début de la section historique
-                        reste=f.read() # Lire la fin du ficher qui contient l'historique
-                        self.historique = reste
-                        avecHistorique = True
-                        break
-                    elif ligne!="": #Détection de la non fin du fichier
-                        chaine= chaine + ligne + "\n"
-                    else:
-                        break
-            self.damier.charger_dune_chaine(chaine)
+            # Les sauvegardes en texte sont en UTF-8; les fins de ligne de Windows sont acceptées.
+            texte = donnees.decode("utf-8")
+            lignes = texte.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+
+            avecHistorique = False
+            historique = ""
+            self.couleur_joueur_courant = lignes[0]
+            self.doit_prendre = lignes[1] == "True"
+            if lignes[2] == "None":
+                self.position_source_forcee = None
+            else:
+                ligne_string, colonne_string = lignes[2].split(",")
+                self.position_source_forcee = (int(ligne_string), int(colonne_string))
+
+            chaine = []
+            for numero, ligne in enumerate(lignes[3:], 3):
+                if ligne == "":
+                    break
+                elif ligne == "#": # Début de la section historique, qui contient la fin du fichier
+                    historique = "\n".join(lignes[numero + 1:])
+                    avecHistorique = True
+                    break
+                chaine.append(ligne + "\n")
+            self.damier.charger_dune_chaine("".join(chaine))
+
+            # L'historique est relu en coups s'il est en notation PDN; sinon (ancienne sauvegarde), il est conservé
+            # tel quel.
+            chemins = lire_texte_coups(historique)[0]
+            self.coups = self._coups_de_lhistorique(chemins)
+            self.historique = "" if chemins else historique
+            self.coup_en_cours = None
             return avecHistorique
         except:
             raise ProblemeChargement("Problème lors du chargement.")
+        finally:
+            # Un chargement qui échoue a pu modifier le damier avant l'erreur.
+            self._notifier(None)
+
+    def _coups_de_lhistorique(self, chemins):
+        # Les promotions ne sont pas écrites dans l'historique en texte: on les retrouve en rejouant les coups à
+        # partir de la position initiale, sur un damier du même type. Si l'historique ne part pas de la position
+        # initiale, les coups sont reconstruits sans promotion.
+        partie = Partie(type(self.damier)(self.damier.table_positionnelle))
+        coups = []
+        try:
+            for chemin in chemins:
+                coup = trouver_coup(partie, chemin)
+                partie.jouer_coup(coup)
+                coups.append(coup)
+        except ValueError:
+            return [Coup(chemin, prises_du_chemin(chemin)) for chemin in chemins]
+        return coups
 
     def nouvelle_partie(self):
         """
@@ -162,4 +370,8 @@ class Partie:
         self.couleur_joueur_courant = "blanc"
         self.doit_prendre = False
         self.position_source_forcee = None
+        self.historique = ""
+        self.coups = []
+        self.coup_en_cours = None
         self.damier.initialiser_damier_par_default()
+        self._notifier(None)
@@ -0,0 +1,266 @@
+#! /usr/bin/env python
+# -*- coding:Utf-8 -*-
+__author__ = "Jean-Francis Roy"
+import re
+from dames.coup import numero_case, position_case, prises_du_chemin, Coup
+from dames.piece import Piece
+
+# Notation PDN (Portable Draughts Notation): les cases jouables sont numérotées de 1 à 32, ligne par ligne à partir
+# de la ligne 0 (où commencent les noirs). Un déplacement s'écrit "22-18", une prise "26x17", et une prise multiple
+# donne chaque case d'arrivée: "26x17x10". Les résultats sont écrits du point de vue des blancs, qui jouent en
+# premier: "1-0" (victoire des blancs), "0-1" (victoire des noirs), "1/2-1/2" (nulle) ou "*" (partie non terminée).
+VICTOIRE_BLANC = "1-0"
+VICTOIRE_NOIR = "0-1"
+NULLE = "1/2-1/2"
+INCONNU = "*"
+RESULTATS = (VICTOIRE_BLANC, VICTOIRE_NOIR, NULLE, INCONNU)
+
+_COUP = re.compile(r"\d+(?:[-x]\d+)+")
+_NUMERO = re.compile(r"^\d+\.+")
+_COMMENTAIRE = re.compile(r"\{[^}]*\}")
+_ETIQUETTE = re.compile(r'^\[(\w+)\s+"(.*)"\]$')
+
+
+def notation(coup):
+    """
+    Retourne la notation d'un coup, par exemple "22-18" ou "26x17x10".
+
+    :param coup: Le coup.
+    :type coup: Coup.
+    """
+    separateur = "x" if coup.prises else "-"
+    return separateur.join(str(numero_case(position) + 1) for position in coup.chemin)
+
+
+def lire_notation(texte):
+    """
+    Retrouve le chemin d'un coup écrit en notation PDN.
+
+    :param texte: La notation, par exemple "22-18" ou "26x17x10".
+    :type texte: string.
+    :return: Le chemin, un tuple de positions (ligne, colonne).
+    :raise ValueError: Si la notation est invalide.
+    """
+    if not _COUP.fullmatch(texte):
+        raise ValueError("Coup invalide: {}".format(texte))
+    numeros = [int(numero) for numero in re.split("[-x]", texte)]
+    if not all(1 <= numero <= 32 for numero in numeros):
+        raise ValueError("Coup invalide: {}".format(texte))
+    return tuple(position_case(numero - 1) for numero in numeros)
+
+
+def texte_coups(coups, premier_trait="blanc", resultat=None):
+    """
+    Écrit une suite de coups en notation PDN, un numéro de coup par ligne: "1. 22-18 11-15".
+
+    :param coups: Les coups, dans l'ordre.
+    :type coups: liste de Coup.
+    :param premier_trait: La couleur du joueur qui a joué le premier coup.
+    :type premier_trait: string.
+    :param resultat: Le résultat à écrire à la fin, ou None.
+    :return: Le texte.
+    """
+    lignes = []
+    notations = [notation(coup) for coup in coups]
+    if premier_trait == "noir" and notations:
+        lignes.append("1... {}".format(notations[0]))
+        notations = notations[1:]
+        premier_numero = 2
+    else:
+        premier_numero = 1
+    for i in range(0, len(notations), 2):
+        lignes.append("{}. {}".format(premier_numero + i // 2, " ".join(notations[i:i + 2])))
+    if resultat is not None:
+        lignes.append(resultat)
+    return "".join(ligne + "\n" for ligne in lignes)
+
+
+def lire_texte_coups(texte):
+    """
+    Lit les coups d'un texte en notation PDN. Les numéros de coups, les commentaires entre accolades et les
+    annotations (!, ?) sont ignorés.
+
+    :param texte: Le texte des coups.
+    :type texte: string.
+    :return: Un tuple (chemins, resultat): la liste des chemins des coups, et le résultat trouvé à la fin du texte
+             (None s'il n'y en a pas).
+    """
+    chemins = []
+    resultat = None
+    for jeton in _COMMENTAIRE.sub(" ", texte).split():
+        if jeton in RESULTATS:
+            resultat = jeton
+            continue
+        jeton = _NUMERO.sub("", jeton).rstrip("!?")
+        if _COUP.fullmatch(jeton):
+            chemins.append(lire_notation(jeton))
+    return chemins, resultat
+
+
+def fen(damier, couleur):
+    """
+    Retourne la position en notation FEN de PDN, par exemple "W:W21,22,K30:B1,2,K5".
+
+    :param damier: Le damier.
+    :param couleur: La couleur du joueur qui a le trait.
+    :type couleur: string.
+    """
+    listes = {"blanc": [], "noir": []}
+    for position, piece in sorted(damier.cases.items(), key=lambda element: numero_case(element[0])):
+        listes[piece.couleur].append(("K" if piece.est_dame() else "") + str(numero_case(position) + 1))
+    return "{}:W{}:B{}".format("W" if couleur == "blanc" else "B", ",".join(listes["blanc"]),
+                               ",".join(listes["noir"]))
+
+
+def lire_fen(texte):
+    """
+    Lit une position en notation FEN de PDN. Les intervalles ("1-12") sont acceptés.
+
+    :param texte: La position, par exemple "W:W21,22,K30:B1,2,K5".
+    :type texte: string.
+    :return: Un tuple (couleur, pieces), où pieces est une liste de tuples (position, Piece) qui peut être passée
+             à Damier.charger_pieces.
+    :raise ValueError: Si la position est invalide.
+    """
+    parties = texte.strip().rstrip(".").split(":")
+    if not parties or parties[0] not in ("W", "B"):
+        raise ValueError("Position FEN invalide: {}".format(texte))
+    couleur = "blanc" if parties[0] == "W" else "noir"
+
+    pieces = []
+    for partie in parties[1:]:
+        if not partie or partie[0] not in ("W", "B"):
+            raise ValueError("Position FEN invalide: {}".format(texte))
+        couleur_piece = "blanc" if partie[0] == "W" else "noir"
+        for element in partie[1:].split(","):
+            element = element.strip()
+            if not element:
+                continue
+            type_de_piece = "dame" if element[0] == "K" else "pion"
+            debut, _, fin = element.lstrip("K").partition("-")
+            for numero in range(int(debut), int(fin or debut) + 1):
+                if not 1 <= numero <= 32:
+                    raise ValueError("Position FEN invalide: {}".format(texte))
+                pieces.append((position_case(numero - 1), Piece(couleur_piece, type_de_piece)))
+    return couleur, pieces
+
+
+def trouver_coup(partie, chemin):
+    """
+    Retrouve, parmi les coups permis au joueur courant d'une partie, le coup qui suit un chemin. Une prise multiple
+    peut être abrégée par sa source et sa cible ("26x10") si elle est la seule à relier ces deux cases.
+
+    :param partie: La partie.
+    :param chemin: Le chemin du coup (voir lire_notation).
+    :type chemin: tuple de positions.
+    :return: Le coup (instance de Coup).
+    :raise ValueError: Si le coup est illégal ou ambigu.
+    """
+    legaux = partie.lister_coups()
+    coups = [coup for coup in legaux if coup.chemin == chemin]
+    if not coups and len(chemin) == 2:
+        coups = [coup for coup in legaux if coup.prises and coup.source == chemin[0] and coup.cible == chemin[1]]
+    if len(coups) != 1:
+        raise ValueError("Coup illégal ou ambigu: {}".format(notation(Coup(chemin, prises_du_chemin(chemin)))))
+    return coups[0]
+
+
+class PartiePDN:
+    """
+    Une partie lue ou à écrire en PDN: ses étiquettes (Event, Result, FEN, ...), les chemins de ses coups et son
+    résultat.
+    """
+
+    def __init__(self, chemins=None, resultat=INCONNU, etiquettes=None):
+        """
+        :param chemins: Les chemins des coups, dans l'ordre.
+        :type chemins: liste de tuples de positions.
+        :param resultat: Le résultat (VICTOIRE_BLANC, VICTOIRE_NOIR, NULLE ou INCONNU).
+        :type resultat: string.
+        :param etiquettes: Les étiquettes de la partie, dans l'ordre où elles sont écrites.
+        :type etiquettes: dict.
+        """
+        self.chemins = chemins if chemins is not None else []
+        self.resultat = resultat
+        self.etiquettes = etiquettes if etiquettes is not None else {}
+
+    @classmethod
+    def depuis_partie(cls, partie, resultat=INCONNU, etiquettes=None):
+        """
+        Crée une partie PDN à partir des coups d'une Partie commencée à la position initiale.
+        """
+        return cls([coup.chemin for coup in partie.coups], resultat, etiquettes)
+
+    def rejouer(self, partie):
+        """
+        Rejoue les coups dans une partie, à partir de la position de l'étiquette FEN (ou de la position initiale), en
+        vérifiant que chaque coup est légal (voir trouver_coup).
+
+        :param partie: La partie à utiliser (elle est réinitialisée).
+        :type partie: Partie.
+        :return: La liste des coups joués (instances de Coup).
+        :raise ValueError: Si un coup est illégal.
+        """
+        partie.nouvelle_partie()
+        if "FEN" in self.etiquettes:
+            partie.couleur_joueur_courant, pieces = lire_fen(self.etiquettes["FEN"])
+            partie.damier.charger_pieces(pieces)
+
+        for chemin in self.chemins:
+            partie.jouer_coup(trouver_coup(partie, chemin))
+        return partie.coups
+
+
+def ecrire_partie(fichier, partie_pdn):
+    """
+    Écrit une partie à la fin d'un fichier PDN: ses étiquettes, ses coups, son résultat, puis une ligne vide.
+
+    :param fichier: Le fichier, ouvert en écriture texte.
+    :param partie_pdn: La partie.
+    :type partie_pdn: PartiePDN.
+    """
+    etiquettes = dict(partie_pdn.etiquettes)
+    etiquettes["Result"] = partie_pdn.resultat
+    premier_trait = "blanc"
+    if "FEN" in etiquettes:
+        premier_trait = "blanc" if etiquettes["FEN"].strip().startswith("W") else "noir"
+
+    lignes = ['[{} "{}"]\n'.format(nom, str(valeur).replace('"', "'")) for nom, valeur in etiquettes.items()]
+    coups = [Coup(chemin, prises_du_chemin(chemin)) for chemin in partie_pdn.chemins]
+    fichier.write("".join(lignes) + texte_coups(coups, premier_trait, partie_pdn.resultat) + "\n")
+
+
+def lire_parties(fichier):
+    """
+    Lit les parties d'un fichier PDN, une à la fois: une seule partie est gardée en mémoire, peu importe la taille
+    du fichier. Une partie se termine par son résultat, ou au début des étiquettes de la partie suivante.
+
+    :param fichier: Le fichier, ouvert en lecture texte (ou tout itérable de lignes).
+    :return: Un générateur d'instances de PartiePDN.
+    :raise ValueError: Si un coup est écrit dans une notation invalide.
+    """
+    etiquettes = {}
+    texte = []
+    for ligne in fichier:
+        ligne = ligne.strip()
+        correspondance = _ETIQUETTE.match(ligne)
+        if correspondance:
+            if texte:
+                yield _creer_partie(etiquettes, texte)
+                etiquettes, texte = {}, []
+            etiquettes[correspondance.group(1)] = correspondance.group(2)
+        elif ligne:
+            texte.append(ligne)
+            if ligne.split()[-1] in RESULTATS:
+                yield _creer_partie(etiquettes, texte)
+                etiquettes, texte = {}, []
+
+    if etiquettes or texte:
+        yield _creer_partie(etiquettes, texte)
+
+
+def _creer_partie(etiquettes, texte):
+    chemins, resultat = lire_texte_coups(" ".join(texte))
+    if resultat is None:
+        resultat = etiquettes.get("Result", INCONNU)
+    return PartiePDN(chemins, resultat, etiquettes)
@@ -0,0 +1,84 @@
+#! /usr/bin/env python
+# -*- coding:Utf-8 -*-
+__author__ = "Jean-Francis Roy"
+import argparse
+import time
+from dames.damier import Damier
+from dames.damier_bitboard import DamierBitboard
+from dames.partie import Partie
+
+
+def perft(damier, couleur, profondeur, position_source_forcee=None):
+    """
+    Compte le nombre de positions atteintes après "profondeur" coups complets (voir Damier.lister_coups). Une
+    position où le joueur ne peut plus jouer avant la profondeur demandée ne compte pas.
+
+    :param damier: Le damier de départ (il est remis dans son état initial à la fin).
+    :param couleur: La couleur du joueur qui a le trait.
+    :type couleur: string.
+    :param profondeur: Le nombre de coups complets à jouer.
+    :type profondeur: int.
+    :param position_source_forcee: La position avec laquelle le joueur doit continuer sa prise, ou None.
+    :type position_source_forcee: Tuple (ligne, colonne).
+    :return: Le nombre de positions.
+    """
+    coups = damier.lister_coups(couleur, position_source_forcee)
+    if profondeur <= 1:
+        return len(coups) if profondeur == 1 else 1
+
+    adverse = "noir" if couleur == "blanc" else "blanc"
+    total = 0
+    for coup in coups:
+        damier.jouer_coup(coup)
+        total += perft(damier, adverse, profondeur - 1)
+        damier.annuler_coup(coup)
+    return total
+
+
+def diviser(damier, couleur, profondeur, position_source_forcee=None):
+    """
+    Comme perft, mais retourne le nombre de positions séparément pour chaque coup de départ.
+
+    :return: Une liste de tuples (coup, nombre de positions).
+    """
+    adverse = "noir" if couleur == "blanc" else "blanc"
+    resultats = []
+    for coup in damier.lister_coups(couleur, position_source_forcee):
+        damier.jouer_coup(coup)
+        resultats.append((coup, perft(damier, adverse, profondeur - 1)))
+        damier.annuler_coup(coup)
+    return resultats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compte les positions atteignables (perft) pour vérifier et "
+                                                 "mesurer la génération de coups.")
+    parser.add_argument("profondeur", type=int, nargs="?", default=5, help="nombre de coups complets")
+    parser.add_argument("--fichier", help="partie sauvegardée à utiliser comme position de départ")
+    parser.add_argument("--diviser", action="store_true", help="affiche le nombre de positions par coup de départ")
+    parser.add_argument("--bitboard", action="store_true", help="utilise DamierBitboard au lieu de Damier")
+    arguments = parser.parse_args()
+
+    classe_damier = DamierBitboard if arguments.bitboard else Damier
+    partie = Partie(classe_damier())
+    if arguments.fichier:
+        partie.charger(arguments.fichier)
+    position_forcee = partie.position_source_forcee if partie.doit_prendre else None
+
+    debut = time.perf_counter()
+    if arguments.diviser:
+        total = 0
+        for coup, nombre in diviser(partie.damier, partie.couleur_joueur_courant, arguments.profondeur,
+                                    position_forcee):
+            print("{}: {}".format(coup, nombre))
+            total += nombre
+    else:
+        total = perft(partie.damier, partie.couleur_joueur_courant, arguments.profondeur, position_forcee)
+    duree = time.perf_counter() - debut
+
+    print("positions: {}".format(total))
+    print("temps: {:.3f} s, {:.0f} positions/s".format(duree, total / duree if duree > 0 else 0))
+
+
+if __name__ == "__main__":
+    main()
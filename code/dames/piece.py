@@ -3,40 +3,65 @@
 __author__ = "Jean-Francis Roy"
 
 
+# Codes entiers des couleurs et des types de pièces, plus rapides à comparer que les chaînes.
+BLANC = 0
+NOIR = 1
+PION = 0
+DAME = 1
+
+_CODES_COULEURS = {"blanc": BLANC, "noir": NOIR}
+_CODES_TYPES = {"pion": PION, "dame": DAME}
+
+
 class Piece:
     """
     Classe modélisant une pièce d'un jeu de dames.
+
+    Une pièce n'est qu'une valeur (sa couleur et son type): il n'existe que quatre instances, partagées par tous les
+    damiers. Piece("blanc", "pion") retourne toujours le même objet, qui ne peut pas être modifié. Une pièce ne sait
+    donc pas où elle est sur le damier; l'interface graphique conserve elle-même l'identifiant de chaque pièce
+    dessinée.
     """
 
-    # Variable statique permettant de numéroter les pièces.
-    numero = 0
+    __slots__ = ("couleur", "type_de_piece", "code_couleur", "code_type", "code")
+
+    # Les quatre instances, selon (couleur, type_de_piece).
+    _instances = {}
 
-    def __init__(self, couleur, type_de_piece):
+    def __new__(cls, couleur, type_de_piece):
         """
-        La méthode spéciale __init__ d'une classe est appelée lorsqu'on instancie un nouvel objet. Elle peut prendre
-        des paramètres supplémentaires (ici, "couleur" et "type_de_piece"), qui sont les paramètres nécessaires
-        lorsqu'on crée un nouvel objet. Le mot clé "self" permet de stocker des informations dans l'instance de
-        l'objet. Chaque instance a son propre espace mémoire et peut donc contenir des valeurs différentes dans ses
-        variables membres.
+        Retourne l'instance partagée de la pièce.
 
         :param couleur: couleur de la pièce ("blanc", "noir").
         :type couleur: string.
         :param type_de_piece: type de pièce ("pion", "dame").
         :type type_de_piece: string.
-        :param numero: numéro de la pièce (facultatif).
-        :type numero: int.
         """
-        assert couleur in ["blanc", "noir"], "Piece: couleur invalide."
-        assert type_de_piece in ["pion", "dame"], "Piece: type invalide."
+        assert couleur in _CODES_COULEURS, "Piece: couleur invalide."
+        assert type_de_piece in _CODES_TYPES, "Piece: type invalide."
+
+        return cls._instances[(couleur, type_de_piece)]
 
-        self.couleur = couleur
-        self.type_de_piece = type_de_piece
-        self.numero_unique = Piece.numero
-        Piece.numero += 1
+    @classmethod
+    def _creer(cls, couleur, type_de_piece):
+        piece = object.__new__(cls)
+        object.__setattr__(piece, "couleur", couleur)
+        object.__setattr__(piece, "type_de_piece", type_de_piece)
+        object.__setattr__(piece, "code_couleur", _CODES_COULEURS[couleur])
+        object.__setattr__(piece, "code_type", _CODES_TYPES[type_de_piece])
+        # Numéro de la pièce parmi les quatre: 0 pion blanc, 1 dame blanche, 2 pion noir, 3 dame noire.
+        object.__setattr__(piece, "code", 2 * piece.code_couleur + piece.code_type)
+        cls._instances[(couleur, type_de_piece)] = piece
 
-        self.nom = "%s%s%d" % ("P" if type_de_piece == "pion" else "D",
-                               "B" if couleur == "blanc" else "N",
-                               self.numero_unique)
+    def __setattr__(self, nom, valeur):
+        raise AttributeError("Piece: une pièce ne peut pas être modifiée.")
+
+    def __delattr__(self, nom):
+        raise AttributeError("Piece: une pièce ne peut pas être modifiée.")
+
+    def __reduce__(self):
+        # Une pièce copiée (copy, pickle, multiprocessing) redevient l'instance partagée.
+        return Piece, (self.couleur, self.type_de_piece)
 
     def est_pion(self):
         """
@@ -44,7 +69,7 @@ class Piece:
 
         :return: True si la pièce est un pion, False autrement.
         """
-        return self.type_de_piece == "pion"
+        return self.code_type == PION
 
     def est_dame(self):
         """
@@ -52,7 +77,7 @@ class Piece:
 
         :return: True si la pièce est une dame, False autrement.
         """
-        return self.type_de_piece == "dame"
+        return self.code_type == DAME
 
     def est_blanc(self):
         """
@@ -60,7 +85,7 @@ class Piece:
 
         :return: True si la pièce est de couleur blanche, False autrement.
         """
-        return self.couleur == "blanc"
+        return self.code_couleur == BLANC
 
     def est_noir(self):
         """
@@ -68,13 +93,16 @@ class Piece:
 
         :return: True si la pièce est de couleur noire, False autrement.
         """
-        return self.couleur == "noir"
+        return self.code_couleur == NOIR
 
     def promouvoir(self):
         """
-        Cette méthode permet de "promouvoir" une pièce, c'est à dire la transformer en dame.
+        Cette méthode permet de "promouvoir" une pièce, c'est à dire obtenir la dame de la même couleur. La pièce
+        elle-même n'est pas modifiée.
+
+        :return: La dame de la même couleur.
         """
-        self.type_de_piece = "dame"
+        return Piece(self.couleur, "dame")
 
     def __repr__(self):
         """
@@ -89,3 +117,8 @@ class Piece:
             return "x"
         else:
             return "X"
+
+
+for _couleur in _CODES_COULEURS:
+    for _type_de_piece in _CODES_TYPES:
+        Piece._creer(_couleur, _type_de_piece)
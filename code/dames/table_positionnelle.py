@@ -0,0 +1,42 @@
+#! /usr/bin/env python
+# -*- coding:Utf-8 -*-
+__author__ = "Jean-Francis Roy"
+
+# Table positionnelle: la valeur de chaque pièce sur chaque case, en centièmes de pion, du point de vue des blancs
+# (les valeurs des pièces noires sont négatives). Le score d'un damier est la somme des valeurs de ses pièces; comme
+# le hash de Zobrist, le damier le tient à jour à chaque ajout ou retrait de pièce.
+#
+# La table est une liste indexée par Piece.code, dont chaque élément associe une position (ligne, colonne) à une
+# valeur.
+
+# Valeur des pièces, en centièmes de pion.
+VALEUR_PION = 100
+VALEUR_DAME = 160
+
+# Bonus accordé à un pion pour chaque ligne dont il a avancé vers la promotion.
+BONUS_AVANCEMENT = 3
+
+_POSITIONS = [(ligne, colonne) for ligne in range(8) for colonne in range(8)]
+
+
+def construire_table(valeur_pion=VALEUR_PION, valeur_dame=VALEUR_DAME, bonus_avancement=BONUS_AVANCEMENT):
+    """
+    Construit une table positionnelle: le matériel, plus un bonus pour les pions avancés.
+
+    :param valeur_pion: La valeur d'un pion.
+    :param valeur_dame: La valeur d'une dame.
+    :param bonus_avancement: Le bonus d'un pion pour chaque ligne dont il a avancé.
+    :return: La table, indexée par Piece.code puis par position.
+    """
+    pions_blancs = {position: valeur_pion + bonus_avancement * (7 - position[0]) for position in _POSITIONS}
+    dames_blanches = {position: valeur_dame for position in _POSITIONS}
+    pions_noirs = {position: -(valeur_pion + bonus_avancement * position[0]) for position in _POSITIONS}
+    dames_noires = {position: -valeur_dame for position in _POSITIONS}
+    return [pions_blancs, dames_blanches, pions_noirs, dames_noires]
+
+
+# La table utilisée par défaut par les damiers (et par Ai.evaluation.evaluer).
+TABLE_POSITIONNELLE = construire_table()
+
+# Une table nulle, pour un damier qui ne tient compte que du nombre de pièces.
+TABLE_NULLE = construire_table(0, 0, 0)
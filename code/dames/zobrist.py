@@ -0,0 +1,72 @@
+#! /usr/bin/env python
+# -*- coding:Utf-8 -*-
+__author__ = "Jean-Francis Roy"
+import random
+
+# Clés de hachage de Zobrist. Chaque combinaison (pièce, position) reçoit un nombre aléatoire de 64 bits, et le hash
+# d'une position est le ou exclusif des clés de toutes ses pièces. Ajouter ou retirer une pièce revient donc à
+# appliquer un ou exclusif avec sa clé, ce qui permet au damier de tenir son hash à jour à chaque déplacement.
+#
+# Les clés sont générées à partir d'une graine fixe: un même damier a le même hash dans tous les processus.
+GRAINE = 20140416
+
+_generateur = random.Random(GRAINE)
+
+_POSITIONS = [(ligne, colonne) for ligne in range(8) for colonne in range(8)]
+
+# Clés des pièces, selon leur (couleur, type) puis leur position.
+CLES_PIECES = {}
+for _couleur in ("blanc", "noir"):
+    for _type_de_piece in ("pion", "dame"):
+        CLES_PIECES[(_couleur, _type_de_piece)] = {position: _generateur.getrandbits(64) for position in _POSITIONS}
+
+# Clé ajoutée lorsque c'est au joueur noir de jouer.
+CLE_TRAIT_NOIR = _generateur.getrandbits(64)
+
+# Clés ajoutées lorsque le joueur doit continuer sa prise avec la pièce à une certaine position.
+CLES_POSITION_FORCEE = {position: _generateur.getrandbits(64) for position in _POSITIONS}
+
+
+def cle_piece(position, piece):
+    """
+    Retourne la clé d'une pièce placée à une certaine position.
+
+    :param position: La position de la pièce.
+    :type position: Tuple (ligne, colonne).
+    :param piece: La pièce.
+    :type piece: Piece.
+    :return: La clé, un entier de 64 bits.
+    """
+    return CLES_PIECES[(piece.couleur, piece.type_de_piece)][position]
+
+
+def cle_trait(couleur_joueur, position_source_forcee=None):
+    """
+    Retourne la clé représentant le joueur qui a le trait, et la position avec laquelle il doit jouer s'il y en a
+    une.
+
+    :param couleur_joueur: La couleur du joueur qui a le trait.
+    :type couleur_joueur: string.
+    :param position_source_forcee: La position avec laquelle le joueur doit jouer, ou None.
+    :type position_source_forcee: Tuple (ligne, colonne).
+    :return: La clé, un entier de 64 bits.
+    """
+    cle = CLE_TRAIT_NOIR if couleur_joueur == "noir" else 0
+    if position_source_forcee is not None:
+        cle ^= CLES_POSITION_FORCEE[position_source_forcee]
+    return cle
+
+
+def calculer_hash(cases):
+    """
+    Calcule le hash d'un dictionnaire de cases à partir de zéro. Le damier tient normalement son hash à jour; cette
+    fonction sert surtout à le vérifier.
+
+    :param cases: Dictionnaire associant une position (ligne, colonne) à une pièce.
+    :type cases: dict.
+    :return: Le hash, un entier de 64 bits.
+    """
+    valeur = 0
+    for position, piece in cases.items():
+        valeur ^= cle_piece(position, piece)
+    return valeur
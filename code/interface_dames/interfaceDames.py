@@ -34,6 +34,18 @@ class InterfaceDamier(tk.Frame):
         # Pièces sur le damier
         self.damier = damier
 
+        # Identifiants des pièces dessinées dans le canvas, selon leur position (ligne, colonne).
+        self.items_pieces = {}
+
+        # Identifiants des 64 cases dessinées, et des cases sélectionnées (avec leur position), dans le canvas.
+        self.items_cases = {}
+        self.items_selections = {}
+
+        # Taille du canvas à appliquer lors du prochain redimensionnement, et identifiant de ce redimensionnement
+        # (None s'il n'est pas prévu).
+        self.taille_canvas = None
+        self.redimensionnement_prevu = None
+
         # Calcul de la taille du dessin
         canvas_width = self.n_colonnes * self.taille_case
         canvas_height = self.n_lignes * self.taille_case
@@ -50,8 +62,23 @@ class InterfaceDamier(tk.Frame):
         self.canvas.grid(padx=2, pady=2, sticky=tk.N + tk.S + tk.E + tk.W) #redim la fenetre 
         self.grid(padx=4, pady=4, sticky=tk.N + tk.S + tk.E + tk.W) # redim le plateau
 
+        # On dessine les cases une seule fois: le redimensionnement ne fait que les déplacer.
+        for ligne in range(self.n_lignes):
+            for colonne in range(self.n_colonnes):
+                color = self.couleur1 if (ligne + colonne) % 2 == 0 else self.couleur2
+                self.items_cases[(ligne, colonne)] = self.canvas.create_rectangle(
+                    self.coordonnees_case(ligne, colonne), outline="black", fill=color, tags="case")
+
         # Fait en sorte que le redimensionnement de la fenêtre redimensionne le damier
         self.canvas.bind("<Configure>", self.actualiser)
+
+    def coordonnees_case(self, ligne, colonne):
+        """
+        Retourne les coordonnées (x1, y1, x2, y2) d'une case dans le canvas, selon la taille actuelle des cases.
+        """
+        x1 = colonne * self.taille_case
+        y1 = ligne * self.taille_case
+        return x1, y1, x1 + self.taille_case, y1 + self.taille_case
         
     
 
@@ -65,14 +92,14 @@ class InterfaceDamier(tk.Frame):
 
         # On "dessine" la pièce
         ligne, colonne = position
-        nom_piece = piece.nom
-        self.canvas.create_text(ligne, colonne, text=piece, tags=(nom_piece, "piece"), font=tempfont)
+        item_piece = self.canvas.create_text(ligne, colonne, text=piece, tags="piece", font=tempfont)
+        self.items_pieces[position] = item_piece
         
         # On place la pièce dans le canvas (appel de placer_piece)
-        self.placer_piece((ligne, colonne), nom_piece)
+        self.placer_piece((ligne, colonne), item_piece)
 
 
-    def placer_piece(self, position, nom_piece):
+    def placer_piece(self, position, item_piece):
         """
         Place une pièce à la position donnée (ligne, colonne).
         """
@@ -82,23 +109,36 @@ class InterfaceDamier(tk.Frame):
         # Placer les pieces au centre des cases.
         x = (colonne * self.taille_case) + int(self.taille_case / 2)
         y = (ligne * self.taille_case) + int(self.taille_case / 2)
+        self.canvas.coords(item_piece, x, y)
 
-        # On change la taille de la police d'écriture selon la taille actuelle des cases.
-        tempfont = ('Helvetica', self.taille_case//2)
-        self.canvas.itemconfigure(nom_piece, font=tempfont)
-        self.canvas.coords(nom_piece, x, y)
+    def appliquer_coup(self, coup):
+        """
+        Met à jour les pièces dessinées après un déplacement (voir Partie.ajouter_observateur): seule la pièce jouée
+        est déplacée, les pièces prises sont effacées et le dessin d'une pièce promue est changé. Si coup est None,
+        le damier a été remplacé et toutes les pièces sont redessinées.
+        """
+        if coup is None:
+            # Le damier a été remplacé (nouvelle partie ou chargement): toutes les pièces sont redessinées.
+            self.ActualiserPieces(True, False)
+            return
+        item_piece = self.items_pieces.pop(coup.source)
+        for position in coup.prises:
+            self.canvas.delete(self.items_pieces.pop(position))
+        self.items_pieces[coup.cible] = item_piece
+        if coup.promotion:
+            self.canvas.itemconfigure(item_piece, text=self.damier.get_piece(coup.cible))
+        self.placer_piece(coup.cible, item_piece)
     
     def selectCase(self, position, color):
         """
         Selection de la case (afficher d'une manière graphique la case selectionné)
         """
-        x1 = position[0] * self.taille_case
-        x2 = x1+self.taille_case
-        y1 = position[1]*self.taille_case
-        y2 = y1+self.taille_case
+        # Dans l'interface, la position est (colonne, ligne).
         if color == "yellow":
             self.canvas.delete("selected")
-        self.canvas.create_rectangle(x1, y1, x2, y2, outline="black", fill=color, tags="selected")
+        item_selection = self.canvas.create_rectangle(self.coordonnees_case(position[1], position[0]),
+                                                      outline="black", fill=color, tags="selected")
+        self.items_selections[item_selection] = position
         # on met les pièces au dessus de la selection de case
         self.canvas.tag_raise("piece")
 
@@ -108,11 +148,14 @@ class InterfaceDamier(tk.Frame):
             self.damier.initialiser_damier_par_default()
         if Create:
             self.canvas.delete("piece")
+            self.items_pieces = {}
             for position, piece in self.damier.cases.items():
                 self.ajouter_piece(position, piece)
         else:
-            for position, piece in self.damier.cases.items():
-                self.placer_piece(position, piece.nom)
+            # On change la taille de la police d'écriture selon la taille actuelle des cases.
+            self.canvas.itemconfigure("piece", font=('Helvetica', self.taille_case//2))
+            for position, item_piece in self.items_pieces.items():
+                self.placer_piece(position, item_piece)
 
         # On mets les pieces au dessus des cases
         self.canvas.tag_raise("piece")
@@ -120,41 +163,39 @@ class InterfaceDamier(tk.Frame):
 
     def actualiser(self, event):
         """
-        Redessine le damier lorsque la fenetre est redimensionnée.
+        Prévoit de redessiner le damier lorsque la fenetre est redimensionnée. Pendant qu'on tire sur la fenêtre, les
+        événements se suivent de près: le damier n'est redessiné qu'une fois, lorsque Tk n'a plus rien à traiter.
         """
-        
+        self.taille_canvas = (event.width, event.height)
+        if self.redimensionnement_prevu is None:
+            self.redimensionnement_prevu = self.after_idle(self.redimensionner)
+
+    def redimensionner(self):
+        """
+        Redessine le damier à la dernière taille reçue par actualiser, en déplaçant les cases, les cases
+        sélectionnées et les pièces déjà dessinées.
+        """
+        self.redimensionnement_prevu = None
+
         # Calcul de la nouvelle taille du damier
-        x_size = int((event.width - 1) / self.n_colonnes)
-        y_size = int((event.height - 1) / self.n_lignes)
-        self.taille_case = min(x_size, y_size)
-
-        # On efface les cases
-        self.canvas.delete("case")
-        # On efface la case selected si il y en a une
-        self.canvas.delete("selected")
-        
+        largeur, hauteur = self.taille_canvas
+        x_size = int((largeur - 1) / self.n_colonnes)
+        y_size = int((hauteur - 1) / self.n_lignes)
+        taille_case = min(x_size, y_size)
+        if taille_case == self.taille_case:
+            return
+        self.taille_case = taille_case
+
+        for (ligne, colonne), item_case in self.items_cases.items():
+            self.canvas.coords(item_case, self.coordonnees_case(ligne, colonne))
+
+        # Les cases sélectionnées qui ont été effacées depuis sont oubliées.
+        selections = self.canvas.find_withtag("selected")
+        self.items_selections = {item: position for item, position in self.items_selections.items()
+                                 if item in selections}
+        for item_selection, position in self.items_selections.items():
+            self.canvas.coords(item_selection, self.coordonnees_case(position[1], position[0]))
 
-        # On les redessine
-        color = self.couleur2
-        for row in range(self.n_lignes):
-            #Alternance des couleurs
-            if color == self.couleur2:
-                color = self.couleur1
-            else:
-                color = self.couleur2
-
-            for col in range(self.n_colonnes):
-                x1 = col * self.taille_case
-                y1 = row * self.taille_case
-                x2 = x1 + self.taille_case
-                y2 = y1 + self.taille_case
-                self.canvas.create_rectangle(x1, y1, x2, y2, outline="black", fill=color, tags="case")
-
-                #Alternance des couleurs
-                if color == self.couleur2:
-                    color = self.couleur1
-                else:
-                    color = self.couleur2
         self.ActualiserPieces(False,False)
 
 
@@ -170,6 +211,7 @@ class JeuDeDames:
        
         self.MenuJeu(self.fenetre) #définition des menus pour le jeu
         self.AI = True # Variable pour le controle du jeu contre l'ordinateur
+        self.attenteAi = None # Identifiant du prochain appel à VerifierCoupAi pendant que l'ordinateur réfléchit
         
         
         # On a besoin d'une partie.
@@ -178,6 +220,8 @@ class JeuDeDames:
         # On a besoin d'un damier, qu'on placera dans notre fenêtre...
         self.interface_damier = InterfaceDamier(self.fenetre, 64,self.partie.damier)
         self.interface_damier.grid()
+        # Le damier dessiné suit les déplacements joués dans la partie.
+        self.partie.ajouter_observateur(self.interface_damier.appliquer_coup)
 
         
         self.interface_droite = tk.LabelFrame(self.fenetre, borderwidth=1,relief=RAISED)
@@ -187,8 +231,10 @@ class JeuDeDames:
         self.afich_joueur = tk.Label(self.joueur,text="Joueur à jouer:" , width=20)
         self.etiq_joueur = tk.Label(self.joueur,text=self.partie.couleur_joueur_courant, width=20)
        
+        self.etiq_reflexion = tk.Label(self.joueur,text="", width=20)
         self.afich_joueur.grid()
         self.etiq_joueur.grid()
+        self.etiq_reflexion.grid()
         self.joueur.grid(row=0,column=0,padx=5,pady=5,sticky="n")
         # Pointage
         self.pointage = tk.LabelFrame(self.interface_droite, borderwidth=1,relief=SUNKEN,text="Pointage")
@@ -218,6 +264,7 @@ class JeuDeDames:
         self.etiquettetest.grid()
         self.interface_droite.grid(row=0,column=1,sticky="ne", padx=5, pady=5)
         self.fenetre.bind("<Button-1>",self.click)
+        self.fenetre.protocol("WM_DELETE_WINDOW", self.Quitter)
 
         # Truc pour le redimensionnement automatique des éléments de la fenêtre.
         self.fenetre.grid_columnconfigure(0, weight=1)
@@ -259,7 +306,7 @@ class JeuDeDames:
         try:
             self.partie.valider_position_source(positionInverse)
             self.interface_damier.selectCase(position, "yellow")
-            listePosition = self.partie.damier.lister_deplacements_possibles_a_partir_de_position(positionInverse,self.partie.joueur_courant_peut_prendre_piece_adverse())
+            listePosition = self.partie.deplacements_possibles(positionInverse)
             for positionPossible in listePosition:
                 positionPossible = (positionPossible[1],positionPossible[0])
                 self.interface_damier.selectCase(positionPossible,"green")
@@ -277,6 +324,9 @@ class JeuDeDames:
 
     def GestionduJeux(self, event):
         """ Gestion du jeu principal """
+        if self.aicontrol.recherche_en_cours():
+            # On attend le coup de l'ordinateur.
+            return
         try:
             if event.widget.widgetName == "canvas":
                 damierSize = self.getDamierSize()
@@ -287,21 +337,16 @@ class JeuDeDames:
                         lastclick = self.currentSelectedPosition
                         destInverse = (damierPosition[1],damierPosition[0])
                         sourceInverse = (lastclick[1],lastclick[0])
-                        doitPrendre = self.partie.joueur_courant_peut_prendre_piece_adverse()
-                        currentPossibilities = self.partie.damier.lister_deplacements_possibles_a_partir_de_position(sourceInverse,doitPrendre)
+                        currentPossibilities = self.partie.deplacements_possibles(sourceInverse)
                         if destInverse in currentPossibilities:
-                            self.partie.damier.deplacer(sourceInverse,destInverse)
-                            self.Affiche_histo(sourceInverse, destInverse)
+                            # La partie termine le tour, ou force le joueur à continuer sa prise avec la même pièce.
+                            if self.partie.deplacer(sourceInverse,destInverse) is not None:
+                                self.AfficherHistorique()
+                                self.etiq_joueur["text"] = self.ShowCurrentPlayer()
                             self.CalculPointage()
-                            self.interface_damier.ActualiserPieces(True,False)
                             self.interface_damier.canvas.delete("selected")
                             self.interface_damier.canvas.delete("positionPossible")
                             self.currentSelectedPosition = []
-                            maintenantdoitPrendre = self.partie.damier.position_peut_prendre_une_piece_adverse(destInverse)
-                            if not maintenantdoitPrendre or not doitPrendre:
-                                self.partie.passer_au_joueur_suivant()
-                            
-                                self.etiq_joueur["text"] = self.ShowCurrentPlayer()
                             Continue = False
                     #HighLight la case
                     if Continue:
@@ -315,31 +360,56 @@ class JeuDeDames:
                 tk.messagebox.showwarning("NULLE","La partie est nulle\nDémarrez une nouvelle partie")
     
     def aiPlay(self):
-        doitPrendre = self.partie.joueur_courant_peut_prendre_piece_adverse()
-        if not doitPrendre:
-            self.aiCurrentPlay()
-        while doitPrendre:
-            doitPrendre = self.aiCurrentPlay()
-        self.partie.passer_au_joueur_suivant()
+        """ Lance la recherche du coup de l'ordinateur, sans bloquer la fenêtre """
+        # L'AI choisit un tour complet (toutes les prises d'une prise multiple d'un seul coup), dans un fil
+        # d'exécution séparé. VerifierCoupAi attend le résultat.
+        if self.aicontrol.recherche_en_cours():
+            return
+        self.aicontrol.lancer_recherche()
+        self.etiq_reflexion["text"] = "L'ordinateur réfléchit"
+        self.attenteAi = self.fenetre.after(50, self.VerifierCoupAi)
+
+    def VerifierCoupAi(self):
+        """ Joue le coup de l'ordinateur lorsque sa recherche est terminée """
+        if not self.aicontrol.recherche_terminee():
+            # Les points défilent pendant que l'ordinateur réfléchit.
+            texte = self.etiq_reflexion["text"]
+            self.etiq_reflexion["text"] = texte + "." if not texte.endswith("...") else texte.rstrip(".")
+            self.attenteAi = self.fenetre.after(200, self.VerifierCoupAi)
+            return
+
+        self.attenteAi = None
+        self.etiq_reflexion["text"] = ""
+        coup = self.aicontrol.coup_trouve()
+        if coup is None:
+            # L'ordinateur ne peut pas jouer.
+            if not self.VerifGagnant():
+                tk.messagebox.showwarning("NULLE","La partie est nulle\nDémarrez une nouvelle partie")
+            return
+        self.partie.jouer_coup(coup)
+        self.AfficherHistorique()
+        self.CalculPointage()
         self.etiq_joueur["text"] = self.ShowCurrentPlayer()
 
-    def aiCurrentPlay(self):
-        bestMove = self.Aiset()
-        source = bestMove[0]
-        sourceInverse = (source[1],source[0])
-        destination = bestMove[1]
-        destinationInverse = (destination[1],destination[0])
-        self.partie.damier.deplacer(source,destination)
-        self.Affiche_histo(source, destination)
-        doitPrendre = self.partie.damier.position_peut_prendre_une_piece_adverse(destination)
-        self.CalculPointage()
-        self.interface_damier.ActualiserPieces(True,False)
-        return doitPrendre
-    
-    def Affiche_histo(self,source,destination):
-        """Affiche L'historique des coups dans la fenetre"""
-        chaine=self.etiq_joueur["text"] + str(source)+ " " + str(destination) + "\n"
-        self.historique.insert(END, chaine)
+    def ArreterAi(self):
+        """ Interrompt la réflexion de l'ordinateur, s'il y a lieu, sans jouer son coup """
+        if self.attenteAi is not None:
+            self.fenetre.after_cancel(self.attenteAi)
+            self.attenteAi = None
+        self.aicontrol.annuler_recherche()
+        self.etiq_reflexion["text"] = ""
+
+    def Quitter(self):
+        """ Ferme la fenêtre après avoir arrêté l'ordinateur """
+        self.ArreterAi()
+        self.aicontrol.fermer()
+        self.fenetre.destroy()
+
+    def AfficherHistorique(self):
+        """Affiche L'historique des coups de la partie (en notation PDN) dans la fenetre"""
+        self.historique.delete(1.0,END)
+        self.historique.insert(END, self.partie.texte_historique())
+        self.historique.see(END)
         
 
     def MenuJeu(self, fenetre):
@@ -352,7 +422,7 @@ class JeuDeDames:
         menuPartie.add_command(label="Charger une Partie avec historique", command=self.ChargerJeuHistorique)
         menuPartie.add_command(label="Sauvegarder une partie", command=self.SauveJeu)
         menuPartie.add_command(label="Sauvegarder une partie avec historique", command=self.SauveJeuHistorique)
-        menuPartie.add_command(label="Quitter", command=fenetre.destroy) 
+        menuPartie.add_command(label="Quitter", command=self.Quitter) 
   
         menuHelp = tk.Menu(mainmenu) ## Menu Fils 
         menuHelp.add_command(label="A propos", command=self.aPropos) 
@@ -388,61 +458,48 @@ class JeuDeDames:
     def CalculPointage(self):
         """ Calcul et affichage du pointage """
         
-        noir = 12
-        blanc = 12
-        for piece in self.partie.damier.cases.values():
-            if str(piece) == "x" or str(piece) == "X":
-                blanc = blanc - 1
-            elif str(piece) == "o" or str(piece) == "O":
-                noir = noir - 1
+        # Chaque joueur a un point par pièce adverse prise.
+        blanc = 12 - self.partie.damier.compter_pieces("noir")
+        noir = 12 - self.partie.damier.compter_pieces("blanc")
         self.pointBlanc["text"] = str(blanc)
         self.pointNoir["text"] = str(noir)
 
-    def Aiset(self):
-        bestMove = self.aicontrol.StartAIGet()
-        return bestMove
-        
     def deplacerPiece(self,source,destination):
         self.interface_damier.damier.deplacer(source,destination)
         
 
     def NouveauJeu(self):
         """ Démarre une nouvelle partie """
-        #Partie.nouvelle_partie
+        self.ArreterAi()
+        self.partie.nouvelle_partie()
         self.historique.delete(1.0,END)
-        self.interface_damier.ActualiserPieces(True,True)
-        self.partie.historique = ""
         self.CalculPointage()
         self.ShowCurrentPlayer()
         self.AI = False
 
     def NouveauJeuAi(self):
         """ Nouvelle partie contre l'ordinateur """
-        #Partie.nouvelle_partie
+        self.ArreterAi()
+        self.partie.nouvelle_partie()
         self.historique.delete(1.0,END)
-        self.interface_damier.ActualiserPieces(True,True)
-        self.partie.historique = ""
         self.CalculPointage()
         self.ShowCurrentPlayer()
         self.AI = True
                 
     def ChargerJeu(self):
         """ Charge une partie sans historique """
-        self.partie.historique = ""
-        fileName = filedialog.askopenfile(filetypes=[("Save Games", "*.sav")])
+        self.ArreterAi()
+        fileName = filedialog.askopenfile(filetypes=[("Save Games", "*.sav"), ("Sauvegardes binaires", "*.damb")])
         try:
             if fileName!=None:
-            
-                self.historique.delete(1.0,END)
-                avecHistorique = self.partie.charger(fileName.name)
+                # Le fichier est d'abord lu dans une partie à part: la partie en cours n'est remplacée qu'une fois le
+                # chargement confirmé.
+                avecHistorique = Partie().charger(fileName.name)
                 if avecHistorique:
                     if not self.QuestionChargementErreur("Il y a un historique dans le fichier\nVoulez vous le charger quand même\nsans l'historique?"):
                         raise ProblemeChargement("Chargement non complété\nIl contient un historique")
-                    else:
-                        self.ContinueChargement()
-                else:
-                    self.ContinueChargement()
-           
+                self.partie.charger(fileName.name)
+                self.ContinueChargement()
             else:
                 self.message["text"] ="Chargement réussi"
         except ProblemeChargement as e:
@@ -450,19 +507,17 @@ class JeuDeDames:
 
     def ChargerJeuHistorique(self):
         """ Charge une partie avec historique """
-        self.partie.historique = ""
-        fileName = filedialog.askopenfile(filetypes=[("Save Games", "*.sav")])
+        self.ArreterAi()
+        fileName = filedialog.askopenfile(filetypes=[("Save Games", "*.sav"), ("Sauvegardes binaires", "*.damb")])
         try:
             if fileName!=None:
-                self.historique.delete(1.0,END)
-                avecHistorique = self.partie.charger(fileName.name)
+                # Comme pour ChargerJeu, la partie en cours n'est remplacée qu'une fois le chargement confirmé.
+                avecHistorique = Partie().charger(fileName.name)
                 if not avecHistorique:
                     if not self.QuestionChargementErreur("Il n'y a pas d'historique dans le fichier\nVoulez vous le charger quand même?"):
-                        raise ProblemeChargement("Chargement non complété\nIl contient aucun historique")    
-                    else:
-                        self.ContinueChargement()
-                else:
-                    self.ContinueChargement(True)
+                        raise ProblemeChargement("Chargement non complété\nIl contient aucun historique")
+                self.partie.charger(fileName.name)
+                self.ContinueChargement(avecHistorique)
             else:
                 self.message["text"] ="Chargement réussi"
         except ProblemeChargement as e:
@@ -471,9 +526,13 @@ class JeuDeDames:
     def ContinueChargement(self,historique = False):
         """Continue avec le chargement du jeux avec ou sans historique"""
         try:
-            self.interface_damier.ActualiserPieces(True,False)
+            # Les pièces ont déjà été redessinées par appliquer_coup, averti du chargement par la partie.
             if historique:
-                self.historique.insert(END, self.partie.historique)
+                self.AfficherHistorique()
+            else:
+                self.historique.delete(1.0,END)
+                self.partie.coups = []
+                self.partie.historique = ""
             self.CalculPointage()
         except ProblemeChargement as e:
             self.message["text"] =e.msg
@@ -492,14 +551,14 @@ class JeuDeDames:
         """ Sauvegarde une partie dans un ficher """
         self.file_opt = options = {}
         options['defaultextension'] = '.sav'
-        options['filetypes'] = [("Save Games", "*.sav")]
+        options['filetypes'] = [("Save Games", "*.sav"), ("Sauvegardes binaires", "*.damb")]
         options['initialdir'] = 'C:\\'
         options['initialfile'] = 'mySave.sav'
         options['title'] = 'Sauvegarder votre Jeux de Dames'
         filename=filedialog.asksaveasfile(mode='w', **self.file_opt)
         if filename!=None:
             try:
-                self.partie.sauvegarder(filename.name,"")
+                self.partie.sauvegarder(filename.name,False,filename.name.endswith(".damb"))
             except ProblemeSauvegarde as e:
                 self.message["text"] = e.msg
             else:
@@ -509,14 +568,14 @@ class JeuDeDames:
         """ Sauvegarde une partie dans un fichier avec l'historique"""
         self.file_opt = options = {}
         options['defaultextension'] = '.sav'
-        options['filetypes'] = [("Save Games", "*.sav")]
+        options['filetypes'] = [("Save Games", "*.sav"), ("Sauvegardes binaires", "*.damb")]
         options['initialdir'] = 'C:\\'
         options['initialfile'] = 'mySave.sav'
         options['title'] = 'Sauvegarder votre Jeux de Dames'
         filename=filedialog.asksaveasfile(mode='w', **self.file_opt)
         if filename!=None:
             try:
-                self.partie.sauvegarder(filename.name,self.historique.get(1.0, END))
+                self.partie.sauvegarder(filename.name,True,filename.name.endswith(".damb"))
             except ProblemeSauvegarde as e:
                 self.message["text"] = e.msg
             else:
@@ -0,0 +1,348 @@
+#! /usr/bin/env python
+# -*- coding:Utf-8 -*-
+__author__ = "Jean-Francis Roy"
+import argparse
+import asyncio
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dames.coup import position_case
+from dames.exceptions import PositionSourceInvalide, PositionCibleInvalide
+from dames.pdn import notation
+from serveur_dames.session import Session
+
+# Protocole du serveur: une commande par ligne, une réponse ou un message par ligne, en UTF-8. Les cases sont
+# numérotées de 1 à 32 comme en notation PDN, et les coups écrits en notation PDN (voir dames.pdn).
+#
+#   creer humain                    -> session N blanc: une partie entre deux humains, que l'autre rejoint
+#   creer ai [blanc|noir]           -> session N COULEUR: une partie contre l'ordinateur, avec la couleur donnée
+#                                      (blanc par défaut)
+#   rejoindre N                     -> session N noir
+#   deplacer SOURCE CIBLE           joue un déplacement (un seul saut d'une prise multiple)
+#   coups                           -> coups C1 C2 ... (les coups complets permis au joueur qui a le trait)
+#   etat                            -> etat FEN [forcee N] [fin GAGNANT]
+#   memoire                         -> memoire SESSIONS OCTETS
+#   quitter                         quitte la session et ferme la connexion
+#
+# Le serveur envoie à tous les clients d'une session "deplacement C" pour chaque déplacement joué, puis la ligne
+# d'état lorsqu'elle change (voir Session.etat), et "session N expiree" ou "session N fermee" lorsque la session
+# est fermée. Une commande invalide donne une ligne "erreur MESSAGE".
+IDENTIFIANT = "JeuDeDame"
+PORT_DEFAUT = 8765
+
+# Une session sans activité depuis ce délai, en secondes, est fermée.
+DELAI_INACTIVITE = 600
+
+# Mémoire totale permise pour les sessions, en mégaoctets: au-delà, aucune nouvelle session n'est créée.
+MEMOIRE_MAX_MO = 256
+
+
+class Client:
+    """
+    Une connexion au serveur, et la session où elle joue.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.session = None
+        self.couleur = None
+
+    def ecrire(self, ligne):
+        if not self.writer.is_closing():
+            self.writer.write((ligne + "\n").encode("utf-8"))
+
+    def taille_tampon(self):
+        """
+        Retourne le nombre d'octets écrits qui n'ont pas encore été envoyés.
+        """
+        return self.writer.transport.get_write_buffer_size()
+
+
+class ServeurDames:
+    """
+    Serveur asyncio hébergeant plusieurs parties à la fois. Les recherches de l'ordinateur sont faites dans un
+    ThreadPoolExecutor: la boucle d'événements continue de servir les autres sessions pendant qu'il réfléchit.
+    """
+
+    def __init__(self, delai_inactivite=DELAI_INACTIVITE, memoire_max_mo=MEMOIRE_MAX_MO, temps_ai=0.5,
+                 taille_table_mo=1, nombre_fils_ai=2):
+        """
+        :param delai_inactivite: Le délai, en secondes, après lequel une session sans activité est fermée.
+        :param memoire_max_mo: La mémoire totale permise pour les sessions, en mégaoctets (voir Session.memoire).
+        :param temps_ai: Le temps de réflexion de l'ordinateur par coup, en secondes.
+        :param taille_table_mo: La taille de la table de transposition de chaque partie contre l'ordinateur, en
+                                mégaoctets.
+        :param nombre_fils_ai: Le nombre de recherches de l'ordinateur faites en même temps.
+        """
+        self.delai_inactivite = delai_inactivite
+        self.memoire_max = int(memoire_max_mo * 1024 * 1024)
+        self.temps_ai = temps_ai
+        self.taille_table_mo = taille_table_mo
+        self.executeur = ThreadPoolExecutor(max_workers=nombre_fils_ai)
+        self.sessions = {}
+        self.numeros = itertools.count(1)
+        self.commandes = {
+            "creer": self.creer,
+            "rejoindre": self.rejoindre,
+            "deplacer": self.deplacer,
+            "coups": self.lister_coups,
+            "etat": self.envoyer_etat,
+            "memoire": self.envoyer_memoire,
+        }
+
+    def memoire(self):
+        """
+        Retourne la mémoire utilisée par toutes les sessions, en octets (voir Session.memoire).
+        """
+        return sum(session.memoire() for session in self.sessions.values())
+
+    async def servir_client(self, reader, writer):
+        """
+        Sert une connexion: lit et exécute ses commandes jusqu'à ce qu'elle soit fermée ou qu'elle quitte.
+        """
+        client = Client(writer)
+        client.ecrire("id {}".format(IDENTIFIANT))
+        try:
+            while True:
+                ligne = await reader.readline()
+                if not ligne or not self.traiter(client, ligne.decode("utf-8", errors="replace")):
+                    break
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.quitter_session(client)
+            writer.close()
+
+    def traiter(self, client, ligne):
+        """
+        Exécute une commande d'un client.
+
+        :param client: Le client.
+        :type client: Client.
+        :param ligne: La ligne de la commande.
+        :type ligne: string.
+        :return: False si la commande demande de quitter, True autrement.
+        """
+        mots = ligne.split()
+        if not mots:
+            return True
+        if mots[0] == "quitter":
+            return False
+
+        commande = self.commandes.get(mots[0])
+        if commande is None:
+            client.ecrire("erreur commande inconnue: {}".format(mots[0]))
+            return True
+        try:
+            commande(client, mots[1:])
+        except (ValueError, IndexError) as e:
+            client.ecrire("erreur {}".format(e))
+        except (PositionSourceInvalide, PositionCibleInvalide) as e:
+            client.ecrire("erreur {}".format(" ".join(e.msg.split())))
+        if client.session is not None:
+            client.session.toucher()
+            # Relance l'ordinateur si c'est son tour et que sa dernière recherche a échoué.
+            self._lancer_ai(client.session)
+        return True
+
+    def _session_du_client(self, client):
+        if client.session is None:
+            raise ValueError("aucune session")
+        return client.session
+
+    def creer(self, client, arguments):
+        if arguments == ["humain"]:
+            couleur_ai = None
+        elif len(arguments) in (1, 2) and arguments[0] == "ai" and arguments[1:] in ([], ["blanc"], ["noir"]):
+            couleur_ai = "noir" if arguments[1:] != ["noir"] else "blanc"
+        else:
+            raise ValueError("creer attend humain, ou ai suivi d'une couleur")
+        if self.memoire() >= self.memoire_max:
+            raise ValueError("mémoire insuffisante pour une nouvelle session")
+
+        self.quitter_session(client)
+        session = Session(next(self.numeros), couleur_ai, self.temps_ai, self.taille_table_mo)
+        self.sessions[session.numero] = session
+        self._ajouter_joueur(session, client, session.place_libre())
+        self._lancer_ai(session)
+
+    def rejoindre(self, client, arguments):
+        if len(arguments) != 1:
+            raise ValueError("rejoindre attend un numéro de session")
+        session = self.sessions.get(int(arguments[0]))
+        if session is None or session is client.session:
+            raise ValueError("session invalide: {}".format(arguments[0]))
+        couleur = session.place_libre()
+        if couleur is None:
+            raise ValueError("session complète: {}".format(arguments[0]))
+
+        self.quitter_session(client)
+        self._ajouter_joueur(session, client, couleur)
+
+    def _ajouter_joueur(self, session, client, couleur):
+        session.joueurs[couleur] = client
+        client.session = session
+        client.couleur = couleur
+        client.ecrire("session {} {}".format(session.numero, couleur))
+        client.ecrire(session.etat())
+        session.toucher()
+
+    def deplacer(self, client, arguments):
+        """
+        Joue un déplacement du client. Il est validé par Partie.deplacer (avec valider_position_source et
+        valider_position_cible), comme un déplacement fait dans l'interface graphique.
+        """
+        session = self._session_du_client(client)
+        if len(arguments) != 2:
+            raise ValueError("deplacer attend une case source et une case cible")
+        if session.partie.couleur_joueur_courant != client.couleur:
+            raise ValueError("ce n'est pas votre tour")
+        source, cible = [int(argument) for argument in arguments]
+        if not (1 <= source <= 32 and 1 <= cible <= 32):
+            raise ValueError("case invalide")
+
+        session.partie.deplacer(position_case(source - 1), position_case(cible - 1))
+        self._continuer(session)
+
+    def lister_coups(self, client, arguments):
+        session = self._session_du_client(client)
+        client.ecrire(" ".join(["coups"] + [notation(coup) for coup in session.partie.lister_coups()]))
+
+    def envoyer_etat(self, client, arguments):
+        client.ecrire(self._session_du_client(client).etat())
+
+    def envoyer_memoire(self, client, arguments):
+        client.ecrire("memoire {} {}".format(len(self.sessions), self.memoire()))
+
+    def _continuer(self, session):
+        # Après un changement de la partie: diffuse l'état, puis fait jouer l'ordinateur si c'est son tour.
+        session.diffuser(session.etat())
+        self._lancer_ai(session)
+
+    def _lancer_ai(self, session):
+        if session.tour_de_ai() and session.tache_ai is None:
+            session.tache_ai = asyncio.ensure_future(self.faire_jouer_ai(session))
+
+    async def faire_jouer_ai(self, session):
+        """
+        Fait jouer l'ordinateur dans une session. La recherche est faite dans l'exécuteur, sur une copie de la
+        partie. Si la recherche échoue, les clients de la session reçoivent une ligne "erreur", et
+        l'ordinateur cherche de nouveau à la prochaine commande d'un client.
+        """
+        boucle = asyncio.get_running_loop()
+        try:
+            coup = await boucle.run_in_executor(self.executeur, session.ai.choisir_coup, session.partie.copier())
+        except Exception as e:
+            if not session.fermee:
+                session.diffuser("erreur l'ordinateur n'a pas pu jouer: {}".format(e))
+            return
+        finally:
+            session.tache_ai = None
+        if session.fermee:
+            return
+        if coup is None:
+            # La recherche ne retourne aucun coup seulement si le joueur ne peut pas jouer; sinon, on ne bloque pas
+            # la partie.
+            coups = session.partie.lister_coups()
+            if not coups:
+                return
+            coup = coups[0]
+        session.partie.jouer_coup(coup)
+        session.toucher()
+        self._continuer(session)
+
+    def quitter_session(self, client):
+        """
+        Retire un client de sa session. La session est fermée si plus aucun client n'y joue; sinon, les autres
+        clients reçoivent "quitte COULEUR".
+        """
+        session = client.session
+        if session is None:
+            return
+        couleur = client.couleur
+        session.joueurs[couleur] = None
+        client.session = None
+        client.couleur = None
+        if session.clients():
+            session.diffuser("quitte {}".format(couleur))
+        else:
+            self.fermer_session(session, "fermee")
+
+    def fermer_session(self, session, raison):
+        """
+        Ferme une session et en avertit ses clients avec "session N RAISON".
+        """
+        session.diffuser("session {} {}".format(session.numero, raison))
+        for client in session.clients():
+            client.session = None
+            client.couleur = None
+        session.fermer()
+        del self.sessions[session.numero]
+
+    def evincer(self, maintenant=None):
+        """
+        Ferme les sessions sans activité depuis plus de delai_inactivite secondes.
+
+        :return: Le nombre de sessions fermées.
+        """
+        maintenant = time.monotonic() if maintenant is None else maintenant
+        inactives = [session for session in self.sessions.values()
+                     if maintenant - session.derniere_activite > self.delai_inactivite]
+        for session in inactives:
+            self.fermer_session(session, "expiree")
+        return len(inactives)
+
+    async def evincer_sessions_inactives(self):
+        while True:
+            await asyncio.sleep(min(60, self.delai_inactivite))
+            self.evincer()
+
+    async def executer(self, hote="127.0.0.1", port=PORT_DEFAUT, chemin_socket=None):
+        """
+        Démarre le serveur et sert les clients jusqu'à son interruption.
+
+        :param hote: L'adresse où écouter.
+        :param port: Le port TCP où écouter.
+        :param chemin_socket: Le chemin d'un socket Unix où écouter plutôt qu'un port TCP, ou None.
+        """
+        if chemin_socket is not None:
+            serveur = await asyncio.start_unix_server(self.servir_client, chemin_socket)
+        else:
+            serveur = await asyncio.start_server(self.servir_client, hote, port)
+        eviction = asyncio.ensure_future(self.evincer_sessions_inactives())
+        try:
+            async with serveur:
+                await serveur.serve_forever()
+        finally:
+            eviction.cancel()
+            for session in list(self.sessions.values()):
+                self.fermer_session(session, "fermee")
+            self.executeur.shutdown(wait=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur de parties de dames: plusieurs parties entre humains ou "
+                                                 "contre l'ordinateur à la fois (voir serveur_dames.serveur).")
+    parser.add_argument("--hote", default="127.0.0.1", help="adresse où écouter")
+    parser.add_argument("--port", type=int, default=PORT_DEFAUT, help="port TCP où écouter")
+    parser.add_argument("--socket", help="socket Unix où écouter plutôt qu'un port TCP")
+    parser.add_argument("--delai", type=float, default=DELAI_INACTIVITE,
+                        help="délai d'inactivité après lequel une session est fermée, en secondes")
+    parser.add_argument("--memoire", type=float, default=MEMOIRE_MAX_MO,
+                        help="mémoire totale permise pour les sessions, en Mo")
+    parser.add_argument("--temps", type=float, default=0.5, help="temps de réflexion de l'ordinateur, en secondes")
+    parser.add_argument("--table", type=float, default=1,
+                        help="taille de la table de transposition de chaque partie contre l'ordinateur, en Mo")
+    parser.add_argument("--fils", type=int, default=2, help="nombre de recherches de l'ordinateur en même temps")
+    arguments = parser.parse_args()
+
+    serveur = ServeurDames(arguments.delai, arguments.memoire, arguments.temps, arguments.table, arguments.fils)
+    try:
+        asyncio.run(serveur.executer(arguments.hote, arguments.port, arguments.socket))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
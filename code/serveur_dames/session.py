@@ -0,0 +1,126 @@
+#! /usr/bin/env python
+# -*- coding:Utf-8 -*-
+__author__ = "Jean-Francis Roy"
+import sys
+import time
+from dames.coup import numero_case
+from dames.partie import Partie
+from dames.pdn import notation, fen
+from Ai.AiControl import AiControl
+
+
+class Session:
+    """
+    Une partie hébergée par le serveur: la Partie, les clients qui y jouent (un par couleur) et, pour une partie
+    contre l'ordinateur, l'AI qui joue l'autre couleur. Les clients de la session reçoivent chaque déplacement joué.
+    """
+
+    def __init__(self, numero, couleur_ai=None, temps_ai=0.5, taille_table_mo=1):
+        """
+        :param numero: Le numéro de la session, unique dans le serveur.
+        :type numero: int.
+        :param couleur_ai: La couleur jouée par l'ordinateur, ou None pour une partie entre deux humains.
+        :type couleur_ai: string.
+        :param temps_ai: Le temps de réflexion de l'ordinateur par coup, en secondes.
+        :param taille_table_mo: La taille de la table de transposition de l'ordinateur, en mégaoctets.
+        """
+        self.numero = numero
+        self.partie = Partie()
+        self.joueurs = {"blanc": None, "noir": None}
+        self.couleur_ai = couleur_ai
+        self.ai = None
+        if couleur_ai is not None:
+            self.ai = AiControl(self.partie, temps_max=temps_ai, taille_table_mo=taille_table_mo)
+        self.tache_ai = None # La tâche asyncio qui attend le coup de l'ordinateur, pendant qu'il cherche.
+        self.fermee = False
+        self.derniere_activite = time.monotonic()
+
+        self.partie.ajouter_observateur(self._diffuser_deplacement)
+
+    def clients(self):
+        """
+        Retourne les clients connectés à la session.
+        """
+        return [client for client in self.joueurs.values() if client is not None]
+
+    def place_libre(self):
+        """
+        Retourne la couleur qu'un nouveau client peut jouer, ou None si la session est complète.
+        """
+        for couleur, client in self.joueurs.items():
+            if client is None and couleur != self.couleur_ai:
+                return couleur
+        return None
+
+    def diffuser(self, ligne):
+        """
+        Envoie une ligne à tous les clients de la session.
+        """
+        for client in self.clients():
+            client.ecrire(ligne)
+
+    def _diffuser_deplacement(self, coup):
+        if coup is None:
+            # Tout le damier a changé (voir Partie.ajouter_observateur): les clients reçoivent la nouvelle position.
+            self.diffuser(self.etat())
+        else:
+            self.diffuser("deplacement {}".format(notation(coup)))
+
+    def toucher(self):
+        """
+        Note une activité dans la session (voir ServeurDames.evincer_sessions_inactives).
+        """
+        self.derniere_activite = time.monotonic()
+
+    def tour_de_ai(self):
+        """
+        Retourne True si c'est à l'ordinateur de jouer.
+        """
+        return not self.fermee and self.couleur_ai == self.partie.couleur_joueur_courant and not self.terminee()
+
+    def terminee(self):
+        """
+        Retourne True si le joueur qui a le trait ne peut plus jouer: la partie est alors perdue pour lui.
+        """
+        return not self.partie.deplacements_permis()
+
+    def etat(self):
+        """
+        Retourne la ligne d'état de la partie: "etat FEN", suivi de "forcee N" si le joueur doit continuer une prise
+        avec la pièce de la case N, ou de "fin GAGNANT" si la partie est terminée.
+        """
+        partie = self.partie
+        ligne = "etat {}".format(fen(partie.damier, partie.couleur_joueur_courant))
+        if partie.doit_prendre and partie.position_source_forcee is not None:
+            ligne += " forcee {}".format(numero_case(partie.position_source_forcee) + 1)
+        if self.terminee():
+            ligne += " fin {}".format("noir" if partie.couleur_joueur_courant == "blanc" else "blanc")
+        return ligne
+
+    def memoire(self):
+        """
+        Estime la mémoire utilisée par la session, en octets: le damier, l'historique, la table de transposition de
+        l'ordinateur et les données en attente d'envoi vers les clients.
+        """
+        partie = self.partie
+        taille = sys.getsizeof(partie.damier.cases) + sys.getsizeof(partie.coups)
+        taille += sum(sys.getsizeof(coup) + sys.getsizeof(coup.chemin) + sys.getsizeof(coup.prises)
+                      for coup in partie.coups)
+        if self.ai is not None:
+            taille += len(self.ai.recherche.table.tampon)
+        return taille + sum(client.taille_tampon() for client in self.clients())
+
+    def fermer(self):
+        """
+        Ferme la session: interrompt la recherche de l'ordinateur et libère ses ressources. Les clients ne sont pas
+        avertis.
+        """
+        self.fermee = True
+        if self.ai is not None:
+            self.ai.recherche.signal_arret.set()
+            self.ai.fermer()
+        if self.tache_ai is not None:
+            self.tache_ai.cancel()
+            self.tache_ai = None
+        for couleur in self.joueurs:
+            self.joueurs[couleur] = None
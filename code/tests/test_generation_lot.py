@@ -0,0 +1,50 @@
+#! /usr/bin/env python
+# -*- coding:Utf-8 -*-
+__author__ = "Jean-Francis Roy"
+import random
+import pytest
+from dames.coup import numero_case
+from dames.damier import Damier
+from dames.damier_bitboard import DamierBitboard
+from dames.encodage import encoder
+from dames.generation_lot import LotPositions, AUCUNE_CASE
+from dames.partie import Partie
+
+pytest.importorskip("numpy")
+
+
+def _positions_au_hasard(classe_damier, nombre_parties, graine):
+    """
+    Joue des parties au hasard, un déplacement à la fois (les prises multiples passent donc par des positions où la
+    case source est forcée), et retourne chaque position rencontrée avec les déplacements permis selon Partie.
+
+    :return: Une liste de tuples (position encodée, couleur, case forcée, déplacements), où les déplacements sont un
+             ensemble de tuples (position source, position cible).
+    """
+    hasard = random.Random(graine)
+    positions = []
+    for _ in range(nombre_parties):
+        partie = Partie(classe_damier())
+        while len(partie.coups) < 100:
+            permis = partie.deplacements_permis()
+            if not permis:
+                break
+            forcee = partie.position_source_forcee if partie.doit_prendre else None
+            positions.append((encoder(partie.damier), partie.couleur_joueur_courant,
+                              AUCUNE_CASE if forcee is None else numero_case(forcee),
+                              {(source, cible) for source, cibles in permis.items() for cible in cibles}))
+            source = hasard.choice(sorted(permis))
+            partie.deplacer(source, hasard.choice(permis[source]))
+    return positions
+
+
+@pytest.mark.parametrize("classe_damier", [Damier, DamierBitboard])
+def test_deplacements_en_lot(classe_damier):
+    positions = _positions_au_hasard(classe_damier, 20, 0)
+    lot = LotPositions([position[0] for position in positions], [position[1] for position in positions],
+                       [position[2] for position in positions])
+    legaux = lot.deplacements_legaux()[0]
+
+    for numero, (position, couleur, case_forcee, attendus) in enumerate(positions):
+        assert set(lot.lister_deplacements(numero)) == attendus, (numero, couleur, case_forcee)
+        assert legaux[numero].sum() == len(attendus)
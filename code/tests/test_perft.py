@@ -0,0 +1,40 @@
+#! /usr/bin/env python
+# -*- coding:Utf-8 -*-
+__author__ = "Jean-Francis Roy"
+import pytest
+from dames.damier import Damier
+from dames.damier_bitboard import DamierBitboard
+from dames.perft import perft
+
+# Nombres de positions de référence: (damier en chaîne (None pour la position initiale), couleur du joueur, position
+# source forcée, profondeur, nombre de positions attendu). Les hommes prennent aussi vers l'arrière: à partir de la
+# profondeur 5, les nombres diffèrent de ceux publiés pour les dames anglaises.
+_MILIEU_DE_PARTIE = ("0,1,noir,pion\n0,5,noir,pion\n1,2,noir,pion\n1,6,noir,pion\n2,3,noir,pion\n2,7,noir,dame\n"
+                     "3,4,noir,pion\n4,1,blanc,pion\n4,5,blanc,pion\n5,2,blanc,pion\n5,6,blanc,pion\n"
+                     "6,3,blanc,dame\n6,7,blanc,pion\n7,0,blanc,pion\n")
+_PRISE_FORCEE = "2,3,noir,dame\n1,4,noir,pion\n3,4,blanc,pion\n5,4,blanc,pion\n"
+REFERENCES = [
+    (None, "blanc", None, 1, 7),
+    (None, "blanc", None, 2, 49),
+    (None, "blanc", None, 3, 302),
+    (None, "blanc", None, 4, 1469),
+    (None, "blanc", None, 5, 7482),
+    (None, "blanc", None, 6, 37986),
+    (None, "blanc", None, 7, 190146),
+    (_MILIEU_DE_PARTIE, "blanc", None, 5, 5307),
+    (_MILIEU_DE_PARTIE, "noir", None, 5, 5152),
+    (_PRISE_FORCEE, "blanc", (3, 4), 8, 106),
+]
+
+
+@pytest.mark.parametrize("classe_damier", [Damier, DamierBitboard])
+@pytest.mark.parametrize("chaine, couleur, position_forcee, profondeur, attendu", REFERENCES)
+def test_perft(classe_damier, chaine, couleur, position_forcee, profondeur, attendu):
+    damier = classe_damier()
+    if chaine is not None:
+        damier.charger_dune_chaine(chaine)
+    avant = damier.hash_position(couleur, position_forcee)
+
+    assert perft(damier, couleur, profondeur, position_forcee) == attendu
+    # perft remet le damier dans son état initial.
+    assert damier.hash_position(couleur, position_forcee) == avant
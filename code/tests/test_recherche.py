@@ -0,0 +1,27 @@
+#! /usr/bin/env python
+# -*- coding:Utf-8 -*-
+__author__ = "Michel Tremblay"
+
+
+import pytest
+from dames.damier import Damier
+from dames.damier_bitboard import DamierBitboard
+from Ai.recherche import Recherche
+
+
+@pytest.mark.parametrize("classe_damier", [Damier, DamierBitboard])
+@pytest.mark.parametrize("temps_max, noeuds_max", [(None, 1), (None, 2), (None, 10), (0.0, None), (1e-6, None)])
+def test_limites_minimales(classe_damier, temps_max, noeuds_max):
+    # Une recherche interrompue avant la fin de la première itération retourne tout de même un coup permis.
+    damier = classe_damier()
+    coups = [coup.chemin for coup in damier.lister_coups("blanc")]
+    resultat = Recherche().chercher(damier, "blanc", temps_max=temps_max, noeuds_max=noeuds_max)
+    assert resultat.meilleur_coup is not None
+    assert resultat.meilleur_coup.chemin in coups
+
+
+@pytest.mark.parametrize("classe_damier", [Damier, DamierBitboard])
+def test_aucun_coup(classe_damier):
+    damier = classe_damier()
+    damier.charger_dune_chaine("2,3,noir,pion\n")
+    assert Recherche().chercher(damier, "blanc", noeuds_max=1).meilleur_coup is None